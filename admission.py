@@ -0,0 +1,221 @@
+"""
+Admission control and load shedding for the API.
+
+Each request is mapped to a policy key (usually its endpoint) with a priority
+and an optional concurrency limit. Requests start immediately when there is
+capacity; otherwise they wait in a bounded priority queue until a slot frees
+up or their deadline passes. Anything that can't start in time is answered
+right away with 429 (its endpoint is at its own limit) or 503 (the server as a
+whole is saturated) plus Retry-After, so latency for admitted requests stays
+bounded instead of every request slowing down together.
+
+All knobs live here. Environment overrides:
+    FIREFORCE_ADMISSION=0             disable admission control
+    FIREFORCE_MAX_CONCURRENCY=N       requests executing at once (default 8)
+    FIREFORCE_MAX_QUEUE=N             requests waiting at once (default 64)
+    FIREFORCE_QUEUE_TIMEOUT_MS=N      longest a request may wait to start (default 500)
+"""
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+
+from flask import g, jsonify, request
+
+import metrics
+
+ENABLED = os.environ.get("FIREFORCE_ADMISSION", "1").lower() not in ("0", "false", "no")
+MAX_CONCURRENCY = int(os.environ.get("FIREFORCE_MAX_CONCURRENCY", "8"))
+MAX_QUEUE = int(os.environ.get("FIREFORCE_MAX_QUEUE", "64"))
+QUEUE_TIMEOUT = int(os.environ.get("FIREFORCE_QUEUE_TIMEOUT_MS", "500")) / 1000
+
+HIGH, NORMAL, LOW = 0, 1, 2
+
+# policy key -> (priority, max concurrent requests or None for only the global limit)
+POLICIES = {
+    "calculator_predict": (HIGH, None),
+    "nearest_pricing_nodes": (HIGH, None),
+    "get_states": (HIGH, None),
+    "housing_regions": (HIGH, None),
+    "parse_bill_status": (HIGH, None),
+    "predict_electricity": (NORMAL, None),
+    "predict_housing": (NORMAL, None),
+    "housing_history": (NORMAL, None),
+    "parse_bill": (NORMAL, 4),
+    "predict_housing:forest": (NORMAL, 4),
+    "predict_housing:advanced": (LOW, 2),
+    "predict_housing:batch": (LOW, 2),
+    "simulate_portfolio": (NORMAL, 4),
+    "export_predictions": (LOW, 2),
+    "calculator_bulk": (LOW, 2),
+}
+# Never queued or shed: health checks, metrics scrapes and admin calls must work under overload
+EXEMPT = {"health_check", "metrics_endpoint", "admin_reload", "list_models", "admin_register_model", "static"}
+DEFAULT_POLICY = (NORMAL, None)
+
+
+def policy_key(endpoint):
+    """Map a request to its policy key; heavy variants of an endpoint get their own key."""
+    if endpoint == "predict_housing":
+        body = request.get_json(silent=True) if request.is_json else None
+        body = body if isinstance(body, dict) else {}
+        if isinstance(body.get("states"), list):
+            return f"{endpoint}:batch"
+        if body.get("method") in ("advanced", "forest"):
+            return f"{endpoint}:{body['method']}"
+    return endpoint
+
+
+class Rejected(Exception):
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("key", "event", "admitted", "evicted")
+
+    def __init__(self, key):
+        self.key = key
+        self.event = threading.Event()
+        self.admitted = False
+        self.evicted = False
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, max_queue=MAX_QUEUE, timeout=QUEUE_TIMEOUT,
+                 policies=POLICIES):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.policies = policies
+        self._lock = threading.Lock()
+        self._active = 0
+        self._active_by_key = {}
+        self._queue = []  # heap of (priority, seq, waiter)
+        self._seq = itertools.count()
+        self._service_time = 0.05  # EWMA of seconds per request, for Retry-After
+
+    def _limit(self, key):
+        return self.policies.get(key, DEFAULT_POLICY)[1]
+
+    def _has_room(self, key):
+        limit = self._limit(key)
+        return (self._active < self.max_concurrency
+                and (limit is None or self._active_by_key.get(key, 0) < limit))
+
+    def _start(self, key):
+        self._active += 1
+        self._active_by_key[key] = self._active_by_key.get(key, 0) + 1
+
+    def _remove(self, waiter):
+        self._queue = [item for item in self._queue if item[2] is not waiter]
+        heapq.heapify(self._queue)
+
+    def _retry_after(self):
+        backlog = len(self._queue) + self._active
+        return max(1, min(30, math.ceil(self._service_time * backlog / self.max_concurrency)))
+
+    def acquire(self, key):
+        """Block until the request may start; raises Rejected if it can't within the deadline."""
+        priority = self.policies.get(key, DEFAULT_POLICY)[0]
+        with self._lock:
+            waiter = _Waiter(key)
+            heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+            self._dispatch()
+            if waiter.admitted:
+                return 0.0
+            if len(self._queue) > self.max_queue:
+                # Queue full: shed the lowest-priority, newest waiter, which may be this one
+                victim = max(self._queue)[2]
+                self._remove(victim)
+                if victim is waiter:
+                    raise Rejected(503, "queue_full", self._retry_after())
+                victim.evicted = True
+                victim.event.set()
+
+        start = time.perf_counter()
+        waiter.event.wait(self.timeout)
+        with self._lock:
+            if waiter.evicted:
+                raise Rejected(503, "queue_full", self._retry_after())
+            if not waiter.admitted:
+                self._remove(waiter)
+                status = 429 if not self._has_room(key) and self._active < self.max_concurrency else 503
+                raise Rejected(status, "timeout", self._retry_after())
+        return time.perf_counter() - start
+
+    def release(self, key, duration=None):
+        with self._lock:
+            self._active -= 1
+            self._active_by_key[key] -= 1
+            if duration is not None:
+                self._service_time += 0.1 * (duration - self._service_time)
+            self._dispatch()
+
+    def _dispatch(self):
+        # Admit waiters in priority order, skipping any whose own endpoint limit is reached
+        if not self._queue or self._active >= self.max_concurrency:
+            return
+        admitted = []
+        for item in sorted(self._queue):
+            waiter = item[2]
+            if self._active >= self.max_concurrency:
+                break
+            if self._has_room(waiter.key):
+                self._start(waiter.key)
+                waiter.admitted = True
+                admitted.append(waiter)
+        if admitted:
+            self._queue = [item for item in self._queue if not item[2].admitted]
+            heapq.heapify(self._queue)
+            for waiter in admitted:
+                waiter.event.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active": self._active,
+                "queued": len(self._queue),
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "queue_timeout_ms": self.timeout * 1000,
+            }
+
+
+def init_app(app, controller=None):
+    """Register admission hooks; returns the controller (None when disabled)."""
+    if not ENABLED:
+        return None
+    controller = controller or AdmissionController()
+
+    @app.before_request
+    def _admit():
+        if request.endpoint is None or request.endpoint in EXEMPT:
+            return None
+        key = policy_key(request.endpoint)
+        try:
+            waited = controller.acquire(key)
+        except Rejected as e:
+            metrics.inc("fireforce_admission_shed_total", endpoint=key, reason=e.reason, status=str(e.status))
+            response = jsonify({"error": "Server is busy, retry later", "reason": e.reason})
+            response.status_code = e.status
+            response.headers["Retry-After"] = str(e.retry_after)
+            return response
+        metrics.observe("fireforce_admission_wait_seconds", waited, endpoint=key)
+        g._admission = (key, time.perf_counter())
+        return None
+
+    @app.teardown_request
+    def _release(exc):
+        # teardown runs after a streamed body finishes, so exports hold their slot until done
+        admission = g.pop("_admission", None)
+        if admission is not None:
+            key, start = admission
+            controller.release(key, time.perf_counter() - start)
+
+    return controller
@@ -1,10 +1,13 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, has_request_context, request, jsonify, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
+import hmac
+import json
 import sys
 import os
+import shutil
+import tempfile
 
 app = Flask(__name__)
 CORS(app, resources={
@@ -17,21 +20,23 @@ CORS(app, resources={
 
 sys.path.append(os.path.dirname(__file__))
 
-from model import (
-    load_data,
-    build_features,
-    build_features_baseline,
-    fit_ols,
-    what_if_added_dc
-)
-
-df_electricity = None
-beta_b = None
-beta_f = None
-names_b = None
-names_f = None
-
-df_housing = None
+from model import what_if_added_dc
+from markets import iso_what_if
+from model_export import fit_linear
+import portfolio
+import bulk
+import admission
+import export
+from bill_parser import BillParseQueue, QueueFull
+import http_cache
+import metrics
+import profiling
+from metrics import span
+from snapshot import DEFAULT_SPEC, ModelRegistry, build_snapshot
+
+metrics.init_app(app)
+profiling.init_app(app)
+
 cpi_data = {
     2000: 172.2, 2001: 177.1, 2002: 179.9, 2003: 184.0, 2004: 188.9,
     2005: 195.3, 2006: 201.6, 2007: 207.3, 2008: 215.3, 2009: 214.5,
@@ -42,23 +47,61 @@ cpi_data = {
 }
 ANNUAL_INFLATION_RATE = 0.025
 
-def initialize_models():
-    global df_electricity, beta_b, beta_f, names_b, names_f, df_housing
-
-    df_electricity = load_data()
-    Xb, y, names_b = build_features_baseline(df_electricity)
-    beta_b = fit_ols(Xb, y)
-
-    Xf, _, names_f = build_features(df_electricity)
-    beta_f = fit_ols(Xf, y)
+registry = ModelRegistry(build_snapshot)
 
-    housing_path = 'csv-generation/house/processed_states_hyperscale.csv'
-    if os.path.exists(housing_path):
-        df_housing = pd.read_csv(housing_path)
-    else:
-        print(f"Warning: Housing data file not found at {housing_path}")
-
-initialize_models()
+def initialize_models():
+    """
+    Load the default model version synchronously (startup only; use
+    registry.reload_async after). Extra versions listed in the JSON file named
+    by FIREFORCE_MODEL_VERSIONS ([{"name": ..., "pass_through": ..., ...}])
+    are loaded alongside it.
+    """
+    snap = registry.load()
+    versions_file = os.environ.get('FIREFORCE_MODEL_VERSIONS')
+    if versions_file:
+        with open(versions_file) as f:
+            for spec in json.load(f):
+                spec = dict(spec)
+                registry.load(spec, spec.pop('name'), make_latest=False)
+    return snap
+
+# Spawned OCR workers (bill_parser) re-import this file as __mp_main__ when the server is
+# started with `python app.py`; they only run bill_parser functions, so skip loading there
+if __name__ != '__mp_main__':
+    initialize_models()
+    if os.environ.get('FIREFORCE_WATCH_DATA', '0').lower() in ('1', 'true', 'yes'):
+        registry.watch(interval=float(os.environ.get('FIREFORCE_WATCH_INTERVAL', '5')))
+
+@app.before_request
+def _bind_snapshot():
+    # Pin the snapshot for the whole request so a concurrent reload can't mix versions
+    name = request.args.get('model_version')
+    if name is None and request.is_json:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            name = body.get('model_version')
+    snap = registry.get(name)
+    if snap is None:
+        return jsonify({'error': f'Unknown model_version: {name}'}), 404
+    g.snapshot = snap
+
+def current_snapshot():
+    if has_request_context():
+        snap = g.get('snapshot')
+        if snap is not None:
+            return snap
+    return registry.current
+
+def _is_admin():
+    token = os.environ.get('FIREFORCE_ADMIN_TOKEN')
+    provided = request.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(provided, token)
+
+http_cache.init_app(app, lambda: current_snapshot().version, [
+    'get_states', 'housing_history', 'housing_regions', 'housing_forecast', 'housing_event_study'
+])
+# After the conditional-GET hook, so 304s never wait for a slot
+admission_control = admission.init_app(app)
 
 def adjust_for_inflation(value, base_year, target_year, cpi_data=None):
     if cpi_data and base_year in cpi_data and target_year in cpi_data:
@@ -66,51 +109,69 @@ def adjust_for_inflation(value, base_year, target_year, cpi_data=None):
     years_diff = target_year - base_year
     return value * (1 + ANNUAL_INFLATION_RATE) ** years_diff
 
-def validate_data(df, state):
-    required_columns = ['State', 'Date', 'Avg_Home_Value', 'HomeValue_Pct_Change', 'Is_Post_Announcement']
-    missing_cols = [col for col in required_columns if col not in df.columns]
-    if missing_cols:
-        raise ValueError(f"Missing required columns: {missing_cols}")
+def get_region_growth_rates(region, level='state'):
+    """
+    Return (normal_growth, hyperscale_effect) for a region at any level of the
+    snapshot's region index. Rates are precomputed at load; regions with too
+    little data carry their parent's rates.
+    """
+    return current_snapshot().regions.growth_rates(level, region)
 
-    df_state = df[df['State'] == state]
-    if df_state.empty:
-        raise ValueError(f"No data found for state: {state}")
-    return df_state
-
-def get_normal_growth_rate(df, state):
-    df_state = df[df['State'] == state]
-    non_post_df = df_state[df_state['Is_Post_Announcement'] == 0]
-    if non_post_df.empty:
-        non_post_df = df[df['Is_Post_Announcement'] == 0]
-        if non_post_df.empty:
-            return 0.03
-    return non_post_df['HomeValue_Pct_Change'].mean() / 100
-
-def get_hyperscale_pct_change(df, state):
-    df_state = df[df['State'] == state]
-    post_df = df_state[df_state['Is_Post_Announcement'] == 1]
-    if post_df.empty:
-        post_df = df[df['Is_Post_Announcement'] == 1]
-        if post_df.empty:
-            return 0.20
-        return post_df['HomeValue_Pct_Change'].mean() / 100
-    normal_rate = get_normal_growth_rate(df, state)
-    total_rate = post_df['HomeValue_Pct_Change'].mean() / 100
-    return max(total_rate - normal_rate, 0)
-
-def simple_simulate_house_price(state, current_price, years_after=1, base_year=2025):
-    df_state = validate_data(df_housing, state)
+def get_state_electricity_impact(state_code):
+    """
+    Return (what_if_added_dc result, observed price) for the calculator's fixed
+    500 MW scenario, memoized per state on the model snapshot.
+    """
+    snap = current_snapshot()
+    impact = snap.electricity_cache.get(state_code)
+    metrics.record_cache('state_electricity', impact is not None)
+    if impact is None:
+        result = what_if_added_dc(
+            snap.df_electricity,
+            snap.beta_b,
+            snap.names_b,
+            state_code=state_code,
+            added_power_mw=500,  # Medium data center
+            mode="assumption",
+            include_added_load_in_sales=True,
+            share_floor=snap.share_floor,
+            pass_through=snap.pass_through
+        )
+        observed = snap.df_electricity.loc[snap.df_electricity.StateCode == state_code, "AvgRetailPrice_cents_per_kWh"]
+        impact = (result, float(observed.iloc[0]) if not observed.empty else None)
+        snap.electricity_cache[state_code] = impact
+    return impact
 
-    df_state = df_state.copy()
-    df_state['Date'] = pd.to_datetime(df_state['Date'])
-    df_state['Year'] = df_state['Date'].dt.year
+def calculator_state_table():
+    """
+    The calculator's per-state results for bulk.py: the 500 MW price change
+    and the state housing growth rates, with its state-name resolution.
+    """
+    snap = current_snapshot()
+    codes = snap.df_electricity['StateCode'].tolist()
+    price_pct, normal, effect = [], [], []
+    for code in codes:
+        result, observed = get_state_electricity_impact(code)
+        if observed is None:
+            observed = bulk.BASELINE_RATE_CENTS
+        price_pct.append((result['new_pred_c_per_kWh'] - observed) / observed * 100)
+        rates = (np.nan, np.nan)
+        if snap.df_housing is not None:
+            try:
+                rates = get_region_growth_rates(code)
+            except ValueError:
+                pass
+        normal.append(rates[0])
+        effect.append(rates[1])
 
-    df_state['Avg_Home_Value_Real'] = df_state.apply(
-        lambda row: adjust_for_inflation(row['Avg_Home_Value'], row['Year'], 2025, cpi_data), axis=1
-    )
+    def resolve(text):
+        match = snap.gazetteer.lookup(text.lower().strip(), levels=('state',))
+        return match['state'] if match else None
 
-    normal_growth = get_normal_growth_rate(df_housing, state)
-    hyperscale_effect = get_hyperscale_pct_change(df_housing, state)
+    return bulk.StateTable(codes, price_pct, normal, effect, resolve)
+
+def simple_simulate_house_price(state, current_price, years_after=1, base_year=2025, level='state'):
+    normal_growth, hyperscale_effect = get_region_growth_rates(state, level)
 
     total_growth = normal_growth + hyperscale_effect
 
@@ -121,7 +182,10 @@ def simple_simulate_house_price(state, current_price, years_after=1, base_year=2
     return nominal_price, real_price, normal_growth, hyperscale_effect
 
 def advanced_simulate_house_price(state, current_price, future_year=2026, base_year=2025):
-    df_state = validate_data(df_housing, state)
+    snap = current_snapshot()
+    if state not in snap.housing_states:
+        raise ValueError(f"No data found for state: {state}")
+    df_state = snap.df_housing.iloc[snap.housing_state_rows[state]]
 
     if len(df_state) < 3:
         return simple_simulate_house_price(state, current_price, years_after=future_year-base_year, base_year=base_year)
@@ -136,8 +200,7 @@ def advanced_simulate_house_price(state, current_price, future_year=2026, base_y
     X = df_state[['Year', 'Is_Post_Announcement']].values
     y = df_state['Avg_Home_Value_Real'].values
 
-    model = LinearRegression()
-    model.fit(X, y)
+    model = fit_linear(X, y)
 
     future_features = np.array([[future_year, 1]])
     predicted_real_value = model.predict(future_features)[0]
@@ -148,23 +211,53 @@ def advanced_simulate_house_price(state, current_price, future_year=2026, base_y
 
     nominal_price = adjust_for_inflation(real_price, 2025, future_year, cpi_data)
 
-    normal_growth = get_normal_growth_rate(df_housing, state)
+    normal_growth, hyperscale_effect = get_region_growth_rates(state)
     if real_price < current_price * (1 + normal_growth) ** (future_year - base_year):
         return simple_simulate_house_price(state, current_price, years_after=future_year-base_year, base_year=base_year)
 
-    hyperscale_effect = get_hyperscale_pct_change(df_housing, state)
     return nominal_price, real_price, normal_growth, hyperscale_effect
 
-def get_state_housing_predictions(state, base_price=300000, base_year=2025):
+def forest_simulate_house_prices(states, current_prices, years_after=1, base_year=2025):
+    """
+    Simulate several states at once with the persisted RandomForest. Returns
+    one (nominal, real, normal_growth, hyperscale_effect) tuple per state,
+    with the growth rates annualized over the horizon.
+    """
+    forest = current_snapshot().housing_forest
+    with_dc, without_dc = forest.simulate(states, current_prices, years_after, base_year)
+    results = []
+    for current_price, nominal, baseline in zip(current_prices, with_dc, without_dc):
+        total_growth = (nominal / current_price) ** (1 / years_after) - 1
+        normal_growth = (baseline / current_price) ** (1 / years_after) - 1
+        real = adjust_for_inflation(nominal, base_year + years_after, 2025, cpi_data)
+        results.append((float(nominal), real, normal_growth, total_growth - normal_growth))
+    return results
+
+def forecast_simulate_house_price(state, current_price, years_after=1, base_year=2025):
+    """
+    Damped-trend forecast of the state's home values in place of a constant
+    normal growth rate, with the hyperscale effect layered on top as in the
+    simple simulation. Also returns the 80%/95% price intervals.
+    """
+    snap = current_snapshot()
+    ratio, bounds = snap.housing_forecast.growth(state, base_year, base_year + years_after)
+    _, hyperscale_effect = get_region_growth_rates(state)
+    effect = (1 + hyperscale_effect) ** years_after
+
+    nominal_price = current_price * ratio * effect
+    real_price = adjust_for_inflation(nominal_price, base_year + years_after, 2025, cpi_data)
+    normal_growth = ratio ** (1 / years_after) - 1 if years_after else 0.0
+    intervals = {str(level): [current_price * lo * effect, current_price * hi * effect]
+                 for level, (lo, hi) in bounds.items()}
+    return nominal_price, real_price, normal_growth, hyperscale_effect, intervals
+
+def get_state_housing_predictions(state, base_price=300000, base_year=2025, level='state'):
     """
     Generate forward-looking housing predictions from 2025-2030
-    using the predictive model
+    using the predictive model (for a state, or any region at `level`)
     """
-    df_state = validate_data(df_housing, state)
-
-    # Get growth rates from the model
-    normal_growth = get_normal_growth_rate(df_housing, state)
-    hyperscale_effect = get_hyperscale_pct_change(df_housing, state)
+    # Validate the region before simulating
+    get_region_growth_rates(state, level)
 
     # Generate predictions for years 2025-2030
     predictions = []
@@ -173,7 +266,7 @@ def get_state_housing_predictions(state, base_price=300000, base_year=2025):
 
         # Use the predictive model
         nominal, real, _, _ = simple_simulate_house_price(
-            state, base_price, years_after=years_after, base_year=base_year
+            state, base_price, years_after=years_after, base_year=base_year, level=level
         )
 
         # Calculate year-over-year percentage change
@@ -181,7 +274,7 @@ def get_state_housing_predictions(state, base_price=300000, base_year=2025):
             pct_change = 0
         else:
             prev_nominal, _, _, _ = simple_simulate_house_price(
-                state, base_price, years_after=years_after-1, base_year=base_year
+                state, base_price, years_after=years_after-1, base_year=base_year, level=level
             )
             pct_change = ((nominal - prev_nominal) / prev_nominal) * 100
 
@@ -198,18 +291,218 @@ def get_state_housing_predictions(state, base_price=300000, base_year=2025):
 
     return predictions
 
+EXPORT_SCENARIOS = ('assumption', 'trained')
+
+def export_page(cursor=None, limit=None):
+    """
+    Return the sorted state codes after `cursor` (at most `limit` of them)
+    and the cursor to resume from, or None when this page is the last.
+    """
+    snap = current_snapshot()
+    states_electricity = snap.df_electricity['StateCode'].unique().tolist() if snap.df_electricity is not None else []
+    states_housing = snap.df_housing['State'].unique().tolist() if snap.df_housing is not None else []
+    states = sorted(set(states_electricity + states_housing))
+    if cursor:
+        states = [s for s in states if s > cursor.upper()]
+    if limit is not None and limit < len(states):
+        return states[:limit], states[limit - 1]
+    return states, None
+
+def iter_export_batches(states, added_power_mw=500, base_price=300000):
+    """
+    Yield one list of flat records per state, covering every forecast year and
+    electricity scenario, so callers never hold more than one state in memory.
+    """
+    snap = current_snapshot()
+    electricity_states = set(snap.df_electricity['StateCode']) if snap.df_electricity is not None else set()
+    for state in states:
+        electricity = {}
+        if state in electricity_states:
+            observed = float(snap.df_electricity.loc[snap.df_electricity.StateCode == state, 'AvgRetailPrice_cents_per_kWh'].iloc[0])
+            for mode in EXPORT_SCENARIOS:
+                result = what_if_added_dc(
+                    snap.df_electricity,
+                    snap.beta_b if mode == 'assumption' else snap.beta_f,
+                    snap.names_b if mode == 'assumption' else snap.names_f,
+                    state_code=state,
+                    added_power_mw=added_power_mw,
+                    mode=mode,
+                    share_floor=snap.share_floor,
+                    pass_through=snap.pass_through
+                )
+                electricity[mode] = {
+                    'observed_price_c_per_kwh': observed,
+                    'baseline_pred_c_per_kwh': result['baseline_pred_c_per_kWh'],
+                    'new_pred_c_per_kwh': result['new_pred_c_per_kWh'],
+                    'delta_c_per_kwh': result['delta_c_per_kWh'],
+                    'dc_share_new': result['dc_share_new'],
+                }
+
+        try:
+            housing = get_state_housing_predictions(state, base_price=base_price) if snap.df_housing is not None else []
+        except ValueError:
+            housing = []
+        housing_by_year = {p['year']: p for p in housing}
+
+        batch = []
+        for year in range(2025, 2031):
+            point = housing_by_year.get(year, {})
+            for mode in EXPORT_SCENARIOS:
+                record = {
+                    'state': state,
+                    'year': year,
+                    'scenario': mode,
+                    'added_power_mw': float(added_power_mw),
+                    'avg_home_value': point.get('avg_home_value'),
+                    'home_value_pct_change': point.get('pct_change'),
+                }
+                record.update(electricity.get(mode, {}))
+                batch.append(record)
+        yield batch
+
+def resolve_location(params):
+    """
+    Return (lat, lon) from latitude/longitude or a ZIP code in the request
+    parameters, or None when neither is given.
+    """
+    lat = params.get('latitude', params.get('lat'))
+    lon = params.get('longitude', params.get('lon'))
+    if lat is not None and lon is not None:
+        return float(lat), float(lon)
+    zip_code = params.get('zip')
+    if zip_code:
+        centroids = current_snapshot().zip_centroids
+        if centroids is None:
+            raise ValueError('ZIP lookup is not available (no ZIP centroid table loaded)')
+        location = centroids.get(str(zip_code).strip().zfill(5))
+        if location is None:
+            raise ValueError(f'Unknown ZIP code: {zip_code}')
+        return location
+    return None
+
+def resolve_region(params):
+    """
+    Return (key, level) for the housing region in the request parameters:
+    `region` at any level (pinned with `level`, else the finest match), or
+    `state` as a code or name. Returns (None, None) when neither is given.
+    """
+    snap = current_snapshot()
+    region = params.get('region')
+    level = params.get('level')
+    if region:
+        try:
+            match = snap.regions.resolve(str(region), level)
+        except ValueError:
+            # Not an exact region name: fall back to the gazetteer's fuzzy match
+            match = snap.gazetteer.lookup(str(region), levels=(level,) if level else None)
+            if match is None:
+                raise
+        return match['key'], match['level']
+    state = params.get('state')
+    if not state:
+        return None, None
+    place = snap.gazetteer.lookup(state, levels=('state',))
+    return (place['state'] if place else state.upper()), 'state'
+
+def region_info(key, level):
+    region = current_snapshot().regions.get(level, key)
+    return {k: region[k] for k in ('level', 'key', 'state', 'parent', 'parent_level', 'rates_from', 'observations')}
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
+    snap = current_snapshot()
     return jsonify({
         'status': 'healthy',
+        'dataset_version': snap.version,
+        'snapshot': {
+            'name': snap.name,
+            'version': snap.version,
+            'loaded_at': snap.loaded_at,
+            'latest': registry.current.name,
+            'available': [v.name for v in registry.versions()],
+            'reloading': registry.reloading,
+            'last_reload_error': registry.last_error
+        },
         'models_loaded': {
-            'electricity': df_electricity is not None,
-            'housing': df_housing is not None
+            'electricity': snap.df_electricity is not None,
+            'housing': snap.df_housing is not None,
+            'housing_forecast': snap.housing_forecast is not None
+        },
+        'admission': admission_control.stats() if admission_control else None,
+        'validation': {
+            name: {'rows': r['rows'], 'valid': r['valid'], 'warnings': r['warnings']}
+            for name, r in snap.validation.items()
+        },
+        'memory': {'housing': snap.housing_memory}
+    })
+
+@app.route('/api/admin/reload', methods=['POST'])
+def admin_reload():
+    """
+    Rebuild the model snapshot from the input files in the background.
+    Requires the X-Admin-Token header to match FIREFORCE_ADMIN_TOKEN.
+    """
+    if not _is_admin():
+        return jsonify({'error': 'Forbidden'}), 403
+
+    started = registry.reload_async()
+    return jsonify({
+        'success': True,
+        'reload_started': started,
+        'message': 'Reload started' if started else 'A reload is already in progress',
+        'current_version': registry.current.version
+    }), 202
+
+@app.route('/api/models', methods=['GET'])
+def list_models():
+    latest = registry.current
+    return jsonify({
+        'success': True,
+        'data': {
+            'latest': latest.name,
+            'versions': [{
+                'name': v.name,
+                'version': v.version,
+                'loaded_at': v.loaded_at,
+                'latest': v is latest,
+                'params': v.spec
+            } for v in registry.versions()]
         }
     })
 
+@app.route('/api/admin/models', methods=['POST'])
+def admin_register_model():
+    """
+    Build an additional named model version in the background, e.g.
+    {"name": "pt-0.5", "pass_through": 0.5} or {"name": "q2", "dc_csv": "..."}.
+    Requires the X-Admin-Token header to match FIREFORCE_ADMIN_TOKEN.
+    """
+    if not _is_admin():
+        return jsonify({'error': 'Forbidden'}), 403
+
+    spec = dict(request.get_json(silent=True) or {})
+    name = spec.pop('name', None)
+    make_latest = bool(spec.pop('make_latest', False))
+    unknown = set(spec) - set(DEFAULT_SPEC)
+    if not name:
+        return jsonify({'error': 'name is required'}), 400
+    if unknown:
+        return jsonify({'error': f'Unknown model parameters: {sorted(unknown)}'}), 400
+
+    started = registry.register_async(spec, name, make_latest=make_latest)
+    return jsonify({
+        'success': True,
+        'build_started': started,
+        'message': f'Building model version {name}' if started else 'Another build is in progress, retry later'
+    }), 202 if started else 409
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/electricity/predict', methods=['POST'])
 def predict_electricity():
+    snap = current_snapshot()
     try:
         data = request.json
         state_code = data.get('state')
@@ -220,23 +513,27 @@ def predict_electricity():
 
         if not state_code:
             return jsonify({'error': 'state is required'}), 400
+        state_code = snap.gazetteer.state_code(state_code)
 
         if added_power_mw is None and added_annual_mwh is None:
             return jsonify({'error': 'Either added_power_mw or added_annual_mwh is required'}), 400
 
-        result = what_if_added_dc(
-            df_electricity,
-            beta_b if mode == "assumption" else beta_f,
-            names_b if mode == "assumption" else names_f,
-            state_code=state_code,
-            added_power_mw=added_power_mw,
-            added_annual_mwh=added_annual_mwh,
-            mode=mode,
-            include_added_load_in_sales=include_in_sales
-        )
+        with span('what_if_added_dc'):
+            result = what_if_added_dc(
+                snap.df_electricity,
+                snap.beta_b if mode == "assumption" else snap.beta_f,
+                snap.names_b if mode == "assumption" else snap.names_f,
+                state_code=state_code,
+                added_power_mw=added_power_mw,
+                added_annual_mwh=added_annual_mwh,
+                mode=mode,
+                include_added_load_in_sales=include_in_sales,
+                share_floor=snap.share_floor,
+                pass_through=snap.pass_through
+            )
 
-        observed = float(df_electricity.loc[
-            df_electricity.StateCode == state_code.upper(),
+        observed = float(snap.df_electricity.loc[
+            snap.df_electricity.StateCode == state_code.upper(),
             "AvgRetailPrice_cents_per_kWh"
         ].iloc[0])
 
@@ -252,52 +549,220 @@ def predict_electricity():
     except Exception as e:
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
+@app.route('/api/electricity/iso-impact', methods=['POST'])
+def iso_impact():
+    """
+    Price impact of data center load added in one state on every state that
+    shares a wholesale market (ISO/RTO) with it, in one call.
+    """
+    snap = current_snapshot()
+    try:
+        data = request.json
+        state_code = data.get('state')
+        added_power_mw = data.get('added_power_mw')
+        added_annual_mwh = data.get('added_annual_mwh')
+        mode = data.get('mode', 'assumption')
+
+        if not state_code:
+            return jsonify({'error': 'state is required'}), 400
+        state_code = snap.gazetteer.state_code(state_code)
+        if added_power_mw is None and added_annual_mwh is None:
+            return jsonify({'error': 'Either added_power_mw or added_annual_mwh is required'}), 400
+
+        with span('iso_what_if'):
+            result = iso_what_if(
+                snap.df_electricity,
+                snap.markets,
+                snap.beta_b if mode == "assumption" else snap.beta_f,
+                state_code,
+                added_power_mw=added_power_mw,
+                added_annual_mwh=added_annual_mwh,
+                include_added_load_in_sales=data.get('include_in_sales', True),
+                mode=mode,
+                share_floor=snap.share_floor,
+                pass_through=snap.pass_through
+            )
+        return jsonify({'success': True, 'data': result})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@app.route('/api/portfolio/simulate', methods=['POST'])
+def simulate_portfolio():
+    """
+    Year-by-year electricity prices for every state a multi-site, time-phased
+    data-center portfolio touches (spec format in portfolio.py), in one or
+    both model modes.
+    """
+    snap = current_snapshot()
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'A JSON portfolio spec is required'}), 400
+        mode = data.get('mode', 'both')
+        if mode not in portfolio.MODES + ('both',):
+            return jsonify({'error': f"mode must be one of {', '.join(portfolio.MODES)} or both"}), 400
+
+        sites = portfolio.parse_spec(data, snap.gazetteer.state_code)
+        with span('simulate_portfolio'):
+            result = portfolio.simulate(
+                snap.df_electricity,
+                {'assumption': snap.beta_b, 'trained': snap.beta_f},
+                sites,
+                portfolio.MODES if mode == 'both' else (mode,),
+                share_floor=snap.share_floor,
+                pass_through=snap.pass_through
+            )
+        return jsonify({'success': True, 'data': result})
+
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@app.route('/api/electricity/nodes', methods=['GET'])
+def nearest_pricing_nodes():
+    """
+    Resolve latitude/longitude (or zip) to the k nearest ISO pricing nodes
+    with their average LMP and volatility.
+    """
+    snap = current_snapshot()
+    try:
+        if snap.pricing_nodes is None:
+            return jsonify({'error': 'Pricing node index not available'}), 503
+
+        location = resolve_location(request.args)
+        if location is None:
+            return jsonify({'error': 'latitude and longitude (or zip) are required'}), 400
+
+        with span('nearest_pricing_nodes'):
+            result = snap.pricing_nodes.nearest(*location, k=request.args.get('k', 3, type=int))
+        result['latitude'], result['longitude'] = location
+        return jsonify({'success': True, 'data': result})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+def _housing_result(state, current_price, target_year, nominal, real, normal_growth, hyperscale_effect):
+    return {
+        'state': state,
+        'current_price': current_price,
+        'target_year': target_year,
+        'nominal_price': nominal,
+        'real_price_2025_dollars': real,
+        'nominal_increase_pct': ((nominal - current_price) / current_price * 100),
+        'normal_growth_rate': normal_growth * 100,
+        'hyperscale_effect_rate': hyperscale_effect * 100,
+        'total_growth_rate': (normal_growth + hyperscale_effect) * 100
+    }
+
+def _predict_housing_forest(snap, data, current_price, years_after, future_year, base_year):
+    """method=forest: one state, or a batch via `states` (with a price per state or one shared price)."""
+    if snap.housing_forest is None:
+        return jsonify({'error': 'Forest model not available (train one with: python housing_forest.py train)'}), 503
+
+    batch = data.get('states')
+    if batch is not None:
+        if not isinstance(batch, list) or not batch:
+            return jsonify({'error': 'states must be a non-empty list'}), 400
+        states = [resolve_region({'state': st})[0] for st in batch]
+    else:
+        state, level = resolve_region(data)
+        if not state:
+            return jsonify({'error': 'state or states is required'}), 400
+        if level != 'state':
+            return jsonify({'error': 'method=forest predicts at the state level only'}), 400
+        states = [state]
+    if current_price is None:
+        return jsonify({'error': 'current_price is required'}), 400
+    prices = current_price if isinstance(current_price, list) else [current_price] * len(states)
+    if len(prices) != len(states):
+        return jsonify({'error': 'current_price must be a number or one price per state'}), 400
+    # Growth rates divide by the price, so it must be a positive finite number
+    if not all(isinstance(p, (int, float)) and np.isfinite(p) and p > 0 for p in prices):
+        return jsonify({'error': 'current_price must be a positive number'}), 400
+
+    if future_year:
+        years_after = future_year - base_year
+    if years_after < 1:
+        return jsonify({'error': 'years_after must be at least 1'}), 400
+
+    with span('forest_simulate_house_prices'):
+        rows = forest_simulate_house_prices(states, prices, years_after, base_year)
+    results = [_housing_result(st, price, base_year + years_after, *row)
+               for st, price, row in zip(states, prices, rows)]
+
+    if batch is None:
+        return jsonify({'success': True, 'data': dict(results[0], model_version=snap.housing_forest.version)})
+    return jsonify({
+        'success': True,
+        'data': {'model_version': snap.housing_forest.version, 'predictions': results}
+    })
+
 @app.route('/api/housing/predict', methods=['POST'])
 def predict_housing():
+    snap = current_snapshot()
     try:
-        if df_housing is None:
+        if snap.df_housing is None:
             return jsonify({'error': 'Housing data not available'}), 503
 
         data = request.json
-        state = data.get('state')
         current_price = data.get('current_price')
         years_after = data.get('years_after', 1)
         future_year = data.get('future_year')
         base_year = data.get('base_year', 2025)
         method = data.get('method', 'simple')
 
+        if method == 'forest':
+            return _predict_housing_forest(snap, data, current_price, years_after, future_year, base_year)
+
+        state, level = resolve_region(data)
         if not state:
-            return jsonify({'error': 'state is required'}), 400
+            return jsonify({'error': 'state or region is required'}), 400
         if current_price is None:
             return jsonify({'error': 'current_price is required'}), 400
 
-        state = state.upper()
-
-        if method == 'advanced' and future_year:
-            nominal, real, normal_growth, hyperscale_effect = advanced_simulate_house_price(
-                state, current_price, future_year, base_year
-            )
+        if method == 'forecast':
+            if snap.housing_forecast is None:
+                return jsonify({'error': 'Housing forecast not available'}), 503
+            if level != 'state':
+                return jsonify({'error': 'method=forecast predicts at the state level only'}), 400
+            if future_year:
+                years_after = future_year - base_year
+            with span('forecast_simulate_house_price'):
+                nominal, real, normal_growth, hyperscale_effect, intervals = forecast_simulate_house_price(
+                    state, current_price, years_after, base_year
+                )
+            result = _housing_result(state, current_price, base_year + years_after,
+                                     nominal, real, normal_growth, hyperscale_effect)
+            result['intervals'] = intervals
+            result['forecast_model'] = snap.housing_forecast.model_info(state)
+            return jsonify({'success': True, 'data': result})
+
+        if method == 'advanced' and future_year and level == 'state':
+            with span('advanced_simulate_house_price'):
+                nominal, real, normal_growth, hyperscale_effect = advanced_simulate_house_price(
+                    state, current_price, future_year, base_year
+                )
             target_year = future_year
         else:
-            nominal, real, normal_growth, hyperscale_effect = simple_simulate_house_price(
-                state, current_price, years_after, base_year
-            )
+            with span('simple_simulate_house_price'):
+                nominal, real, normal_growth, hyperscale_effect = simple_simulate_house_price(
+                    state, current_price, years_after, base_year, level=level
+                )
             target_year = base_year + years_after
 
-        return jsonify({
-            'success': True,
-            'data': {
-                'state': state,
-                'current_price': current_price,
-                'target_year': target_year,
-                'nominal_price': nominal,
-                'real_price_2025_dollars': real,
-                'nominal_increase_pct': ((nominal - current_price) / current_price * 100),
-                'normal_growth_rate': normal_growth * 100,
-                'hyperscale_effect_rate': hyperscale_effect * 100,
-                'total_growth_rate': (normal_growth + hyperscale_effect) * 100
-            }
-        })
+        result = _housing_result(
+            state if level == 'state' else region_info(state, level)['state'],
+            current_price, target_year, nominal, real, normal_growth, hyperscale_effect
+        )
+        if level != 'state':
+            result['region'] = region_info(state, level)
+        return jsonify({'success': True, 'data': result})
 
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
@@ -309,37 +774,167 @@ def housing_history():
     """
     Get housing predictions for 2025-2030 (forward-looking)
     """
+    snap = current_snapshot()
     try:
-        if df_housing is None:
+        if snap.df_housing is None:
             return jsonify({'error': 'Housing data not available'}), 503
 
-        state = request.args.get('state')
         base_price = request.args.get('base_price', 300000, type=float)
 
+        state, level = resolve_region(request.args)
+        if not state:
+            return jsonify({'error': 'state or region parameter is required'}), 400
+
+        with span('get_state_housing_predictions'):
+            predictions = get_state_housing_predictions(state, base_price=base_price, level=level)
+
+        result = {
+            'state': state if level == 'state' else region_info(state, level)['state'],
+            'history': predictions  # Keep key name for backwards compatibility
+        }
+        if level != 'state':
+            result['region'] = region_info(state, level)
+        return jsonify({'success': True, 'data': result})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@app.route('/api/housing/forecast', methods=['GET'])
+def housing_forecast():
+    """
+    Year-end damped-trend forecasts of a state's average home value with 80%
+    and 95% intervals, read from the model fitted at snapshot build.
+    """
+    snap = current_snapshot()
+    try:
+        if snap.housing_forecast is None:
+            return jsonify({'error': 'Housing forecast not available'}), 503
+
+        state, level = resolve_region(request.args)
         if not state:
             return jsonify({'error': 'state parameter is required'}), 400
+        if level != 'state':
+            return jsonify({'error': 'Forecasts are available at the state level only'}), 400
+        first_year = request.args.get('first_year', 2025, type=int)
+        last_year = request.args.get('last_year', 2030, type=int)
+        if last_year < first_year:
+            return jsonify({'error': 'last_year must not be before first_year'}), 400
 
-        state = state.upper()
-        predictions = get_state_housing_predictions(state, base_price=base_price)
+        return jsonify({
+            'success': True,
+            'data': {
+                'state': state,
+                'model': snap.housing_forecast.model_info(state),
+                'forecast': snap.housing_forecast.annual(state, first_year, last_year)
+            }
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
+@app.route('/api/housing/event-study', methods=['GET'])
+def housing_event_study():
+    """
+    Difference-in-differences effect of hyperscale announcements on home value
+    growth by month relative to the announcement, pooled or for one `state`,
+    plus the per-state effects the simulations use.
+    """
+    snap = current_snapshot()
+    try:
+        if snap.event_study is None:
+            return jsonify({'error': 'Event study not available'}), 503
+
+        state = None
+        if request.args.get('state') or request.args.get('region'):
+            state, level = resolve_region(request.args)
+            if level != 'state':
+                return jsonify({'error': 'Event-study curves are available at the state level only'}), 400
+
+        effect, source = snap.event_study.effect(state) if state else (snap.event_study.pooled_effect / 100, 'pooled')
         return jsonify({
             'success': True,
             'data': {
                 'state': state,
-                'history': predictions  # Keep key name for backwards compatibility
+                'effect_rate': effect * 100,
+                'effect_source': source,
+                # States without announcements get the pooled curve their effect comes from
+                'curve': snap.event_study.curve(state if state in snap.event_study.states else None),
+                'summary': snap.event_study.summary()
             }
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@app.route('/api/export', methods=['GET'])
+def export_predictions():
+    """
+    Stream predictions for every state, year and scenario as NDJSON or Arrow IPC.
+    Pages are resumable: pass the X-Next-Cursor header back as `cursor`.
+    """
+    try:
+        fmt = export.negotiate(request.args.get('format'), request.accept_mimetypes)
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit', type=int)
+        added_power_mw = request.args.get('added_power_mw', 500, type=float)
+        base_price = request.args.get('base_price', 300000, type=float)
+
+        if fmt == 'arrow' and export.pa is None:
+            return jsonify({'error': 'Arrow export is not available on this server (pyarrow not installed)'}), 406
+        if limit is not None and limit <= 0:
+            return jsonify({'error': 'limit must be greater than 0'}), 400
+
+        states, next_cursor = export_page(cursor, limit)
+        batches = iter_export_batches(states, added_power_mw=added_power_mw, base_price=base_price)
+        chunks = export.encode_arrow(batches) if fmt == 'arrow' else export.encode_ndjson(batches)
+
+        response = Response(stream_with_context(chunks), mimetype=export.FORMATS[fmt])
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
 
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
+@app.route('/api/housing/regions', methods=['GET'])
+def housing_regions():
+    """
+    Region autocomplete: states, metros, counties and cities whose name starts
+    with `q`, optionally restricted to one `level`.
+    """
+    snap = current_snapshot()
+    try:
+        if snap.regions is None:
+            return jsonify({'error': 'Housing data not available'}), 503
+
+        prefix = request.args.get('q', '')
+        limit = request.args.get('limit', 10, type=int)
+        level = request.args.get('level')
+        if limit <= 0:
+            return jsonify({'error': 'limit must be greater than 0'}), 400
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'query': prefix,
+                'regions': snap.regions.search(prefix, limit=min(limit, 100), level=level)
+            }
+        })
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
 @app.route('/api/states', methods=['GET'])
 def get_states():
+    snap = current_snapshot()
     try:
-        states_electricity = df_electricity['StateCode'].unique().tolist() if df_electricity is not None else []
-        states_housing = df_housing['State'].unique().tolist() if df_housing is not None else []
+        states_electricity = snap.df_electricity['StateCode'].unique().tolist() if snap.df_electricity is not None else []
+        states_housing = snap.df_housing['State'].unique().tolist() if snap.df_housing is not None else []
 
         return jsonify({
             'success': True,
@@ -352,26 +947,6 @@ def get_states():
     except Exception as e:
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
-STATE_NAME_TO_CODE = {
-    'california': 'CA',
-    'texas': 'TX',
-    'virginia': 'VA',
-    'washington': 'WA',
-    'oregon': 'OR',
-    'nevada': 'NV',
-    'arizona': 'AZ',
-    'utah': 'UT',
-    'colorado': 'CO',
-    'new-mexico': 'NM',
-    'new mexico': 'NM',
-    'louisiana': 'LA',
-    'illinois': 'IL',
-    'iowa': 'IA',
-    'north carolina': 'NC',
-    'south carolina': 'SC',
-    'wisconsin': 'WI'
-}
-
 @app.route('/api/calculator/predict', methods=['POST'])
 def calculator_predict():
     """
@@ -380,15 +955,17 @@ def calculator_predict():
     2. Housing price increases due to hyperscale data centers
     3. Environmental impact metrics
     """
+    snap = current_snapshot()
     try:
-        data = request.json
+        with span('parse_input'):
+            data = request.json
 
-        # Extract input data
-        state_input = data.get('state', '').lower().strip()
-        current_power_bill = float(data.get('currentPowerBill', 0))
-        current_water_bill = float(data.get('currentWaterBill', 0))
-        household_size = int(data.get('householdSize', 1))
-        current_home_value = data.get('currentHomeValue')
+            # Extract input data
+            state_input = data.get('state', '').lower().strip()
+            current_power_bill = float(data.get('currentPowerBill', 0))
+            current_water_bill = float(data.get('currentWaterBill', 0))
+            household_size = int(data.get('householdSize', 1))
+            current_home_value = data.get('currentHomeValue')
 
         # Validate inputs
         if not state_input:
@@ -398,10 +975,11 @@ def calculator_predict():
         if household_size <= 0:
             return jsonify({'error': 'Household size must be greater than 0'}), 400
 
-        # Convert state name to code
-        state_code = STATE_NAME_TO_CODE.get(state_input)
-        if not state_code:
-            state_code = state_input.upper()
+        # Resolve the state name or code (typos allowed) to its code
+        state_match = snap.gazetteer.lookup(state_input, levels=('state',))
+        if state_match is None:
+            raise ValueError(f"State {state_input.upper()} not found")
+        state_code = state_match['state']
 
         # Calculate average household electricity consumption from bill
         # Assume average US rate of ~14 cents/kWh as baseline
@@ -410,29 +988,26 @@ def calculator_predict():
 
         # Predict electricity price impact using model
         # Simulate a medium-sized data center impact (500 MW)
-        electricity_result = what_if_added_dc(
-            df_electricity,
-            beta_b,
-            names_b,
-            state_code=state_code,
-            added_power_mw=500,  # Medium data center
-            mode="assumption",
-            include_added_load_in_sales=True
-        )
+        with span('what_if_added_dc'):
+            electricity_result, observed_price_cents = get_state_electricity_impact(state_code)
 
-        # Get current observed price
-        try:
-            observed_price_cents = float(df_electricity.loc[
-                df_electricity.StateCode == state_code,
-                "AvgRetailPrice_cents_per_kWh"
-            ].iloc[0])
-        except:
+        # Fall back to the baseline rate when the state has no observed price
+        if observed_price_cents is None:
             observed_price_cents = baseline_rate_cents
 
         # Calculate new electricity bills
         new_price_cents = electricity_result['new_pred_c_per_kWh']
         price_increase_pct = ((new_price_cents - observed_price_cents) / observed_price_cents) * 100
 
+        # With a location, scale the state-level impact by how local wholesale (LMP)
+        # prices compare with the average of the surrounding market
+        local_pricing = None
+        with span('nearest_pricing_nodes'):
+            location = resolve_location(data)
+            if location is not None and snap.pricing_nodes is not None:
+                local_pricing = snap.pricing_nodes.nearest(*location, k=int(data.get('k', 3)))
+                price_increase_pct *= local_pricing['local_price_factor']
+
         new_power_bill = current_power_bill * (1 + price_increase_pct / 100)
         power_bill_increase = new_power_bill - current_power_bill
 
@@ -447,14 +1022,15 @@ def calculator_predict():
 
         # Housing price prediction (if home value provided)
         housing_impact = None
-        if current_home_value and df_housing is not None:
+        if current_home_value and snap.df_housing is not None:
             try:
-                nominal, real, normal_growth, hyperscale_effect = simple_simulate_house_price(
-                    state_code,
-                    float(current_home_value),
-                    years_after=5,
-                    base_year=2025
-                )
+                with span('simple_simulate_house_price'):
+                    nominal, real, normal_growth, hyperscale_effect = simple_simulate_house_price(
+                        state_code,
+                        float(current_home_value),
+                        years_after=5,
+                        base_year=2025
+                    )
 
                 housing_impact = {
                     'current_value': current_home_value,
@@ -483,6 +1059,7 @@ def calculator_predict():
             'success': True,
             'data': {
                 'state': state_code,
+                'state_match': {'name': state_match['name'], 'confidence': state_match['confidence']},
                 'bills': {
                     'current': {
                         'power': current_power_bill,
@@ -516,6 +1093,7 @@ def calculator_predict():
                     'dc_share': electricity_result['dc_share_new']
                 },
                 'housing': housing_impact,
+                'local_pricing': local_pricing,
                 'environmental': environmental_impact,
                 'summary': {
                     'total_annual_cost_increase': annual_increase,
@@ -525,7 +1103,8 @@ def calculator_predict():
             }
         }
 
-        return jsonify(response)
+        with span('serialize'):
+            return jsonify(response)
 
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
@@ -535,12 +1114,57 @@ def calculator_predict():
         traceback.print_exc()
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
+@app.route('/api/calculator/bulk', methods=['POST'])
+def calculator_bulk():
+    """
+    Calculator results for every household in an uploaded CSV or Parquet file
+    (multipart `file` or the raw body), streamed back one chunk at a time as
+    CSV, NDJSON or Parquet. Column names and row errors are described in bulk.py.
+    """
+    try:
+        upload = request.files.get('file')
+        in_fmt = bulk.input_format(request.args.get('input_format'),
+                                   upload.filename if upload else '', request.mimetype)
+        out_fmt = bulk.negotiate(request.args.get('format'), request.accept_mimetypes)
+        chunksize = request.args.get('chunksize', bulk.DEFAULT_CHUNKSIZE, type=int)
+        if chunksize <= 0:
+            return jsonify({'error': 'chunksize must be greater than 0'}), 400
+        if bulk.pa is None and 'parquet' in (in_fmt, out_fmt):
+            return jsonify({'error': 'Parquet is not available on this server (pyarrow not installed)'}), 406
+
+        if upload is not None:
+            source = upload.stream
+        elif in_fmt == 'parquet':
+            # Parquet needs a seekable file; spool the body to disk rather than memory
+            source = tempfile.TemporaryFile()
+            shutil.copyfileobj(request.stream, source)
+            source.seek(0)
+        else:
+            source = request.stream
+
+        with span('state_table'):
+            table = calculator_state_table()
+        with span('first_chunk'):
+            frames = bulk.process(bulk.read_chunks(source, in_fmt, chunksize), table)
+        chunks = bulk.ENCODERS[out_fmt](frames)
+        return Response(stream_with_context(chunks), mimetype=bulk.FORMATS[out_fmt])
+
+    except (ValueError, pd.errors.ParserError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+bill_queue = BillParseQueue()
+
+def _bill_response(result):
+    return jsonify({'success': True, 'status': 'done', 'data': result})
+
 @app.route('/api/calculator/parse-bill', methods=['POST'])
 def parse_bill():
     """
-    Placeholder endpoint for bill image parsing.
-    In production, this would use OCR (Tesseract, Google Vision API, etc.)
-    For now, returns mock data based on file upload.
+    Queue an uploaded power or water bill for OCR parsing.
+    Returns the parsed fields straight away when the same file was parsed
+    before; otherwise 202 with a job_id to poll at /api/calculator/parse-bill/<job_id>.
     """
     try:
         if 'file' not in request.files:
@@ -551,26 +1175,39 @@ def parse_bill():
 
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
+        if bill_type not in ('power', 'water'):
+            return jsonify({'error': "type must be 'power' or 'water'"}), 400
 
-        # TODO: Implement actual OCR parsing
-        # For now, return mock data
-        mock_data = {
-            'success': True,
-            'data': {
-                'bill_type': bill_type,
-                'amount': 150.00 if bill_type == 'power' else 80.00,
-                'usage': '850 kWh' if bill_type == 'power' else '5,000 gallons',
-                'billing_period': '2025-01-01 to 2025-01-31',
-                'parsed': True,
-                'confidence': 0.95,
-                'message': 'Bill parsing feature coming soon. Using default values for demo.'
-            }
-        }
+        try:
+            job_id, cached = bill_queue.submit(file.read(), bill_type, file.mimetype or '')
+        except QueueFull:
+            return jsonify({'error': 'Bill parser is busy, retry shortly'}), 429, {'Retry-After': '5'}
 
-        return jsonify(mock_data)
+        metrics.record_cache('bill_parse', cached is not None)
+        if cached is not None:
+            return _bill_response(cached)
+        return jsonify({
+            'success': True,
+            'status': 'pending',
+            'job_id': job_id,
+            'poll_url': f'/api/calculator/parse-bill/{job_id}'
+        }), 202
 
     except Exception as e:
         return jsonify({'error': f'Error parsing bill: {str(e)}'}), 500
 
+@app.route('/api/calculator/parse-bill/<job_id>', methods=['GET'])
+def parse_bill_status(job_id):
+    status = bill_queue.poll(job_id)
+    if status is None:
+        return jsonify({'error': 'Unknown or expired job_id'}), 404
+
+    state, result, error = status
+    if state == 'pending':
+        return jsonify({'success': True, 'status': 'pending', 'job_id': job_id}), 202, {'Retry-After': '1'}
+    if state == 'failed':
+        return jsonify({'success': False, 'status': 'failed', 'error': f'Error parsing bill: {error}'}), 422
+    return _bill_response(result)
+
 if __name__ == '__main__':
     app.run(debug=True, port=5002, host='127.0.0.1')
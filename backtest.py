@@ -0,0 +1,239 @@
+"""
+Time-ordered backtests of the candidate housing models.
+
+For every cutoff year T each model is fitted on the years <= T and asked to
+project home values for T+1..T+horizon, compounding its predicted annual growth
+from the observed value at T. Every (model, cutoff) pair is an independent
+task run on a process pool. The report sets accuracy (MAPE of the projected
+home value by horizon, RMSE of annual growth) next to fit time, inference
+latency and model size, so serving choices can weigh both.
+
+    python backtest.py
+    python backtest.py --models forest growth --cutoffs 2012 2019 --workers 4 -o backtest.json
+
+Models:
+  linreg  OneHot(State) + LinearRegression on the start-of-year value
+          (the test_prediction.py / clear_csv.py pipeline, without its
+          same-year leakage)
+  forest  the RandomForest served by method=forest (housing_forest.py)
+  growth  the normal + hyperscale growth-rate simulation served by app.py
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+# Imported here rather than in fit() so a fresh worker's import time is not counted as fit time
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+import housing_forest
+from regions import RegionIndex
+
+DATA = os.path.join(ROOT, housing_forest.TRAINING_DATA)
+MODELS = ('linreg', 'forest', 'growth')
+LATENCY_REPEATS = 20
+
+
+class LinRegModel:
+    def fit(self, train):
+        ct = ColumnTransformer([('state_enc', OneHotEncoder(handle_unknown='ignore'), ['State'])],
+                               remainder='passthrough')
+        self.pipeline = Pipeline([('preprocess', ct), ('regressor', LinearRegression())])
+        self.pipeline.fit(train[['State', 'Start_Home_Value']], train['HomeValue_Pct_Change'])
+        return self
+
+    def predict_growth(self, states, years, post, start_values):
+        X = pd.DataFrame({'State': states, 'Start_Home_Value': start_values})
+        return self.pipeline.predict(X)
+
+
+class ForestModel:
+    def fit(self, train):
+        schema = {'version': 'backtest', 'states': sorted(train['State'].unique()),
+                  'numeric_features': housing_forest.NUMERIC_FEATURES}
+        self.forest = HousingForestAdapter(schema)
+        X = self.forest.features(train['State'].tolist(), train['Year'].values,
+                                 train['Is_Post_Announcement'].values, train['Start_Home_Value'].values)
+        self.forest.model = RandomForestRegressor(n_jobs=1, **housing_forest.DEFAULT_PARAMS)
+        self.forest.model.fit(X, train['HomeValue_Pct_Change'].values)
+        return self
+
+    def predict_growth(self, states, years, post, start_values):
+        return self.forest.predict(self.forest.features(states, years, post, start_values))
+
+
+class HousingForestAdapter(housing_forest.HousingForest):
+    """HousingForest whose one-hot columns ignore states missing from the training years."""
+
+    def __init__(self, schema):
+        super().__init__(None, schema)
+
+    def features(self, states, years, post, start_values):
+        known = [s in self for s in states]
+        X = super().features([s if k else self.states[0] for s, k in zip(states, known)],
+                             years, post, start_values)
+        X[~np.asarray(known), self._n_numeric:] = 0.0
+        return X
+
+
+class GrowthModel:
+    def fit(self, train):
+        self.index = RegionIndex(train)
+        return self
+
+    def predict_growth(self, states, years, post, start_values):
+        regions, root = self.index.regions['state'], self.index.root
+        rates = [regions.get(s, root) for s in states]
+        normal = np.array([r['normal_growth'] for r in rates])
+        effect = np.array([r['hyperscale_effect'] for r in rates])
+        return (normal + effect * np.asarray(post)) * 100
+
+
+MODEL_CLASSES = {'linreg': LinRegModel, 'forest': ForestModel, 'growth': GrowthModel}
+
+
+def load_panel(path=DATA):
+    """Raw rows (for models that need region columns) and one region-year row per state-year for scoring."""
+    raw = pd.read_csv(path)
+    raw = raw.dropna(subset=['Avg_Home_Value', 'HomeValue_Pct_Change'])
+    raw = raw.drop_duplicates(subset=['RegionID', 'Date', 'Is_Post_Announcement']).reset_index(drop=True)
+    raw['Start_Home_Value'] = raw['Avg_Home_Value'] / (1 + raw['HomeValue_Pct_Change'] / 100)
+    # A region-year counts as post-announcement if any announcement preceded it
+    panel = (raw.groupby(['State', 'RegionID', 'Year'], as_index=False)
+             .agg(Avg_Home_Value=('Avg_Home_Value', 'first'),
+                  HomeValue_Pct_Change=('HomeValue_Pct_Change', 'first'),
+                  Is_Post_Announcement=('Is_Post_Announcement', 'max')))
+    return raw, panel
+
+
+def run_task(args):
+    name, cutoff, horizon, path = args
+    raw, panel = load_panel(path)
+    train = raw[raw['Year'] <= cutoff]
+
+    start = time.perf_counter()
+    model = MODEL_CLASSES[name]().fit(train)
+    fit_seconds = time.perf_counter() - start
+
+    # Project every region from its observed value at the cutoff
+    origin = panel[panel['Year'] == cutoff].set_index('RegionID')
+    future = panel[(panel['Year'] > cutoff) & (panel['Year'] <= cutoff + horizon)]
+    future = future[future['RegionID'].isin(origin.index)]
+    values = origin['Avg_Home_Value'].to_dict()
+    states = origin['State'].to_dict()
+    region_ids = list(origin.index)
+    post = future.pivot(index='RegionID', columns='Year', values='Is_Post_Announcement')
+
+    errors = {h: [] for h in range(1, horizon + 1)}
+    growth_sq = []
+    current = np.array([values[r] for r in region_ids])
+    latencies = []
+    for h in range(1, horizon + 1):
+        year = cutoff + h
+        if year not in post.columns:
+            break
+        flags = post[year].reindex(region_ids).fillna(0).values
+        t = time.perf_counter()
+        growth = model.predict_growth([states[r] for r in region_ids], np.full(len(region_ids), year),
+                                      flags, current)
+        latencies.append((time.perf_counter() - t) / max(len(region_ids), 1))
+        current = current * (1 + growth / 100)
+        actual = future[future['Year'] == year].set_index('RegionID')
+        for i, r in enumerate(region_ids):
+            if r in actual.index:
+                errors[h].append(abs(current[i] - actual.at[r, 'Avg_Home_Value']) / actual.at[r, 'Avg_Home_Value'])
+                growth_sq.append((growth[i] - actual.at[r, 'HomeValue_Pct_Change']) ** 2)
+
+    # Single-request latency: one region, one year, repeated
+    one = [states[region_ids[0]]], np.array([cutoff + 1]), np.array([1.0]), current[:1]
+    t = time.perf_counter()
+    for _ in range(LATENCY_REPEATS):
+        model.predict_growth(*one)
+    single_ms = (time.perf_counter() - t) / LATENCY_REPEATS * 1000
+
+    return {
+        'model': name,
+        'cutoff': cutoff,
+        'train_rows': int(len(train)),
+        'mape_by_horizon': {h: float(np.mean(e)) * 100 for h, e in errors.items() if e},
+        'growth_rmse': float(np.sqrt(np.mean(growth_sq))) if growth_sq else None,
+        'fit_seconds': fit_seconds,
+        'batch_us_per_prediction': float(np.mean(latencies)) * 1e6 if latencies else None,
+        'single_prediction_ms': single_ms,
+        'model_bytes': len(pickle.dumps(model)),
+    }
+
+
+def summarize(results, horizon):
+    rows = []
+    for name in dict.fromkeys(r['model'] for r in results):
+        rs = [r for r in results if r['model'] == name]
+        mape = {h: np.mean([r['mape_by_horizon'][h] for r in rs if h in r['mape_by_horizon']])
+                for h in range(1, horizon + 1)}
+        rows.append({
+            'model': name,
+            'cutoffs': len(rs),
+            'mape_by_horizon': {h: float(v) for h, v in mape.items() if not np.isnan(v)},
+            'mape_mean': float(np.nanmean(list(mape.values()))),
+            'growth_rmse': float(np.mean([r['growth_rmse'] for r in rs if r['growth_rmse'] is not None])),
+            'fit_seconds': float(np.mean([r['fit_seconds'] for r in rs])),
+            'batch_us_per_prediction': float(np.mean([r['batch_us_per_prediction'] for r in rs
+                                                      if r['batch_us_per_prediction'] is not None])),
+            'single_prediction_ms': float(np.mean([r['single_prediction_ms'] for r in rs])),
+            'model_bytes': int(np.mean([r['model_bytes'] for r in rs])),
+        })
+    return sorted(rows, key=lambda r: r['mape_mean'])
+
+
+def print_report(summary, horizon):
+    hs = ''.join(f'{f"h{h} %":>8}' for h in range(1, horizon + 1))
+    print(f"{'model':<8}{hs}{'MAPE %':>9}{'g RMSE':>9}{'fit s':>9}{'us/pred':>9}{'1-req ms':>10}{'size KB':>10}")
+    for r in summary:
+        cells = ''.join(f"{r['mape_by_horizon'].get(h, float('nan')):>8.2f}" for h in range(1, horizon + 1))
+        print(f"{r['model']:<8}{cells}{r['mape_mean']:>9.2f}{r['growth_rmse']:>9.2f}{r['fit_seconds']:>9.3f}"
+              f"{r['batch_us_per_prediction']:>9.1f}{r['single_prediction_ms']:>10.3f}{r['model_bytes'] / 1024:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the housing models on time-ordered splits")
+    parser.add_argument('--models', nargs='+', choices=MODELS, default=list(MODELS), help='Models to compare')
+    parser.add_argument('--cutoffs', nargs=2, type=int, metavar=('FIRST', 'LAST'), default=(2010, 2019),
+                        help='Range of training cutoff years T (inclusive)')
+    parser.add_argument('--horizon', type=int, default=5, help='Years scored after each cutoff')
+    parser.add_argument('--workers', type=int, default=None, help='Process pool size (default: CPU count)')
+    parser.add_argument('--data', default=DATA, help='Processed housing panel CSV')
+    parser.add_argument('--output', '-o', help='Write per-task results and the summary as JSON')
+    args = parser.parse_args()
+
+    tasks = [(m, t, args.horizon, args.data) for m in args.models
+             for t in range(args.cutoffs[0], args.cutoffs[1] + 1)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers) as pool:
+        results = list(pool.map(run_task, tasks))
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(results, args.horizon)
+    print(f"{len(tasks)} backtests ({len(args.models)} models x {len(tasks) // len(args.models)} cutoffs) "
+          f"in {elapsed:.1f}s\n")
+    print_report(summary, args.horizon)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'summary': summary, 'results': results}, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
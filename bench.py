@@ -0,0 +1,210 @@
+"""
+Benchmark suite for the model and API hot paths.
+
+Times the regression fit and what-if paths, the housing simulations, two API
+requests through the Flask test client, and process_iso_file on synthetic LMP
+files of several sizes. Each benchmark reports ops/sec, p50/p99 latency and
+peak traced memory, and is compared with the p50 in bench_baseline.json:
+
+    python bench.py                        run everything and compare with the baseline
+    python bench.py -k housing --min-time 2
+    python bench.py --save-baseline        record this run as the new baseline
+    python bench.py -o results.json
+
+The exit status is 1 when any benchmark's p50 grows past --threshold (default 25%).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(ROOT, "bench_baseline.json")
+LMP_SIZES = (10_000, 100_000, 500_000)
+
+
+def _quiet(fn):
+    # Several hot paths print progress; keep that out of the timings and the report
+    def wrapped():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return wrapped
+
+
+def make_lmp_file(path, n_rows, n_locations=200, seed=0):
+    """Write a synthetic ISO LMP file shaped like the gridstatus exports process_iso_file reads."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2024-01-01", tz="UTC")
+    df = pd.DataFrame({
+        "interval_start_utc": start + pd.to_timedelta(rng.integers(0, 2 * 365 * 24, n_rows), unit="h"),
+        "market": rng.choice(["REAL_TIME_5_MIN", "DAY_AHEAD_HOURLY"], n_rows),
+        "location": rng.choice([f"NODE_{i:04d}" for i in range(n_locations)], n_rows),
+        "lmp": rng.normal(40.0, 15.0, n_rows).round(5),
+    })
+    df.to_csv(path, index=False)
+    return path
+
+
+def build_benchmarks(tmpdir):
+    # Importing app loads the datasets from relative paths, so it has to happen from the repo root
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.join(ROOT, "csv-generation"))
+    import model
+    import app as api
+    from process_all import process_iso_file
+
+    df = model.load_data()
+    Xb, y, names_b = model.build_features_baseline(df)
+    Xf, _, names_f = model.build_features(df)
+    beta_b = model.fit_ols(Xb, y)
+    beta_f = model.fit_ols(Xf, y)
+    client = api.app.test_client()
+    calculator_body = {
+        "state": "texas",
+        "currentPowerBill": 150,
+        "currentWaterBill": 80,
+        "householdSize": 3,
+        "currentHomeValue": 300000,
+    }
+
+    def calculator_request():
+        resp = client.post("/api/calculator/predict", json=calculator_body)
+        assert resp.status_code == 200, resp.status_code
+
+    def history_request():
+        resp = client.get("/api/housing/history?state=TX&base_price=300000")
+        assert resp.status_code == 200, resp.status_code
+
+    benchmarks = {
+        "model.load_data": model.load_data,
+        "model.fit_ols": lambda: model.fit_ols(Xf, y),
+        "model.what_if_added_dc[assumption]": lambda: model.what_if_added_dc(
+            df, beta_b, names_b, state_code="TX", added_power_mw=500, mode="assumption"),
+        "model.what_if_added_dc[trained]": lambda: model.what_if_added_dc(
+            df, beta_f, names_f, state_code="TX", added_power_mw=500, mode="trained"),
+        "app.simple_simulate_house_price": lambda: api.simple_simulate_house_price(
+            "TX", 300000, years_after=5),
+        "app.advanced_simulate_house_price": lambda: api.advanced_simulate_house_price(
+            "TX", 300000, future_year=2030),
+        "app.get_state_housing_predictions": lambda: api.get_state_housing_predictions("TX"),
+        "api POST /api/calculator/predict": _quiet(calculator_request),
+        "api GET /api/housing/history": history_request,
+    }
+    for n_rows in LMP_SIZES:
+        path = make_lmp_file(os.path.join(tmpdir, f"lmp_{n_rows}.csv"), n_rows)
+        benchmarks[f"process_iso_file[{n_rows}]"] = _quiet(
+            lambda path=path: process_iso_file(path, "BENCH", "lmp", True))
+    return benchmarks
+
+
+def measure(fn, min_rounds=5, max_rounds=1000, min_time=1.0):
+    fn()  # warm-up: lazy imports, first-touch allocations
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_rounds:
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+        if len(timings) >= min_rounds and time.perf_counter() - started >= min_time:
+            break
+
+    # Peak memory is measured on a separate call so tracemalloc overhead stays out of the timings
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = np.asarray(timings)
+    return {
+        "rounds": int(len(timings)),
+        "ops_per_sec": float(1.0 / timings.mean()),
+        "p50_ms": float(np.percentile(timings, 50) * 1000),
+        "p99_ms": float(np.percentile(timings, 99) * 1000),
+        "peak_mem_kib": float(peak / 1024),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return the benchmarks whose p50 grew by more than threshold (fraction) over the baseline."""
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = stats["p50_ms"] / base["p50_ms"] if base["p50_ms"] else float("inf")
+        stats["p50_vs_baseline"] = ratio
+        if ratio > 1.0 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def print_report(results):
+    print(f"{'benchmark':<42} {'ops/sec':>10} {'p50 ms':>10} {'p99 ms':>10} {'peak KiB':>10} {'vs base':>8}")
+    for name, s in results.items():
+        ratio = s.get("p50_vs_baseline")
+        ratio_s = f"{ratio:.2f}x" if ratio is not None else "-"
+        print(f"{name:<42} {s['ops_per_sec']:>10.1f} {s['p50_ms']:>10.3f} "
+              f"{s['p99_ms']:>10.3f} {s['peak_mem_kib']:>10.1f} {ratio_s:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the model and API hot paths")
+    parser.add_argument("--filter", "-k", help="Only run benchmarks whose name contains this substring")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file to compare against")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write this run's results to the baseline file instead of comparing")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed p50 slowdown vs baseline as a fraction (default: 0.25)")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Minimum seconds spent per benchmark")
+    parser.add_argument("--min-rounds", type=int, default=5, help="Minimum timed calls per benchmark")
+    parser.add_argument("--output", "-o", help="Also write results as JSON to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        benchmarks = build_benchmarks(tmpdir)
+        results = {}
+        for name, fn in benchmarks.items():
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = measure(fn, min_rounds=args.min_rounds, min_time=args.min_time)
+
+    regressions = []
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"\nRegressions past {args.threshold:.0%} threshold:")
+        for name, ratio in regressions:
+            print(f"  {name}: p50 {ratio:.2f}x baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
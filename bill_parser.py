@@ -0,0 +1,200 @@
+"""
+Utility bill parsing: local OCR plus regex/layout extraction, run off the request path.
+
+OCR costs hundreds of milliseconds of CPU per page, so uploads are queued to a
+bounded process pool and clients poll for the result. Results are cached by the
+SHA-256 of the uploaded bytes, so re-uploading the same bill is free.
+
+OCR uses Tesseract through the optional pytesseract and Pillow packages (plus
+the tesseract binary). Plain-text uploads (e.g. e-bill exports) skip OCR.
+"""
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+OCR_WORKERS = int(os.environ.get('FIREFORCE_OCR_WORKERS', str(min(2, os.cpu_count() or 1))))
+OCR_MAX_PENDING = int(os.environ.get('FIREFORCE_OCR_MAX_PENDING', '32'))
+OCR_RESULT_CACHE_SIZE = int(os.environ.get('FIREFORCE_OCR_CACHE_SIZE', '512'))
+OCR_JOB_TTL_SECONDS = 15 * 60
+GALLONS_PER_CCF = 748.052
+
+_MONEY = r'\$?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})|\d+\.\d{2})'
+AMOUNT_LABELS = re.compile(
+    r'(total\s+amount\s+due|amount\s+due|total\s+due|balance\s+due|new\s+charges|total\s+current\s+charges'
+    r'|current\s+charges|please\s+pay|amount\s+owed)',
+    re.IGNORECASE
+)
+MONEY = re.compile(_MONEY)
+USAGE_PATTERNS = {
+    'power': [(re.compile(r'(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*kwh\b', re.IGNORECASE), 'kWh', 1.0)],
+    'water': [
+        (re.compile(r'(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*(?:gallons|gals?)\b', re.IGNORECASE), 'gallons', 1.0),
+        (re.compile(r'(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*(?:ccf|hcf)\b', re.IGNORECASE), 'gallons', GALLONS_PER_CCF),
+    ],
+}
+_DATE = (r'(\d{1,2}/\d{1,2}/\d{2,4}|\d{4}-\d{2}-\d{2}'
+         r'|(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+\d{1,2},?\s+\d{4})')
+PERIOD = re.compile(_DATE + r'\s*(?:-|–|to|through|thru)\s*' + _DATE, re.IGNORECASE)
+DATE_FORMATS = ('%m/%d/%Y', '%m/%d/%y', '%Y-%m-%d', '%b %d %Y', '%B %d %Y', '%b. %d %Y')
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _number(text):
+    return float(text.replace(',', ''))
+
+
+def _parse_date(text):
+    text = re.sub(r'\s+', ' ', text.replace(',', '')).strip()
+    text = re.sub(r'^sept\b', 'Sep', text, flags=re.IGNORECASE)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def extract_amount(lines):
+    # Layout rule: the amount sits on the label's line or the line right below it
+    for i, line in enumerate(lines):
+        if AMOUNT_LABELS.search(line):
+            tail = line[AMOUNT_LABELS.search(line).end():]
+            for candidate in (tail, lines[i + 1] if i + 1 < len(lines) else ''):
+                match = MONEY.search(candidate)
+                if match:
+                    return _number(match.group(1))
+    # Fallback: the largest dollar figure on the page
+    amounts = [_number(m) for m in re.findall(r'\$\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)', '\n'.join(lines))]
+    return max(amounts) if amounts else None
+
+
+def extract_usage(text, bill_type):
+    for pattern, unit, factor in USAGE_PATTERNS.get(bill_type, []):
+        match = pattern.search(text)
+        if match:
+            return _number(match.group(1)) * factor, unit
+    return None, None
+
+
+def extract_period(text):
+    match = PERIOD.search(text)
+    if not match:
+        return None, None
+    return _parse_date(match.group(1)), _parse_date(match.group(2))
+
+
+def extract_fields(text, bill_type):
+    """Pull amount, usage and billing period out of OCR'd bill text."""
+    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    amount = extract_amount(lines)
+    usage, unit = extract_usage(text, bill_type)
+    start, end = extract_period(text)
+    found = [amount is not None, usage is not None, start is not None and end is not None]
+    return {
+        'bill_type': bill_type,
+        'amount': amount,
+        'usage': f'{usage:,.0f} {unit}' if usage is not None else None,
+        'usage_value': usage,
+        'usage_unit': unit,
+        'billing_period': f'{start} to {end}' if start and end else None,
+        'billing_period_start': start,
+        'billing_period_end': end,
+        'parsed': amount is not None,
+        'confidence': round(sum(found) / len(found), 2),
+    }
+
+
+def ocr_bytes(data, content_type=''):
+    if content_type.startswith('text/'):
+        return data.decode('utf-8', errors='replace')
+    try:
+        import io
+        import pytesseract
+        from PIL import Image
+    except ImportError as e:
+        raise RuntimeError('OCR requires the optional pytesseract and Pillow packages') from e
+    with Image.open(io.BytesIO(data)) as image:
+        return pytesseract.image_to_string(image.convert('L'))
+
+
+def parse_bill_bytes(data, bill_type, content_type=''):
+    """Process-pool entry point: OCR the upload and extract the bill fields."""
+    return extract_fields(ocr_bytes(data, content_type), bill_type)
+
+
+class BillParseQueue:
+    """Bounded process pool with job submit/poll and a content-hash result cache."""
+
+    def __init__(self, workers=OCR_WORKERS, max_pending=OCR_MAX_PENDING, cache_size=OCR_RESULT_CACHE_SIZE):
+        self._workers = workers
+        self._max_pending = max_pending
+        self._cache_size = cache_size
+        self._pool = None
+        self._jobs = {}
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self._pool is None:
+            # spawn, not fork: forking a threaded web worker can deadlock the child
+            self._pool = ProcessPoolExecutor(self._workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def _prune(self, now):
+        for job_id in [j for j, job in self._jobs.items()
+                       if job['future'].done() and now - job['created'] > OCR_JOB_TTL_SECONDS]:
+            del self._jobs[job_id]
+
+    def submit(self, data, bill_type, content_type=''):
+        """Queue a bill; returns (job_id, cached result or None). Raises QueueFull when saturated."""
+        key = f'{bill_type}:{hashlib.sha256(data).hexdigest()}'
+        now = time.time()
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                return None, cached
+            self._prune(now)
+            # Identical upload already in flight: hand back the same job
+            for job_id, job in self._jobs.items():
+                if job['key'] == key and not job['future'].done():
+                    return job_id, None
+            pending = sum(1 for job in self._jobs.values() if not job['future'].done())
+            if pending >= self._max_pending:
+                raise QueueFull(f'{pending} bills already queued')
+            job_id = uuid.uuid4().hex
+            future = self._executor().submit(parse_bill_bytes, data, bill_type, content_type)
+            self._jobs[job_id] = {'key': key, 'future': future, 'created': now}
+        future.add_done_callback(lambda f: self._store(key, f))
+        return job_id, None
+
+    def _store(self, key, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        with self._lock:
+            self._results[key] = future.result()
+            while len(self._results) > self._cache_size:
+                self._results.popitem(last=False)
+
+    def poll(self, job_id):
+        """Return (status, result, error) for a job, or None if the id is unknown or expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        future = job['future']
+        if not future.done():
+            return 'pending', None, None
+        if future.exception() is not None:
+            return 'failed', None, str(future.exception())
+        return 'done', future.result(), None
@@ -0,0 +1,330 @@
+"""
+Household bill impacts for whole customer files, streamed in chunks.
+
+Input is CSV or Parquet with one household per row: state (name or code,
+typos allowed), power bill, water bill, household size and, optionally, home
+value. Columns may use snake_case names or the calculator's JSON keys
+(currentPowerBill, ...); any other columns, such as a customer id, are passed
+through. The calculator's per-state results (the 500 MW price change and the
+housing growth rates) are computed once into a StateTable. Each chunk then
+resolves its distinct state strings, indexes that table and applies the
+formulas of /api/calculator/predict to whole columns. Rows the calculator
+would reject get an `error` message and empty results, and the file keeps
+going. Only one chunk is held in memory at a time, on input and on output.
+
+    python bulk.py customers.csv -o impacts.csv
+    python bulk.py customers.parquet -o impacts.parquet --chunksize 500000
+"""
+import argparse
+import io
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:  # optional; Parquet input and output need it, CSV output is faster with it
+    pa = pacsv = pq = None
+
+BASELINE_RATE_CENTS = 14.0
+WATER_INCREASE_PCT = 18.0
+HOUSING_YEARS = 5
+DEFAULT_CHUNKSIZE = 200_000
+MAX_CACHED_STATES = 100_000  # distinct raw state strings remembered across chunks
+
+CSV = 'text/csv'
+NDJSON = 'application/x-ndjson'
+PARQUET = 'application/vnd.apache.parquet'
+FORMATS = {'csv': CSV, 'ndjson': NDJSON, 'parquet': PARQUET}
+
+# Input field -> accepted column names (matched case-insensitively)
+COLUMNS = {
+    'state': ('state', 'state_code'),
+    'power_bill': ('power_bill', 'current_power_bill', 'currentpowerbill'),
+    'water_bill': ('water_bill', 'current_water_bill', 'currentwaterbill'),
+    'household_size': ('household_size', 'householdsize'),
+    'home_value': ('home_value', 'current_home_value', 'currenthomevalue'),
+}
+REQUIRED = ('state', 'power_bill')
+
+
+class StateTable:
+    """Per-state calculator results, indexed by state code; resolve maps free text to a code or None."""
+
+    def __init__(self, codes, price_pct, normal_growth, hyperscale_effect, resolve):
+        self.codes = np.array(list(codes) + [''], dtype=object)  # last slot: unresolved
+        self._idx = {c: i for i, c in enumerate(codes)}
+        pad = lambda v: np.append(np.asarray(v, dtype=float), np.nan)
+        self.price_pct = pad(price_pct)
+        self.normal_growth = pad(normal_growth)
+        self.hyperscale_effect = pad(hyperscale_effect)
+        self.missing = len(codes)
+        self._resolve = resolve
+        self._cache = {}
+
+    def index(self, values):
+        """Table row for each raw state string (self.missing when it does not resolve)."""
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        if len(self._cache) > MAX_CACHED_STATES:
+            self._cache.clear()
+        rows = np.empty(len(uniques) + 1, dtype=np.intp)
+        rows[-1] = self.missing  # factorize marks missing values with -1
+        for k, raw in enumerate(uniques):
+            row = self._cache.get(raw)
+            if row is None:
+                code = self._resolve(str(raw)) if str(raw).strip() else None
+                row = self._cache[raw] = self._idx.get(code, self.missing)
+            rows[k] = row
+        return rows[codes]
+
+
+def input_columns(columns):
+    """Map each input field to its column in the file; raises ValueError when a required one is missing."""
+    lowered = {str(c).strip().lower(): c for c in columns}
+    found = {}
+    for field, names in COLUMNS.items():
+        for name in names:
+            if name in lowered:
+                found[field] = lowered[name]
+                break
+    missing = [f for f in REQUIRED if f not in found]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    return found
+
+
+def _numeric(chunk, column, default):
+    if column is None:
+        return np.full(len(chunk), default)
+    values = pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=float)
+    return values if default is None else np.where(np.isnan(values), default, values)
+
+
+def compute(chunk, table, columns, first_row=1):
+    """Calculator results for one chunk of households, as a DataFrame in input row order."""
+    n = len(chunk)
+    raw_state = chunk[columns['state']]
+    power = _numeric(chunk, columns.get('power_bill'), None)
+    water = _numeric(chunk, columns.get('water_bill'), 0.0)
+    size = np.trunc(_numeric(chunk, columns.get('household_size'), 1.0))
+    home = _numeric(chunk, columns.get('home_value'), np.nan)
+
+    row = table.index(raw_state)
+    no_state = raw_state.isna().to_numpy() | (raw_state.astype(str).str.strip() == '').to_numpy()
+    error = np.select(
+        [no_state, ~(power > 0), ~(size > 0), row == table.missing],
+        ['State is required', 'Current power bill must be greater than 0',
+         'Household size must be greater than 0', 'State not found'],
+        default='',
+    )
+    ok = error == ''
+
+    price_pct = np.where(ok, table.price_pct[row], np.nan)
+    new_power = power * (1 + price_pct / 100)
+    power_increase = new_power - power
+    new_water = np.where(ok, water * (1 + WATER_INCREASE_PCT / 100), np.nan)
+    water_increase = new_water - water
+    monthly = power_increase + water_increase
+    annual = monthly * 12
+
+    growth = table.normal_growth[row] + table.hyperscale_effect[row]
+    has_home = ok & (home != 0)  # NaN (no value given) propagates to empty results
+    projected = np.where(has_home, home * (1 + growth) ** HOUSING_YEARS, np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_person = monthly / size
+    level = np.where(annual > 500, 'high', np.where(annual > 200, 'moderate', 'low'))
+
+    result = {'row': np.arange(first_row, first_row + n)}
+    result.update((c, chunk[c].to_numpy()) for c in chunk.columns if c not in columns.values())
+    result.update({
+        'state': table.codes[row],
+        'power_bill': power,
+        'water_bill': water,
+        'household_size': size,
+        'home_value': home,
+        'power_pct': price_pct,
+        'new_power_bill': new_power,
+        'new_water_bill': new_water,
+        'power_increase': power_increase,
+        'water_increase': water_increase,
+        'total_monthly_increase': monthly,
+        'annual_increase': annual,
+        'five_year_increase': annual * 5,
+        'per_person_monthly_impact': np.where(ok, per_person, np.nan),
+        'estimated_monthly_kwh': np.where(ok, power / BASELINE_RATE_CENTS * 100, np.nan),
+        'projected_home_value_5yr': projected,
+        'home_value_increase': projected - home,
+        'impact_level': np.where(ok, level, ''),
+        'error': error,
+    })
+    return pd.DataFrame(result, copy=False)
+
+
+def input_format(requested_format, filename='', mimetype=''):
+    """'csv' or 'parquet' from an explicit format, the file extension or the content type."""
+    if requested_format:
+        if requested_format not in ('csv', 'parquet'):
+            raise ValueError(f"Unknown input format {requested_format!r}; expected 'csv' or 'parquet'")
+        return requested_format
+    if (filename or '').lower().endswith(('.parquet', '.pq')) or 'parquet' in (mimetype or ''):
+        return 'parquet'
+    return 'csv'
+
+
+def read_chunks(source, fmt='csv', chunksize=DEFAULT_CHUNKSIZE):
+    """DataFrames of at most chunksize rows from a path or binary file object."""
+    if fmt == 'parquet':
+        if pq is None:
+            raise RuntimeError('Parquet input requires the optional pyarrow package')
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        handle = open(source, 'rb') if isinstance(source, (str, bytes, os.PathLike)) else source
+        try:
+            # Read the header first so pass-through columns parse as strings in every chunk;
+            # inferred per chunk, a sparse column turns from float to text mid-file
+            line = handle.readline()
+            if not line.strip():
+                raise ValueError('Input file has no rows')
+            header = pd.read_csv(io.BytesIO(line), nrows=0).columns.tolist()
+            used = set(input_columns(header).values())
+            dtype = {c: str for c in header if c not in used}
+            with pd.read_csv(handle, header=None, names=header, dtype=dtype, chunksize=chunksize) as reader:
+                yield from reader
+        finally:
+            if handle is not source:
+                handle.close()
+
+
+def process(chunks, table):
+    """
+    Calculator results per input chunk. The header is checked as soon as the
+    first chunk is read, so a bad file fails before anything is written.
+    """
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None:
+        raise ValueError('Input file has no rows')
+    columns = input_columns(first.columns)
+
+    def results():
+        start = 1
+        for chunk in itertools.chain([first], chunks):
+            yield compute(chunk, table, columns, start)
+            start += len(chunk)
+
+    return results()
+
+
+def _drain(sink):
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def _encode_arrow(frames, new_writer):
+    """Write each frame through an Arrow writer, yielding bytes per frame; the schema follows the first one."""
+    sink = io.BytesIO()
+    writer = schema = None
+    for frame in frames:
+        table = pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+        if writer is None:
+            # A column that is empty throughout the first chunk has no type yet; pass-through
+            # columns are text, so give it string rather than failing on the first value later
+            schema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f
+                                for f in table.schema])
+            table = table.cast(schema)
+            writer = new_writer(sink, schema)
+        writer.write_table(table)
+        yield _drain(sink)
+    if writer is not None:
+        writer.close()
+        yield _drain(sink)
+
+
+def encode_csv(frames):
+    if pa is not None:
+        # Arrow's writer formats floats several times faster than DataFrame.to_csv
+        options = pacsv.WriteOptions(quoting_style='needed')
+        yield from _encode_arrow(frames, lambda sink, schema: pacsv.CSVWriter(sink, schema, write_options=options))
+        return
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header).encode()
+        header = False
+
+
+def encode_ndjson(frames):
+    for frame in frames:
+        yield frame.to_json(orient='records', lines=True).encode()
+
+
+def encode_parquet(frames):
+    """One Parquet row group per chunk, yielding bytes as they are written."""
+    if pa is None:
+        raise RuntimeError('Parquet output requires the optional pyarrow package')
+    yield from _encode_arrow(frames, pq.ParquetWriter)
+
+
+ENCODERS = {'csv': encode_csv, 'ndjson': encode_ndjson, 'parquet': encode_parquet}
+
+
+def negotiate(requested_format, accept_mimetypes):
+    """Pick an output format from an explicit format parameter or the Accept header (CSV by default)."""
+    if requested_format:
+        if requested_format not in FORMATS:
+            raise ValueError(f"Unknown format {requested_format!r}; expected one of {sorted(FORMATS)}")
+        return requested_format
+    best = accept_mimetypes.best_match([CSV, NDJSON, PARQUET], default=CSV)
+    return {v: k for k, v in FORMATS.items()}[best]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calculator bill impacts for every household in a customer file")
+    parser.add_argument('input', help='Customer CSV or Parquet file')
+    parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+    parser.add_argument('--format', choices=sorted(FORMATS), help='Output format (default: from -o, else csv)')
+    parser.add_argument('--input-format', choices=['csv', 'parquet'], help='Input format (default: from extension)')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='Rows per chunk')
+    args = parser.parse_args()
+    if args.chunksize <= 0:
+        parser.error('--chunksize must be greater than 0')
+    fmt = args.format or next((f for f in FORMATS if (args.output or '').endswith('.' + f)), 'csv')
+
+    import app as api
+
+    table = api.calculator_state_table()
+    start = time.perf_counter()
+    rows = 0
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        frames = process(read_chunks(args.input, input_format(args.input_format, args.input), args.chunksize), table)
+
+        def counted(frames):
+            nonlocal rows
+            for frame in frames:
+                rows += len(frame)
+                yield frame
+
+        for data in ENCODERS[fmt](counted(frames)):
+            out.write(data)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        if args.output:
+            out.close()
+    seconds = time.perf_counter() - start
+    print(f"{rows:,} households in {seconds:.1f} s ({rows / max(seconds, 1e-9) * 60:,.0f} rows/min)",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
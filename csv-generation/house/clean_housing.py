@@ -0,0 +1,138 @@
+"""
+Deterministic cleaning stage for the processed housing panel.
+
+Regenerates processed_states_hyperscale_clean.csv from
+processed_states_hyperscale.csv in two streaming passes, so memory stays
+bounded by the chunk size plus about 18 bytes per row however many zip-level rows
+the input holds:
+
+  1. read chunks, drop rows the models cannot use (missing or non-finite home
+     value / growth, values outside the validation.py bounds, malformed state
+     codes) and hash the key columns (State, RegionID, Date) of the rest into
+     one uint64 per row; a single sort over all hashes then picks one row per
+     key, preferring the post-announcement flag and then the earliest row
+  2. read the chunks again and write the selected rows in input order
+
+    python clean_housing.py
+    python clean_housing.py --input big.csv --output big_clean.csv --chunksize 500000 --stats stats.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from validation import HOUSING_SCHEMA
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INPUT = os.path.join(HERE, "processed_states_hyperscale.csv")
+DEFAULT_OUTPUT = os.path.join(HERE, "processed_states_hyperscale_clean.csv")
+KEY_COLUMNS = ["State", "RegionID", "Date"]
+VALUE_COLUMNS = ["Avg_Home_Value", "HomeValue_Pct_Change"]
+CHUNKSIZE = 200_000
+
+
+def usable_rows(chunk):
+    """Boolean mask of usable rows and the per-reason drop counts for one chunk."""
+    columns = HOUSING_SCHEMA["columns"]
+    values = chunk[VALUE_COLUMNS].to_numpy(dtype=float, na_value=np.nan)
+    missing = ~np.isfinite(values).all(axis=1)
+
+    out_of_bounds = np.zeros(len(chunk), dtype=bool)
+    for i, col in enumerate(VALUE_COLUMNS):
+        lo, hi = columns[col]["bounds"]
+        out_of_bounds |= (values[:, i] <= lo) | (values[:, i] > hi)
+    out_of_bounds &= ~missing
+
+    bad_key = ~chunk["State"].astype(str).str.match(columns["State"]["pattern"]).to_numpy()
+    bad_key |= chunk["RegionID"].isna().to_numpy() | chunk["Date"].isna().to_numpy()
+    bad_key &= ~missing & ~out_of_bounds
+
+    keep = ~(missing | out_of_bounds | bad_key)
+    return keep, {
+        "missing_values": int(missing.sum()),
+        "out_of_bounds": int(out_of_bounds.sum()),
+        "bad_key": int(bad_key.sum()),
+    }
+
+
+def key_hashes(chunk):
+    return pd.util.hash_pandas_object(chunk[KEY_COLUMNS].astype(str), index=False).to_numpy()
+
+
+def clean(input_path=DEFAULT_INPUT, output_path=DEFAULT_OUTPUT, chunksize=CHUNKSIZE):
+    """Write the cleaned file and return the cleaning statistics."""
+    start = time.perf_counter()
+    stats = {"input": input_path, "output": output_path, "rows_in": 0, "chunks": 0,
+             "dropped": {"missing_values": 0, "out_of_bounds": 0, "bad_key": 0, "duplicates": 0}}
+
+    # Pass 1: hash the keys of usable rows, reading only the columns the checks need
+    hashes, post, rows = [], [], []
+    offset = 0
+    usecols = KEY_COLUMNS + VALUE_COLUMNS + ["Is_Post_Announcement"]
+    for chunk in pd.read_csv(input_path, usecols=usecols, chunksize=chunksize):
+        keep, dropped = usable_rows(chunk)
+        for reason, n in dropped.items():
+            stats["dropped"][reason] += n
+        hashes.append(key_hashes(chunk)[keep])
+        post.append(chunk["Is_Post_Announcement"].fillna(0).to_numpy(dtype=np.int8)[keep])
+        rows.append(np.flatnonzero(keep) + offset)
+        offset += len(chunk)
+        stats["chunks"] += 1
+    stats["rows_in"] = offset
+
+    hashes = np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+    post = np.concatenate(post) if post else np.empty(0, dtype=np.int8)
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+
+    # One row per key: sort by (hash, post flag descending, row) and take each run's head
+    order = np.lexsort((rows, -post, hashes))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = hashes[order][1:] != hashes[order][:-1]
+    selected = np.zeros(offset, dtype=bool)
+    selected[rows[order[first]]] = True
+    stats["dropped"]["duplicates"] = int(len(rows) - first.sum())
+
+    # Pass 2: stream the selected rows out in input order
+    tmp_path = output_path + ".tmp"
+    offset = 0
+    header = True
+    with open(tmp_path, "w", newline="") as f:
+        for chunk in pd.read_csv(input_path, chunksize=chunksize):
+            mask = selected[offset:offset + len(chunk)]
+            chunk[mask].to_csv(f, index=False, header=header, lineterminator="\n")
+            header = False
+            offset += len(chunk)
+    os.replace(tmp_path, output_path)
+
+    stats["rows_out"] = int(selected.sum())
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicate and clean the processed housing panel")
+    parser.add_argument("--input", default=DEFAULT_INPUT, help="Processed housing CSV")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Cleaned CSV to write")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE, help="Rows per chunk")
+    parser.add_argument("--stats", help="Also write the cleaning statistics as JSON")
+    args = parser.parse_args()
+
+    stats = clean(args.input, args.output, args.chunksize)
+    print(f"Read {stats['rows_in']} rows in {stats['chunks']} chunks, wrote {stats['rows_out']} "
+          f"to {args.output} in {stats['seconds']:.2f}s")
+    for reason, n in stats["dropped"].items():
+        print(f"  dropped {reason.replace('_', ' ')}: {n}")
+    if args.stats:
+        with open(args.stats, "w") as f:
+            json.dump(stats, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
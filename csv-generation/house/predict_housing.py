@@ -1,51 +1,32 @@
-import pandas as pd
-
-# Load the merged Zillow + hyperscale data
-long_df = pd.read_csv("merged_hyperscale_zillow.csv")
-
-# Convert Date to datetime just in case
-long_df["Date"] = pd.to_datetime(long_df["Date"], errors="coerce")
-
-# Drop rows missing home value or percent change
-model_df = long_df.dropna(subset=["Avg_Home_Value", "HomeValue_Pct_Change"])
-
-# Optional: Check first few rows
-print(model_df.head())
-
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestRegressor
-
-# Drop rows with missing home values
-model_df = long_df.dropna(subset=["Avg_Home_Value", "HomeValue_Pct_Change"])
-
-X = model_df[["StateName", "is_hub", "Is_Post_Announcement", "Avg_Home_Value"]]
-y = model_df["HomeValue_Pct_Change"]
-
-# Preprocessing
-preprocessor = ColumnTransformer([
-    ("cat", OneHotEncoder(handle_unknown="ignore"), ["StateName"])
-], remainder="passthrough")
-
-# Model
-model = Pipeline([
-    ("preprocessor", preprocessor),
-    ("regressor", RandomForestRegressor(random_state=42))
-])
-
-# Train-test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-model.fit(X_train, y_train)
+import argparse
+import os
+import sys
+
+# The forest is trained and versioned by housing_forest.py at the repo root;
+# this script loads the saved artifact instead of refitting on every run.
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import housing_forest
+
+parser = argparse.ArgumentParser(description="Predict post-announcement home value % change with the saved forest")
+parser.add_argument("--state", default="TX", help="State code")
+parser.add_argument("--home-value", type=float, default=410000, help="Home value at the start of the year")
+parser.add_argument("--year", type=int, default=2025, help="Year to predict")
+parser.add_argument("--retrain", action="store_true", help="Fit and save a new artifact first")
+args = parser.parse_args()
+
+forest = None if args.retrain else housing_forest.load()
+if forest is None:
+    path, schema = housing_forest.train()
+    print(f"Trained forest version {schema['version']} in {schema['fit_seconds']:.2f}s -> {path}")
+    forest = housing_forest.load(path)
+if args.state not in forest:
+    parser.error(f"State {args.state} is not in the model's training data")
+print(f"Using forest version {forest.version} (OOB R^2 {forest.schema['oob_r2']:.3f})")
 
 # Example: predict post-announcement home value % change for Texas
-sample = pd.DataFrame([{
-    "StateName": "TX",
-    "is_hub": 1,
-    "Is_Post_Announcement": 1,
-    "Avg_Home_Value": 410000
-}])
-
-pred = model.predict(sample)
+X = forest.features([args.state], [args.year], [1], [args.home_value])
+pred = forest.predict(X)
 print(f"Predicted % change in home value after hyperscale announcement: {pred[0]:.2f}%")
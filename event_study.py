@@ -0,0 +1,170 @@
+"""
+Event-study / difference-in-differences estimates of the hyperscale housing effect.
+
+Outcome: annualized monthly log growth of each state's Zillow home value
+(states.csv), a state x month array. States with no announcement in
+hyperscales.csv are the controls; subtracting their mean growth each month
+removes the national cycle. For every announcement the excess growth of its
+state is gathered at relative months -PRE_MONTHS..POST_MONTHS with one fancy
+index into that array (announcements x relative months), and re-based on its
+own pre-announcement mean. Per-relative-month curves, per-state effects and
+the pooled effect are grouped reductions over that matrix, so the cost grows
+with the number of announcements only through array size.
+
+Results are built once per snapshot, keyed on the content of both files.
+
+    python event_study.py                 pooled curve and per-state effects
+    python event_study.py --state TX
+"""
+import argparse
+import csv
+import time
+
+import numpy as np
+import pandas as pd
+
+from forecast import SERIES_PATH, load_series
+
+ANNOUNCEMENTS_PATH = 'csv-generation/house/hyperscales.csv'
+PRE_MONTHS = 24
+POST_MONTHS = 36
+MIN_POST_MONTHS = 6  # post-announcement months a state needs before it gets its own effect
+
+
+def load_announcements(path=ANNOUNCEMENTS_PATH):
+    """
+    (state, announcement date) rows, plus every state named anywhere in the
+    file. Rows without a Location have one field fewer, so state and date are
+    taken as the last two fields. Rows without a usable state and date are
+    counted and dropped, but their state still counts as treated.
+    """
+    with open(path, newline='') as f:
+        rows = [r for r in csv.reader(f)][1:]
+    states = pd.Series([r[-2].strip() if len(r) >= 2 else '' for r in rows], dtype=object)
+    dates = pd.to_datetime(pd.Series([r[-1].strip() if r else '' for r in rows], dtype=object), errors='coerce')
+    has_state = states.str.match(r'^[A-Z]{2}$')
+    ok = has_state & dates.notna()
+    if (~ok).any():
+        print(f"Warning: {path}: skipping {int((~ok).sum())} rows without a state code and date")
+    return states[ok].tolist(), dates[ok], set(states[has_state])
+
+
+class EventStudy:
+    def __init__(self, states, dates, values, ann_states, ann_dates, pre=PRE_MONTHS, post=POST_MONTHS,
+                 treated_states=()):
+        start = time.perf_counter()
+        self.pre, self.post = pre, post
+        values = np.where(values > 0, values, np.nan)
+        # Growth in month t (t >= 1), annualized percent
+        growth = np.diff(np.log(values), axis=1) * 1200
+        months = pd.DatetimeIndex(dates)[1:]
+        state_idx = {s: i for i, s in enumerate(states)}
+
+        # Any state with an announcement, dated or not, is kept out of the controls
+        treated = np.zeros(len(states), dtype=bool)
+        treated[[state_idx[s] for s in set(ann_states) | set(treated_states) if s in state_idx]] = True
+        control_mean = np.nanmean(growth[~treated], axis=0)
+        excess = growth - control_mean
+
+        # Announcement month index; announcements outside the series are dropped
+        ann_month = months.searchsorted(pd.DatetimeIndex(ann_dates) + pd.offsets.MonthEnd(0))
+        ann_row = np.array([state_idx.get(s, -1) for s in ann_states])
+        keep = (ann_row >= 0) & (ann_month < len(months))
+        self.dropped = int((~keep).sum())
+        ann_row, ann_month = ann_row[keep], ann_month[keep]
+        self.announcements = [
+            {'state': s, 'date': str(d.date())}
+            for s, d, k in zip(ann_states, pd.DatetimeIndex(ann_dates), keep) if k
+        ]
+
+        # announcements x relative months, NaN outside the observed span
+        rel = np.arange(-pre, post + 1)
+        cols = ann_month[:, None] + rel[None, :]
+        inside = (cols >= 0) & (cols < len(months))
+        gathered = np.where(inside, excess[ann_row[:, None], np.clip(cols, 0, len(months) - 1)], np.nan)
+        baseline = np.nanmean(gathered[:, rel < 0], axis=1, keepdims=True)
+        self.effects = gathered - baseline          # DiD estimate per announcement and relative month
+        self.relative_months = rel
+
+        post_cols = rel > 0
+        post_vals = self.effects[:, post_cols]
+        self.post_months = np.sum(~np.isnan(post_vals), axis=1)
+        self.post_effect = np.where(self.post_months > 0,
+                                    np.nansum(post_vals, axis=1) / np.maximum(self.post_months, 1), np.nan)
+
+        # Grouped by state: average over a state's announcements with enough post months
+        self.states = [states[r] for r in ann_row]
+        usable = self.post_months >= MIN_POST_MONTHS
+        n_states = len(states)
+        sums = np.bincount(ann_row[usable], weights=self.post_effect[usable], minlength=n_states)
+        counts = np.bincount(ann_row[usable], minlength=n_states)
+        self.state_effects = {states[i]: float(sums[i] / counts[i]) for i in np.flatnonzero(counts)}
+        self.state_counts = {states[i]: int(counts[i]) for i in np.flatnonzero(counts)}
+        self.pooled_effect = float(np.mean(self.post_effect[usable])) if usable.any() else 0.0
+        self.pooled_n = int(usable.sum())
+        self.seconds = time.perf_counter() - start
+
+    @classmethod
+    def from_csv(cls, series_path=SERIES_PATH, announcements_path=ANNOUNCEMENTS_PATH, name_to_code=None):
+        states, dates, values = load_series(series_path, name_to_code)
+        ann_states, ann_dates, treated = load_announcements(announcements_path)
+        return cls(states, dates, values, ann_states, ann_dates, treated_states=treated)
+
+    def effect(self, state):
+        """Annual effect as a fraction and its source: the state's own estimate, else the pooled one."""
+        if state in self.state_effects:
+            return self.state_effects[state] / 100, 'state'
+        return self.pooled_effect / 100, 'pooled'
+
+    def curve(self, state=None):
+        """Mean DiD effect (annualized % growth) and standard error per relative month."""
+        rows = self.effects if state is None else self.effects[[s == state for s in self.states]]
+        if not len(rows):
+            raise ValueError(f"No announcements found for state: {state}")
+        n = np.sum(~np.isnan(rows), axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.nansum(rows, axis=0) / n
+            se = np.sqrt(np.nansum((rows - mean) ** 2, axis=0) / (n - 1)) / np.sqrt(n)
+        return [
+            {'relative_month': int(k), 'effect_pct': float(m), 'std_error': float(e) if n_k > 1 else None,
+             'announcements': int(n_k)}
+            for k, m, e, n_k in zip(self.relative_months, mean, se, n) if n_k
+        ]
+
+    def summary(self):
+        return {
+            'pooled_effect_pct': self.pooled_effect,
+            'pooled_announcements': self.pooled_n,
+            'state_effects_pct': self.state_effects,
+            'announcements': len(self.announcements),
+            'dropped_announcements': self.dropped,
+            'window': [-self.pre, self.post],
+            'min_post_months': MIN_POST_MONTHS,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-study estimates of the hyperscale housing effect")
+    parser.add_argument('--series', default=SERIES_PATH, help='Wide Zillow state series CSV')
+    parser.add_argument('--announcements', default=ANNOUNCEMENTS_PATH, help='Hyperscale announcements CSV')
+    parser.add_argument('--state', help='Show the relative-month curve for one state code')
+    args = parser.parse_args()
+
+    from snapshot import ELECTRICITY_PATHS
+    states = pd.read_csv(ELECTRICITY_PATHS[1])
+    study = EventStudy.from_csv(args.series, args.announcements,
+                                dict(zip(states['State'], states['StateCode'].str.upper())))
+    print(f"{len(study.announcements)} announcements in {study.seconds * 1000:.1f} ms "
+          f"({study.dropped} outside the series)")
+    print(f"Pooled effect: {study.pooled_effect:+.2f} pp/yr over {study.pooled_n} announcements "
+          f"with >= {MIN_POST_MONTHS} post months")
+    for state, eff in sorted(study.state_effects.items()):
+        print(f"  {state}  {eff:+.2f} pp/yr  ({study.state_counts[state]} announcements)")
+    for row in study.curve(args.state):
+        if row['relative_month'] % 6 == 0:
+            se = f"{row['std_error']:.2f}" if row['std_error'] is not None else '-'
+            print(f"  month {row['relative_month']:>+4}: {row['effect_pct']:+7.2f}  (se {se}, n={row['announcements']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Bulk export of all-state predictions as NDJSON or Arrow IPC.
+
+Both the /api/export endpoint and the CLI below consume the record generator
+in app.py one state at a time, so memory stays flat however many states,
+years and scenarios are exported:
+
+    python export.py --format ndjson -o predictions.ndjson
+    python export.py --format arrow --cursor NC --limit 10 -o page.arrow
+"""
+import argparse
+import io
+import json
+import math
+import sys
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional; only needed for Arrow IPC output
+    pa = None
+
+NDJSON = "application/x-ndjson"
+ARROW = "application/vnd.apache.arrow.stream"
+FORMATS = {"ndjson": NDJSON, "arrow": ARROW}
+
+# Column order and Arrow types of an export record
+SCHEMA = [
+    ("state", "string"),
+    ("year", "int32"),
+    ("scenario", "string"),
+    ("added_power_mw", "float64"),
+    ("observed_price_c_per_kwh", "float64"),
+    ("baseline_pred_c_per_kwh", "float64"),
+    ("new_pred_c_per_kwh", "float64"),
+    ("delta_c_per_kwh", "float64"),
+    ("dc_share_new", "float64"),
+    ("avg_home_value", "float64"),
+    ("home_value_pct_change", "float64"),
+]
+
+
+def _default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class _StdlibEncoder(json.JSONEncoder):
+    def default(self, obj):
+        return _default(obj)
+
+
+_stdlib_encoder = _StdlibEncoder(separators=(",", ":"), allow_nan=False)
+
+
+def _clean_nan(record):
+    return {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in record.items()}
+
+
+def dumps(record):
+    """Encode one record as compact JSON bytes; NumPy scalars/arrays are accepted and NaN becomes null."""
+    if orjson is not None:
+        return orjson.dumps(record, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return _stdlib_encoder.encode(_clean_nan(record)).encode()
+
+
+def encode_ndjson(batches):
+    for batch in batches:
+        yield b"".join(dumps(record) + b"\n" for record in batch)
+
+
+def arrow_schema():
+    return pa.schema([(name, getattr(pa, kind)()) for name, kind in SCHEMA])
+
+
+def encode_arrow(batches):
+    """Write each batch of records as one Arrow IPC record batch, yielding bytes as they are produced."""
+    if pa is None:
+        raise RuntimeError("Arrow export requires the optional pyarrow package")
+    schema = arrow_schema()
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+
+    def drain():
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    for batch in batches:
+        columns = {name: [record.get(name) for record in batch] for name, _ in SCHEMA}
+        writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=schema))
+        yield drain()
+    writer.close()
+    yield drain()
+
+
+def negotiate(requested_format, accept_mimetypes):
+    """Pick 'ndjson' or 'arrow' from an explicit format parameter or the Accept header."""
+    if requested_format:
+        if requested_format not in FORMATS:
+            raise ValueError(f"Unknown format {requested_format!r}; expected one of {sorted(FORMATS)}")
+        return requested_format
+    best = accept_mimetypes.best_match([NDJSON, ARROW], default=NDJSON)
+    return "arrow" if best == ARROW else "ndjson"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream predictions for every state, year and scenario")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+    parser.add_argument("--cursor", help="Resume after this state code")
+    parser.add_argument("--limit", type=int, help="Maximum number of states to export")
+    parser.add_argument("--mw", type=float, default=500, help="Added data center power per scenario (MW)")
+    parser.add_argument("--base-price", type=float, default=300000, help="Home value the housing path starts from")
+    parser.add_argument("--output", "-o", help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    import app as api
+
+    states, next_cursor = api.export_page(args.cursor, args.limit)
+    batches = api.iter_export_batches(states, added_power_mw=args.mw, base_price=args.base_price)
+    chunks = encode_arrow(batches) if args.format == "arrow" else encode_ndjson(batches)
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+    if next_cursor:
+        print(f"More states remain; resume with --cursor {next_cursor}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
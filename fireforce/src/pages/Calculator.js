@@ -40,29 +40,40 @@ function Calculator() {
     }));
   };
 
+  // Upload a bill and wait for the OCR job; the API answers 202 with a job to poll
+  // unless the same file was already parsed.
+  const parseBill = async (file, type) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    formData.append('type', type);
+
+    let response = await fetch('http://127.0.0.1:5002/api/calculator/parse-bill', {
+      method: 'POST',
+      body: formData
+    });
+    let data = await response.json();
+
+    for (let attempt = 0; response.status === 202 && attempt < 60; attempt++) {
+      await new Promise(resolve => setTimeout(resolve, 1000));
+      response = await fetch(`http://127.0.0.1:5002${data.poll_url || `/api/calculator/parse-bill/${data.job_id}`}`);
+      const polled = await response.json();
+      data = { ...polled, poll_url: data.poll_url };
+    }
+
+    return response.ok && data.success && data.status === 'done' ? data.data : null;
+  };
+
   const handleFileProcessing = async () => {
     // Handle file uploads if in upload mode
     if (inputs.uploadMethod === 'upload') {
-      const formData = new FormData();
-
       if (uploadedFiles.powerBill) {
-        formData.append('file', uploadedFiles.powerBill);
-        formData.append('type', 'power');
-
         try {
-          const response = await fetch('http://127.0.0.1:5002/api/calculator/parse-bill', {
-            method: 'POST',
-            body: formData
-          });
-
-          if (response.ok) {
-            const data = await response.json();
-            if (data.success) {
-              setInputs(prev => ({
-                ...prev,
-                currentPowerBill: data.data.amount.toString()
-              }));
-            }
+          const bill = await parseBill(uploadedFiles.powerBill, 'power');
+          if (bill && bill.amount != null) {
+            setInputs(prev => ({
+              ...prev,
+              currentPowerBill: bill.amount.toString()
+            }));
           }
         } catch (error) {
           console.error('Error parsing power bill:', error);
@@ -70,24 +81,13 @@ function Calculator() {
       }
 
       if (uploadedFiles.waterBill) {
-        const waterFormData = new FormData();
-        waterFormData.append('file', uploadedFiles.waterBill);
-        waterFormData.append('type', 'water');
-
         try {
-          const response = await fetch('http://127.0.0.1:5002/api/calculator/parse-bill', {
-            method: 'POST',
-            body: waterFormData
-          });
-
-          if (response.ok) {
-            const data = await response.json();
-            if (data.success) {
-              setInputs(prev => ({
-                ...prev,
-                currentWaterBill: data.data.amount.toString()
-              }));
-            }
+          const bill = await parseBill(uploadedFiles.waterBill, 'water');
+          if (bill && bill.amount != null) {
+            setInputs(prev => ({
+              ...prev,
+              currentWaterBill: bill.amount.toString()
+            }));
           }
         } catch (error) {
           console.error('Error parsing water bill:', error);
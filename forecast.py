@@ -0,0 +1,235 @@
+"""
+Damped-trend exponential smoothing of the Zillow state home-value series.
+
+All states are fitted together: the monthly log values form one
+state x month array, and every candidate (alpha, beta, phi) from a fixed grid
+is filtered through it at once, one vectorized step per month over a
+state x candidate array. Each state keeps the candidate with the smallest
+one-step-ahead squared error. Forecasts and prediction intervals for the whole
+horizon are then computed for every state in a few array operations, so the
+model is rebuilt on every snapshot build and requests only index into it.
+
+The model is additive damped trend on log values (ETS(A,Ad,N)):
+
+    level_t = level_{t-1} + phi * trend_{t-1} + alpha * e_t
+    trend_t = phi * trend_{t-1} + beta * e_t
+    forecast_{t+h} = level_t + (phi + ... + phi^h) * trend_t
+
+    python forecast.py                      fit all states and report timing
+    python forecast.py --state TX --months 24
+    python forecast.py --holdout 24         accuracy against constant mean growth
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+SERIES_PATH = 'csv-generation/house/states.csv'
+HORIZON_MONTHS = 72
+ALPHAS = np.linspace(0.1, 1.0, 10)
+BETA_FRACTIONS = np.array([0.05, 0.1, 0.2, 0.35, 0.5, 0.75, 1.0])  # beta as a share of alpha
+PHIS = np.array([0.8, 0.85, 0.9, 0.94, 0.97, 0.99])
+Z = {80: 1.2816, 95: 1.9600}
+WARMUP_MONTHS = 12  # one-step errors before this are not scored
+
+
+def _grid():
+    a, r, p = np.meshgrid(ALPHAS, BETA_FRACTIONS, PHIS, indexing='ij')
+    return a.ravel(), (a * r).ravel(), p.ravel()
+
+
+def load_series(path=SERIES_PATH, name_to_code=None):
+    """(state codes, month-end dates, state x month array of values) from the wide Zillow file."""
+    df = pd.read_csv(path)
+    date_cols = [c for c in df.columns if c[:4].isdigit()]
+    names = df['RegionName'].astype(str).str.strip()
+    if name_to_code is not None:
+        codes = names.map(name_to_code)
+        for name in names[codes.isna()]:
+            print(f"Warning: {path}: no state code for {name}; skipping")
+        keep = codes.notna().to_numpy()
+        df, names = df[keep], codes[keep]
+    return names.tolist(), pd.to_datetime(date_cols), df[date_cols].to_numpy(dtype=float)
+
+
+def fit(y):
+    """
+    Filter every grid candidate through log series y (states x months, NaN =
+    missing). Returns per-state alpha, beta, phi, sigma and the final level
+    and trend of the chosen candidate.
+    """
+    alpha, beta, phi = _grid()
+    n_states, n_months = y.shape
+    observed = ~np.isnan(y)
+    first = np.where(observed.any(axis=1), observed.argmax(axis=1), n_months)
+
+    # Start each state at its first observation with the first observed monthly change
+    level = np.zeros((n_states, len(alpha)))
+    trend = np.zeros_like(level)
+    sse = np.zeros_like(level)
+    count = np.zeros(n_states)
+    rows = np.arange(n_states)
+    start = np.minimum(first, n_months - 1)
+    level[:] = y[rows, start][:, None]
+    second = np.minimum(start + 1, n_months - 1)
+    trend[:] = np.nan_to_num(y[rows, second] - y[rows, start])[:, None]
+
+    for t in range(1, n_months):
+        active = t > first
+        if not active.any():
+            continue
+        pred = level + phi * trend
+        yt = y[:, t]
+        has = active & observed[:, t]
+        err = np.where(has[:, None], yt[:, None] - pred, 0.0)
+        # States without an observation this month just carry the forecast forward
+        new_level = np.where(active[:, None], pred + alpha * err, level)
+        trend = np.where(active[:, None], phi * trend + beta * err, trend)
+        level = new_level
+        scored = has & (t > first + WARMUP_MONTHS)
+        sse += np.where(scored[:, None], err * err, 0.0)
+        count += scored
+
+    best = sse.argmin(axis=1)
+    sigma = np.sqrt(sse[rows, best] / np.maximum(count - 3, 1))
+    return {
+        'alpha': alpha[best], 'beta': beta[best], 'phi': phi[best], 'sigma': sigma,
+        'level': level[rows, best], 'trend': trend[rows, best], 'observations': count.astype(int),
+    }
+
+
+def forecast_paths(params, horizon=HORIZON_MONTHS):
+    """Mean log forecast and its standard error, both states x horizon, for h = 1..horizon."""
+    h = np.arange(1, horizon + 1)
+    phi = params['phi'][:, None]
+    damp = np.cumsum(phi ** h, axis=1)                      # phi + ... + phi^h
+    mean = params['level'][:, None] + damp * params['trend'][:, None]
+    # Var_h = sigma^2 (1 + sum_{j<h} (alpha + beta * damp_j)^2)
+    c = (params['alpha'][:, None] + params['beta'][:, None] * damp[:, :-1]) ** 2
+    var = 1 + np.concatenate([np.zeros((len(phi), 1)), np.cumsum(c, axis=1)], axis=1)
+    return mean, params['sigma'][:, None] * np.sqrt(var)
+
+
+class StateForecast:
+    """Fitted damped-trend models and precomputed forecasts for every state."""
+
+    def __init__(self, states, dates, values, horizon=HORIZON_MONTHS):
+        start = time.perf_counter()
+        values = np.where(values > 0, values, np.nan)
+        self.states = list(states)
+        self._idx = {s: i for i, s in enumerate(self.states)}
+        self.params = fit(np.log(values))
+        log_mean, log_se = forecast_paths(self.params, horizon)
+        self.last_date = pd.Timestamp(dates[-1])
+        self.dates = pd.date_range(self.last_date, periods=horizon + 1, freq='M')[1:]
+        self.observed = values
+        self.observed_dates = pd.DatetimeIndex(dates)
+        self.mean = np.exp(log_mean)
+        self.bounds = {level: (np.exp(log_mean - z * log_se), np.exp(log_mean + z * log_se))
+                       for level, z in Z.items()}
+        self.fit_seconds = time.perf_counter() - start
+
+    @classmethod
+    def from_csv(cls, path=SERIES_PATH, name_to_code=None, horizon=HORIZON_MONTHS):
+        return cls(*load_series(path, name_to_code), horizon=horizon)
+
+    def __contains__(self, state):
+        return state in self._idx
+
+    def _row(self, state):
+        if state not in self._idx:
+            raise ValueError(f"No forecast for state: {state}")
+        return self._idx[state]
+
+    def value_at(self, state, date):
+        """(mean, {80: (lo, hi), 95: (lo, hi)}) for a month end; observed months have zero-width intervals."""
+        i = self._row(state)
+        date = pd.Timestamp(date) + pd.offsets.MonthEnd(0)
+        if date <= self.last_date:
+            pos = self.observed_dates.searchsorted(date)
+            v = float(self.observed[i, min(pos, len(self.observed_dates) - 1)])
+            return v, {level: (v, v) for level in Z}
+        h = (date.year - self.last_date.year) * 12 + date.month - self.last_date.month
+        if h > len(self.dates):
+            raise ValueError(f"Forecast horizon ends {self.dates[-1].date()}")
+        return float(self.mean[i, h - 1]), {
+            level: (float(lo[i, h - 1]), float(hi[i, h - 1])) for level, (lo, hi) in self.bounds.items()
+        }
+
+    def growth(self, state, base_year, target_year):
+        """Forecast ratio of the year-end value in target_year to base_year, with interval ratios."""
+        base, _ = self.value_at(state, f'{base_year}-12-31')
+        target, bounds = self.value_at(state, f'{target_year}-12-31')
+        return target / base, {level: (lo / base, hi / base) for level, (lo, hi) in bounds.items()}
+
+    def annual(self, state, first_year, last_year):
+        """Year-end forecast rows for a state, with 80% and 95% intervals."""
+        rows = []
+        for year in range(first_year, last_year + 1):
+            mean, bounds = self.value_at(state, f'{year}-12-31')
+            rows.append({
+                'year': year,
+                'avg_home_value': mean,
+                'lower_80': bounds[80][0], 'upper_80': bounds[80][1],
+                'lower_95': bounds[95][0], 'upper_95': bounds[95][1],
+            })
+        return rows
+
+    def model_info(self, state):
+        i = self._row(state)
+        return {
+            'model': 'damped_trend',
+            'alpha': float(self.params['alpha'][i]),
+            'beta': float(self.params['beta'][i]),
+            'phi': float(self.params['phi'][i]),
+            'sigma': float(self.params['sigma'][i]),
+            'last_observed': str(self.last_date.date()),
+        }
+
+
+def holdout(path=SERIES_PATH, months=24):
+    """MAPE of the damped-trend forecast and of constant mean growth over the last `months`."""
+    states, dates, values = load_series(path)
+    train = values[:, :-months]
+    actual = values[:, -months:]
+    fc = StateForecast(states, dates[:-months], train, horizon=months)
+    # Constant growth: each state's mean monthly log change, as simple_simulate compounds a mean rate
+    logs = np.log(np.where(train > 0, train, np.nan))
+    drift = np.nanmean(np.diff(logs, axis=1), axis=1)
+    last = train[:, -1]
+    const = last[:, None] * np.exp(drift[:, None] * np.arange(1, months + 1))
+    ok = ~np.isnan(actual)
+    mape = lambda pred: float(np.mean(np.abs(pred[ok] - actual[ok]) / actual[ok]) * 100)
+    inside = (actual >= fc.bounds[95][0]) & (actual <= fc.bounds[95][1])
+    return {'damped_trend_mape': mape(fc.mean), 'constant_growth_mape': mape(const),
+            'coverage_95': float(inside[ok].mean() * 100), 'fit_seconds': fc.fit_seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit damped-trend forecasts for every state")
+    parser.add_argument('--data', default=SERIES_PATH, help='Wide Zillow state series CSV')
+    parser.add_argument('--state', help='Print the forecast for one state (full name as in the file)')
+    parser.add_argument('--months', type=int, default=24, help='Months to print for --state')
+    parser.add_argument('--holdout', type=int, metavar='MONTHS', help='Score forecasts on the last MONTHS')
+    args = parser.parse_args()
+
+    if args.holdout:
+        r = holdout(args.data, args.holdout)
+        print(f"{args.holdout}-month holdout MAPE: damped trend {r['damped_trend_mape']:.2f}%, "
+              f"constant growth {r['constant_growth_mape']:.2f}%; 95% interval coverage {r['coverage_95']:.0f}%")
+        return
+
+    fc = StateForecast.from_csv(args.data)
+    print(f"Fitted {len(fc.states)} states x {fc.observed.shape[1]} months "
+          f"({len(ALPHAS) * len(BETA_FRACTIONS) * len(PHIS)} candidates each) in {fc.fit_seconds * 1000:.0f} ms")
+    if args.state:
+        print(fc.model_info(args.state))
+        i = fc._row(args.state)
+        for h in range(min(args.months, len(fc.dates))):
+            lo, hi = fc.bounds[95][0][i, h], fc.bounds[95][1][i, h]
+            print(f"  {fc.dates[h].date()}  {fc.mean[i, h]:>12,.0f}  [{lo:>12,.0f}, {hi:>12,.0f}]")
+
+
+if __name__ == '__main__':
+    main()
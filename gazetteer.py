@@ -0,0 +1,144 @@
+"""
+Place-name resolution for states and housing regions.
+
+Built once per model snapshot from the state metrics table (codes and full
+names) and the housing region index. Resolution is an exact dict lookup on the
+normalized name, then a trigram-index fuzzy match scored by edit distance, so
+typos like "new yrok" still resolve. Both paths take microseconds.
+"""
+import heapq
+import re
+from collections import defaultdict
+
+MIN_CONFIDENCE = 0.6
+MAX_CANDIDATES = 3  # best trigram matches re-scored by edit distance
+# Common spellings the state table doesn't carry
+STATE_ALIASES = {
+    'DC': ['washington dc', 'washington d c', 'dc', 'd c'],
+}
+
+
+def normalize(text):
+    return re.sub(r'[^a-z0-9]+', ' ', str(text).lower()).strip()
+
+
+def _trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a, b):
+    # Myers' bit-parallel Levenshtein distance: one pass over b with a as bitmasks
+    if not a:
+        return len(b)
+    peq = {}
+    for i, c in enumerate(a):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    pv, mv, score = mask, 0, len(a)
+    for c in b:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+    return score
+
+
+class Gazetteer:
+    def __init__(self, states, regions=None):
+        """
+        states: iterable of (code, full name); regions: an optional RegionIndex
+        whose metro, county and city names are added after the states.
+        """
+        self._exact = {}
+        self._names = []    # fuzzy-matchable normalized names
+        self._places = []   # place dict for each entry in _names
+        self._gram_counts = []
+        self._grams = defaultdict(list)
+
+        for code, name in states:
+            code = str(code).upper()
+            place = {'name': name, 'state': code, 'level': 'state', 'key': code}
+            self._exact.setdefault(normalize(code), place)
+            for alias in [name] + STATE_ALIASES.get(code, []):
+                self._add(alias, place)
+
+        if regions is not None:
+            for level in ('metro', 'county', 'city'):
+                for key, region in regions.regions[level].items():
+                    place = {'name': key, 'state': region['state'], 'level': level, 'key': key}
+                    self._add(key, place)
+                    # Bare name without the ", ST" suffix, e.g. "Salt Lake City"
+                    self._add(key.split(',')[0], place)
+
+    def _add(self, name, place):
+        norm = normalize(name)
+        if not norm or norm in self._exact:
+            return
+        self._exact[norm] = place
+        idx = len(self._names)
+        self._names.append(norm)
+        self._places.append(place)
+        grams = _trigrams(norm)
+        self._gram_counts.append(len(grams))
+        for gram in grams:
+            self._grams[gram].append(idx)
+
+    def __len__(self):
+        return len(self._exact)
+
+    def lookup(self, text, min_confidence=MIN_CONFIDENCE, levels=None):
+        """
+        Resolve a place name. Returns the place ({name, state, level, key})
+        plus `confidence` (1.0 for exact matches), or None if nothing scores
+        at least min_confidence.
+        """
+        norm = normalize(text)
+        if not norm:
+            return None
+        place = self._exact.get(norm)
+        if place is not None and (levels is None or place['level'] in levels):
+            return dict(place, confidence=1.0)
+        if len(norm) < 3:
+            return None
+
+        # Rank by trigram Dice coefficient, then score the best few by edit distance
+        grams = _trigrams(norm)
+        shared = defaultdict(int)
+        for gram in grams:
+            for idx in self._grams.get(gram, ()):
+                shared[idx] += 1
+        if levels is not None:
+            shared = {i: n for i, n in shared.items() if self._places[i]['level'] in levels}
+        dice = {i: 2 * n / (len(grams) + self._gram_counts[i]) for i, n in shared.items()}
+        best, best_score = None, 0.0
+        for idx in heapq.nlargest(MAX_CANDIDATES, dice, key=dice.get):
+            name = self._names[idx]
+            score = 1.0 - _edit_distance(norm, name) / max(len(norm), len(name))
+            if score > best_score:
+                best, best_score = self._places[idx], score
+        if best is None or best_score < min_confidence:
+            return None
+        return dict(best, confidence=round(best_score, 3))
+
+    def state_code(self, text):
+        """Resolve a state code or name (typos allowed) to its code; ValueError if unknown."""
+        place = self.lookup(text, levels=('state',))
+        if place is None:
+            raise ValueError(f"State {str(text).strip().upper()} not found")
+        return place['state']
+
+
+def from_state_table(df, regions=None):
+    """Build from a frame with StateCode and State (full name) columns."""
+    return Gazetteer(zip(df['StateCode'], df['State']), regions)
@@ -0,0 +1,110 @@
+"""
+Compact in-memory layout of the processed housing file.
+
+Only the columns the API and RegionIndex read (HOUSING_COLUMNS) are parsed.
+Strings go straight into categoricals and integers are downcast. Floats
+become float32 only where every value survives the round trip, so served
+numbers do not change. Rows are stably sorted by state, and
+offsets[i]:offsets[i + 1] are the rows of states[i]. A state's rows are
+therefore one contiguous slice, and iloc returns views of it rather than
+gathering them. Within a state the file order is kept.
+
+    python housing_data.py [path]       memory of the default and compact layouts
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Column -> how it is stored; every other column in the file is skipped at parse time
+HOUSING_COLUMNS = {
+    'State': 'category',
+    'RegionID': 'integer',
+    'RegionName': 'category',
+    'Metro': 'category',
+    'CountyName': 'category',
+    'Date': 'category',
+    'Avg_Home_Value': 'float',
+    'HomeValue_Pct_Change': 'float',
+    'Is_Post_Announcement': 'integer',
+}
+
+
+def default_footprint(path, chunksize=100_000):
+    """Bytes the whole file takes when read with default dtypes, measured one chunk at a time."""
+    with pd.read_csv(path, chunksize=chunksize) as reader:
+        return int(sum(chunk.memory_usage(deep=True, index=False).sum() for chunk in reader))
+
+
+def _downcast(series, kind):
+    if kind == 'integer':
+        return pd.to_numeric(series, downcast='integer')
+    # pd.to_numeric(downcast='float') accepts float32 within a tolerance; keep float64 unless it is exact
+    narrow = series.astype(np.float32)
+    exact = np.array_equal(narrow.to_numpy(dtype=np.float64), series.to_numpy(dtype=np.float64), equal_nan=True)
+    return narrow if exact else series
+
+
+def read_compact(path, columns=HOUSING_COLUMNS):
+    """The projected columns of the file with compact dtypes, in file order."""
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [c for c in columns if c in header]
+    df = pd.read_csv(path, usecols=usecols, dtype={c: 'category' for c in usecols if columns[c] == 'category'})
+    for col in usecols:
+        if columns[col] != 'category' and pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = _downcast(df[col], columns[col])
+    return df[usecols], [c for c in header if c not in columns]
+
+
+class HousingTable:
+    """The compact housing frame sorted by state, with per-state offsets and a memory report."""
+
+    def __init__(self, df, dropped=(), default_bytes=None):
+        if 'State' in df:
+            state = df['State'].astype('category')
+            codes = state.cat.codes.to_numpy()
+            order = np.argsort(codes, kind='stable')
+            df = df.take(order).reset_index(drop=True)
+            # Rows without a state (code -1) sort first and belong to no slice
+            counts = np.bincount(codes[codes >= 0], minlength=len(state.cat.categories))
+            present = np.flatnonzero(counts)
+            self.states = state.cat.categories[present].tolist()
+            self.offsets = int((codes < 0).sum()) + np.concatenate([[0], np.cumsum(counts[present])])
+        else:
+            self.states, self.offsets = [], np.zeros(1, dtype=np.int64)
+        self.df = df
+        self.state_rows = {s: slice(int(self.offsets[i]), int(self.offsets[i + 1])) for i, s in enumerate(self.states)}
+        self.state_set = frozenset(self.states)
+        compact = int(df.memory_usage(deep=True, index=False).sum())
+        self.memory = {
+            'rows': int(len(df)),
+            'default_bytes': default_bytes,
+            'compact_bytes': compact,
+            'reduction_pct': (1 - compact / default_bytes) * 100 if default_bytes else None,
+            'columns': {c: str(df[c].dtype) for c in df.columns},
+            'columns_dropped': list(dropped),
+        }
+
+    @classmethod
+    def from_csv(cls, path, columns=HOUSING_COLUMNS, measure=True):
+        df, dropped = read_compact(path, columns)
+        return cls(df, dropped, default_footprint(path) if measure else None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare default and compact memory of the housing file")
+    parser.add_argument('path', nargs='?', default='csv-generation/house/processed_states_hyperscale_clean.csv')
+    args = parser.parse_args()
+
+    table = HousingTable.from_csv(args.path)
+    m = table.memory
+    print(f"{m['rows']:,} rows, {len(table.states)} states")
+    print(f"default dtypes, all columns: {m['default_bytes'] / 1e6:8.3f} MB")
+    print(f"compact, used columns:       {m['compact_bytes'] / 1e6:8.3f} MB  ({m['reduction_pct']:.0f}% smaller)")
+    for col, dtype in m['columns'].items():
+        print(f"  {col:<22}{dtype:<10}{table.df[col].memory_usage(deep=True, index=False) / 1e3:>10.1f} kB")
+    print(f"dropped: {', '.join(m['columns_dropped']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+Persisted RandomForest model of annual home-value growth.
+
+Training is a separate command; the API only loads the newest artifact at
+startup. Each artifact is a joblib file, its NumPy export (model_export.py,
+what the API serves) and a JSON sidecar holding the version, feature schema
+and training metadata:
+
+    python housing_forest.py train [--data CSV] [--trees 100] [--out models]
+    python housing_forest.py info
+
+The model predicts a year's HomeValue_Pct_Change from the state, year,
+post-announcement flag and the home value at the start of the year, so a price
+path is simulated by compounding one prediction per year. All states in a
+request are predicted together, one batched forest call per simulated year.
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import http_cache
+import model_export
+
+MODEL_DIR = os.environ.get('FIREFORCE_MODEL_DIR', 'models')
+ARTIFACT_PREFIX = 'housing_forest'
+TRAINING_DATA = 'csv-generation/house/processed_states_hyperscale_clean.csv'
+NUMERIC_FEATURES = ['Year', 'Is_Post_Announcement', 'Start_Home_Value']
+DEFAULT_PARAMS = {'n_estimators': 100, 'min_samples_leaf': 2, 'random_state': 42}
+
+
+def training_frame(df):
+    """One row per region-year with the start-of-year value as a feature (no same-year leakage)."""
+    df = df.dropna(subset=['Avg_Home_Value', 'HomeValue_Pct_Change'])
+    # Rows repeat once per announcement in the state; keep one per region, date and flag
+    df = df.drop_duplicates(subset=['RegionID', 'Date', 'Is_Post_Announcement'])
+    out = df[['State', 'Year', 'Is_Post_Announcement', 'HomeValue_Pct_Change']].copy()
+    out['Start_Home_Value'] = df['Avg_Home_Value'] / (1 + df['HomeValue_Pct_Change'] / 100)
+    return out.reset_index(drop=True)
+
+
+class HousingForest:
+    def __init__(self, model, schema):
+        self.model = model
+        self.schema = schema
+        self.version = schema['version']
+        self.states = schema['states']
+        self._state_col = {s: i for i, s in enumerate(self.states)}
+        self._n_numeric = len(schema['numeric_features'])
+
+    def __contains__(self, state):
+        return state in self._state_col
+
+    def features(self, states, years, post, start_values):
+        """Feature matrix in schema order: numeric features, then one-hot state columns."""
+        n = len(states)
+        X = np.zeros((n, self._n_numeric + len(self.states)))
+        X[:, 0] = years
+        X[:, 1] = post
+        X[:, 2] = start_values
+        cols = [self._state_col[s] for s in states]
+        X[np.arange(n), self._n_numeric + np.asarray(cols, dtype=int)] = 1.0
+        return X
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+    def simulate(self, states, current_prices, years_after=1, base_year=2025):
+        """
+        Compound predicted growth for every state at once. Returns
+        (nominal_with_dc, nominal_without_dc) arrays, one entry per state.
+        """
+        unknown = [s for s in states if s not in self]
+        if unknown:
+            raise ValueError(f"No data found for state: {unknown[0]}")
+        n = len(states)
+        both_states = list(states) * 2
+        post = np.repeat([1.0, 0.0], n)
+        prices = np.tile(np.asarray(current_prices, dtype=float), 2)
+        for year in range(base_year + 1, base_year + years_after + 1):
+            growth = self.predict(self.features(both_states, np.full(2 * n, year), post, prices))
+            prices = prices * (1 + growth / 100)
+        return prices[:n], prices[n:]
+
+
+def _artifact_paths(version, out_dir=MODEL_DIR):
+    base = os.path.join(out_dir, f'{ARTIFACT_PREFIX}-{version}')
+    return base + '.joblib', base + '.json'
+
+
+def latest_schema_path(model_dir=MODEL_DIR):
+    pinned = os.environ.get('FIREFORCE_FOREST_VERSION')
+    if pinned:
+        path = _artifact_paths(pinned, model_dir)[1]
+        return path if os.path.exists(path) else None
+    paths = glob.glob(os.path.join(model_dir, f'{ARTIFACT_PREFIX}-*.json'))
+    if not paths:
+        return None
+    return max(paths, key=lambda p: _read_json(p).get('created_at', 0))
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def load(schema_path=None):
+    """
+    Load the newest (or FIREFORCE_FOREST_VERSION) artifact; None if none has
+    been trained. The NumPy export is preferred so serving never imports sklearn.
+    """
+    schema_path = schema_path or latest_schema_path()
+    if schema_path is None:
+        return None
+    schema = _read_json(schema_path)
+    model_dir = os.path.dirname(schema_path)
+    if schema.get('numpy_file'):
+        return HousingForest(model_export.load(os.path.join(model_dir, schema['numpy_file'])), schema)
+    print(f"Warning: {schema_path} has no NumPy export; loading with scikit-learn (run: python model_export.py)")
+    import joblib
+    return HousingForest(joblib.load(os.path.join(model_dir, schema['model_file'])), schema)
+
+
+def export_artifact(schema_path=None):
+    """Write the NumPy export of a trained artifact and record it in its schema."""
+    import joblib
+    schema_path = schema_path or latest_schema_path()
+    if schema_path is None:
+        return None
+    schema = _read_json(schema_path)
+    model_dir = os.path.dirname(schema_path)
+    model = joblib.load(os.path.join(model_dir, schema['model_file']))
+    numpy_path = os.path.join(model_dir, f"{ARTIFACT_PREFIX}-{schema['version']}.npz")
+    model_export.save(numpy_path, model_export.export_forest(model))
+    schema['numpy_file'] = os.path.basename(numpy_path)
+    with open(schema_path, 'w') as f:
+        json.dump(schema, f, indent=2)
+    return numpy_path
+
+
+def train(data_path=TRAINING_DATA, out_dir=MODEL_DIR, **params):
+    import joblib
+    import sklearn
+    from sklearn.ensemble import RandomForestRegressor
+
+    params = dict(DEFAULT_PARAMS, **params)
+    df = training_frame(pd.read_csv(data_path))
+    states = sorted(df['State'].unique())
+    version = http_cache.compute_dataset_version([data_path], {**params, 'features': NUMERIC_FEATURES})
+    schema = {
+        'version': version,
+        'created_at': time.time(),
+        'numeric_features': NUMERIC_FEATURES,
+        'states': states,
+        'target': 'HomeValue_Pct_Change',
+        'training_data': data_path,
+        'training_rows': int(len(df)),
+        'params': params,
+        'sklearn_version': sklearn.__version__,
+    }
+    forest = HousingForest(None, schema)
+    X = forest.features(df['State'].tolist(), df['Year'].values, df['Is_Post_Announcement'].values,
+                        df['Start_Home_Value'].values)
+
+    start = time.perf_counter()
+    model = RandomForestRegressor(n_jobs=-1, oob_score=True, **params)
+    model.fit(X, df['HomeValue_Pct_Change'].values)
+    model.set_params(n_jobs=1)  # serving predicts small batches; thread fan-out only adds overhead
+    schema['fit_seconds'] = round(time.perf_counter() - start, 3)
+    schema['oob_r2'] = float(model.oob_score_)
+
+    os.makedirs(out_dir, exist_ok=True)
+    model_path, schema_path = _artifact_paths(version, out_dir)
+    schema['model_file'] = os.path.basename(model_path)
+    joblib.dump(model, model_path, compress=3)
+    with open(schema_path, 'w') as f:
+        json.dump(schema, f, indent=2)
+    export_artifact(schema_path)
+    return schema_path, _read_json(schema_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or inspect the housing RandomForest artifact")
+    sub = parser.add_subparsers(dest='command', required=True)
+    t = sub.add_parser('train', help='Fit on all cores and save a versioned artifact')
+    t.add_argument('--data', default=TRAINING_DATA, help='Training CSV (cleaned housing panel)')
+    t.add_argument('--out', default=MODEL_DIR, help='Artifact directory')
+    t.add_argument('--trees', type=int, default=DEFAULT_PARAMS['n_estimators'], help='Number of trees')
+    t.add_argument('--seed', type=int, default=DEFAULT_PARAMS['random_state'], help='Random seed')
+    sub.add_parser('info', help='Show the artifact the API would load')
+    args = parser.parse_args()
+
+    if args.command == 'train':
+        path, schema = train(args.data, args.out, n_estimators=args.trees, random_state=args.seed)
+        print(f"Trained {schema['params']['n_estimators']} trees on {schema['training_rows']} rows "
+              f"in {schema['fit_seconds']:.2f}s (OOB R^2 {schema['oob_r2']:.3f})")
+        print(f"Saved version {schema['version']} to {path}")
+    else:
+        path = latest_schema_path()
+        if path is None:
+            print(f"No artifact in {MODEL_DIR}/; run: python housing_forest.py train")
+            return
+        print(json.dumps(_read_json(path), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+HTTP caching and compression for the API.
+
+GET endpoints that are pure functions of the loaded datasets get an ETag built
+from the dataset version and the query string, so repeat requests from browsers
+and the CDN are answered with 304 before the view (and the models) run.
+Larger responses are brotli- or gzip-compressed depending on Accept-Encoding.
+"""
+import gzip
+import hashlib
+import os
+
+from flask import g, request
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+CACHE_MAX_AGE = int(os.environ.get("FIREFORCE_CACHE_MAX_AGE", "300"))
+COMPRESS_MIN_BYTES = int(os.environ.get("FIREFORCE_COMPRESS_MIN_BYTES", "512"))
+
+
+def compute_dataset_version(paths, params=None):
+    """Hash the contents of the input files plus model parameters into a short version string."""
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(path.encode())
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+    h.update(repr(sorted((params or {}).items())).encode())
+    return h.hexdigest()[:16]
+
+
+def _etag(version):
+    query = hashlib.sha1(request.query_string).hexdigest()[:8]
+    return f"{version}-{request.endpoint}-{query}"
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _compress(response):
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or "Content-Encoding" in response.headers):
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+    response.set_data(brotli.compress(data, quality=5) if encoding == "br" else gzip.compress(data, 6))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_app(app, get_version, cacheable_endpoints):
+    cacheable_endpoints = set(cacheable_endpoints)
+
+    @app.before_request
+    def _conditional_get():
+        if request.method != "GET" or request.endpoint not in cacheable_endpoints:
+            return None
+        etag = _etag(get_version())
+        # Weak match: compressed and identity encodings share one tag
+        hit = request.if_none_match.contains_weak(etag)
+        metrics.record_cache("http_etag", hit)
+        if hit:
+            response = app.response_class(status=304)
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = f"public, max-age={CACHE_MAX_AGE}"
+            return response
+        g._etag = etag
+        return None
+
+    @app.after_request
+    def _cache_headers(response):
+        etag = g.pop("_etag", None)
+        if etag is not None and response.status_code == 200:
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = f"public, max-age={CACHE_MAX_AGE}"
+        return _compress(response)
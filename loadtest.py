@@ -0,0 +1,228 @@
+"""
+Local load generator for the API.
+
+Replays a weighted traffic mix with concurrent asyncio clients and reports
+throughput, latency percentiles, error rates and shed rates (429s from
+admission control) per endpoint:
+
+    python loadtest.py --start-server --mix default --concurrency 32 --duration 30 -o results.json
+    python loadtest.py --url http://127.0.0.1:5002 --mix calculator --compare results.json
+
+Mixes are the canned ones below or a JSON file with the same shape
+({"name": {"weight": w, "method": ..., "path": ..., "body": ...}}).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _states():
+    import pandas as pd
+    df = pd.read_csv(os.path.join(ROOT, "State_energy_metrics.csv"))
+    return list(zip(df["StateCode"].str.upper(), df["State"]))
+
+
+def canned_mixes():
+    states = _states()
+
+    def calculator():
+        _, name = random.choice(states)
+        return {
+            "state": name.lower(),
+            "currentPowerBill": round(random.uniform(60, 300), 2),
+            "currentWaterBill": round(random.uniform(20, 120), 2),
+            "householdSize": random.randint(1, 6),
+            "currentHomeValue": random.choice([None, random.randint(150, 900) * 1000]),
+        }
+
+    def history():
+        code, _ = random.choice(states)
+        return f"/api/housing/history?state={code}&base_price={random.randint(150, 900) * 1000}"
+
+    def electricity():
+        code, _ = random.choice(states)
+        return {"state": code, "added_power_mw": random.choice([100, 250, 500, 1000]),
+                "mode": random.choice(["assumption", "trained"])}
+
+    endpoints = {
+        "calculator": {"method": "POST", "path": "/api/calculator/predict", "body": calculator},
+        "housing_history": {"method": "GET", "path": history},
+        "electricity_predict": {"method": "POST", "path": "/api/electricity/predict", "body": electricity},
+        "states": {"method": "GET", "path": "/api/states"},
+    }
+    weights = {
+        "default": {"calculator": 50, "housing_history": 25, "electricity_predict": 15, "states": 10},
+        "calculator": {"calculator": 90, "states": 10},
+        "read-heavy": {"housing_history": 60, "states": 30, "electricity_predict": 10},
+    }
+    return {mix: {ep: dict(endpoints[ep], weight=w) for ep, w in ws.items()} for mix, ws in weights.items()}
+
+
+def load_mix(name_or_path):
+    mixes = canned_mixes()
+    if name_or_path in mixes:
+        return mixes[name_or_path]
+    with open(name_or_path) as f:
+        return json.load(f)
+
+
+def _resolve(value):
+    return value() if callable(value) else value
+
+
+async def http_request(host, port, method, path, body=None, timeout=30.0):
+    """Minimal HTTP/1.1 client over asyncio streams; returns (status, response bytes)."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    head = [f"{method} {path} HTTP/1.1", f"Host: {host}:{port}", "Connection: close",
+            "Accept: application/json", f"Content-Length: {len(payload)}"]
+    if body is not None:
+        head.append("Content-Type: application/json")
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+        await writer.drain()
+        raw = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    status = int(raw.split(b" ", 2)[1]) if raw.startswith(b"HTTP/") else 0
+    return status, raw
+
+
+async def client_loop(host, port, mix, deadline, samples, timeout):
+    names = list(mix)
+    weights = [mix[n]["weight"] for n in names]
+    while time.perf_counter() < deadline:
+        name = random.choices(names, weights)[0]
+        spec = mix[name]
+        path = _resolve(spec["path"])
+        body = _resolve(spec.get("body"))
+        start = time.perf_counter()
+        try:
+            status, _ = await http_request(host, port, spec["method"], path, body, timeout)
+        except (OSError, asyncio.TimeoutError):
+            status = 0
+        samples.append((name, start, time.perf_counter() - start, status))
+
+
+def summarize(samples, elapsed):
+    report = {"elapsed_s": elapsed, "endpoints": {}}
+    by_endpoint = {}
+    for name, _, latency, status in samples:
+        by_endpoint.setdefault(name, []).append((latency, status))
+    by_endpoint["ALL"] = [(latency, status) for _, _, latency, status in samples]
+    for name, rows in by_endpoint.items():
+        latencies = np.array([r[0] for r in rows]) * 1000
+        statuses = np.array([r[1] for r in rows])
+        errors = int(np.sum((statuses == 0) | (statuses >= 500)))
+        # A 429 is admission control shedding the request, not a success
+        shed = int(np.sum(statuses == 429))
+        report["endpoints"][name] = {
+            "requests": len(rows),
+            "throughput_rps": len(rows) / elapsed,
+            "error_rate": errors / len(rows),
+            "shed_rate": shed / len(rows),
+            "status_counts": {str(s): int(n) for s, n in zip(*np.unique(statuses, return_counts=True))},
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p90_ms": float(np.percentile(latencies, 90)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "max_ms": float(latencies.max()),
+        }
+    return report
+
+
+def print_report(report, previous=None):
+    print(f"{'endpoint':<22} {'reqs':>7} {'rps':>8} {'err%':>6} {'shed%':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+    for name, s in report["endpoints"].items():
+        line = (f"{name:<22} {s['requests']:>7} {s['throughput_rps']:>8.1f} {s['error_rate'] * 100:>6.2f} "
+                f"{s['shed_rate'] * 100:>6.2f} "
+                f"{s['p50_ms']:>8.2f} {s['p90_ms']:>8.2f} {s['p99_ms']:>8.2f}")
+        prev = (previous or {}).get("endpoints", {}).get(name)
+        if prev:
+            line += (f"   rps {s['throughput_rps'] / prev['throughput_rps']:.2f}x"
+                     f"  p99 {s['p99_ms'] / prev['p99_ms']:.2f}x")
+        print(line)
+
+
+def start_server(port):
+    code = f"import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)"
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1)
+            return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError("API server exited during startup")
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("API server did not become healthy within 60s")
+
+
+async def run(host, port, mix, concurrency, duration, timeout):
+    samples = []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(client_loop(host, port, mix, deadline, samples, timeout) for _ in range(concurrency)))
+    return summarize(samples, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a traffic mix against a local API server")
+    parser.add_argument("--url", default="http://127.0.0.1:5002", help="Base URL of the server")
+    parser.add_argument("--start-server", action="store_true",
+                        help="Start app.py (threaded) on the --url port for the duration of the run")
+    parser.add_argument("--mix", default="default",
+                        help=f"Canned mix ({', '.join(canned_mixes())}) or path to a JSON mix file")
+    parser.add_argument("--concurrency", "-c", type=int, nargs="+", default=[16],
+                        help="Concurrent clients; pass several values to step up and find saturation")
+    parser.add_argument("--duration", "-d", type=float, default=20.0, help="Seconds per concurrency level")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the request stream")
+    parser.add_argument("--output", "-o", help="Write machine-readable results to this JSON file")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    url = urllib.parse.urlparse(args.url)
+    host, port = url.hostname, url.port or 80
+    mix = load_mix(args.mix)
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = {r["concurrency"]: r for r in json.load(f)["runs"]}
+
+    server = start_server(port) if args.start_server else None
+    runs = []
+    try:
+        for concurrency in args.concurrency:
+            report = asyncio.run(run(host, port, mix, concurrency, args.duration, args.timeout))
+            report["concurrency"] = concurrency
+            runs.append(report)
+            print(f"\n== mix={args.mix} concurrency={concurrency} duration={report['elapsed_s']:.1f}s")
+            print_report(report, (previous or {}).get(concurrency))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"mix": args.mix, "url": args.url, "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "runs": runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+ISO-aware electricity impact: added data-center load priced at the market level.
+
+States that share a wholesale market (PJM, MISO, ERCOT, ...) share its price
+response, so load added in one state moves prices across the market. A
+sparse state x market membership matrix (rows sum to 1) is built once per
+snapshot from STATE_MARKETS and the full state table; any part of a state
+outside an ISO becomes a single-state market of its own. Load, sales and
+data-center energy are aggregated to markets with one sparse product, each
+market's data-center share is computed, and it is mapped back to every state
+as a membership-weighted share. Prices then follow what_if_added_dc's
+formulas with that effective share, for all states in one pass.
+
+    python markets.py --state VA --mw 500 [--mode assumption|trained]
+"""
+import argparse
+
+import numpy as np
+import scipy.sparse as sp
+
+from model import ASSUMPTION_SHARE_FLOOR, PASS_THROUGH_ELEC, build_features, build_features_baseline, predict
+
+# Approximate share of each state's load served in each ISO/RTO, in the style of
+# data_generation.CITY_CONFIG; the remainder (and unlisted states) is the state's own market
+STATE_MARKETS = {
+    'CA': {'CAISO': 0.8},
+    'TX': {'ERCOT': 0.9, 'SPP': 0.1},
+    'NY': {'NYISO': 1.0},
+    'CT': {'ISONE': 1.0}, 'MA': {'ISONE': 1.0}, 'ME': {'ISONE': 1.0},
+    'NH': {'ISONE': 1.0}, 'RI': {'ISONE': 1.0}, 'VT': {'ISONE': 1.0},
+    'DC': {'PJM': 1.0}, 'DE': {'PJM': 1.0}, 'MD': {'PJM': 1.0}, 'NJ': {'PJM': 1.0},
+    'OH': {'PJM': 1.0}, 'PA': {'PJM': 1.0}, 'VA': {'PJM': 1.0}, 'WV': {'PJM': 1.0},
+    'IL': {'PJM': 0.6, 'MISO': 0.4}, 'IN': {'MISO': 0.8, 'PJM': 0.2},
+    'MI': {'MISO': 0.9, 'PJM': 0.1}, 'KY': {'PJM': 0.3}, 'NC': {'PJM': 0.1},
+    'IA': {'MISO': 1.0}, 'MN': {'MISO': 1.0}, 'WI': {'MISO': 1.0}, 'LA': {'MISO': 1.0},
+    'MO': {'MISO': 0.6, 'SPP': 0.4}, 'AR': {'MISO': 0.8, 'SPP': 0.2}, 'MS': {'MISO': 0.5},
+    'ND': {'MISO': 0.6, 'SPP': 0.4}, 'SD': {'SPP': 0.7, 'MISO': 0.3},
+    'KS': {'SPP': 1.0}, 'OK': {'SPP': 1.0}, 'NE': {'SPP': 1.0}, 'NM': {'SPP': 0.3},
+}
+OWN_MARKET = 'own:'  # column prefix for the non-ISO remainder of a state
+
+
+class MarketMap:
+    def __init__(self, state_codes, state_markets=STATE_MARKETS):
+        self.states = list(state_codes)
+        self._idx = {s: i for i, s in enumerate(self.states)}
+        isos = sorted({m for markets in state_markets.values() for m in markets})
+        rows, cols, weights = [], [], []
+        columns = list(isos)
+        for i, state in enumerate(self.states):
+            markets = state_markets.get(state, {})
+            for market, w in markets.items():
+                rows.append(i)
+                cols.append(isos.index(market))
+                weights.append(w)
+            rest = 1.0 - sum(markets.values())
+            if rest > 1e-9:
+                rows.append(i)
+                cols.append(len(columns))
+                weights.append(rest)
+                columns.append(OWN_MARKET + state)
+        self.markets = columns
+        self.isos = isos
+        self.membership = sp.csr_matrix((weights, (rows, cols)), shape=(len(self.states), len(columns)))
+        self._membership_t = self.membership.T.tocsr()
+
+    def __contains__(self, state):
+        return state in self._idx
+
+    def markets_of(self, state):
+        """{ISO: weight} for a state; its own-market remainder is reported as 'none'."""
+        if state not in self._idx:
+            raise ValueError(f'State {state} not found')
+        row = self.membership.getrow(self._idx[state])
+        return {('none' if self.markets[j].startswith(OWN_MARKET) else self.markets[j]): float(w)
+                for j, w in zip(row.indices, row.data)}
+
+    def market_states(self, state):
+        """Row indices of every state sharing an ISO with `state` (the state itself first)."""
+        i = self._idx[state]
+        cols = [j for j in self.membership.getrow(i).indices if not self.markets[j].startswith(OWN_MARKET)]
+        linked = set(self._membership_t[cols].indices) if cols else set()
+        return [i] + sorted(linked - {i})
+
+    def effective_share(self, dc, sales):
+        """Membership-weighted market data-center share per state, from per-state MWh vectors."""
+        market_dc = self._membership_t @ dc
+        market_sales = self._membership_t @ sales
+        with np.errstate(divide='ignore', invalid='ignore'):
+            market_share = np.where(market_sales > 0, market_dc / market_sales, 0.0)
+        return self.membership @ market_share, self.membership @ market_dc
+
+
+def iso_impacts(df, markets, beta, added, mode='assumption', include_in_sales=True,
+                share_floor=ASSUMPTION_SHARE_FLOOR, pass_through=PASS_THROUGH_ELEC):
+    """
+    Prices for every state with `added` MWh per state (vector in df row order),
+    the added load priced through each state's markets. Returns baseline, new
+    and no-addition predictions plus the new effective share, all per state.
+    """
+    dc = df['DC_Annual_Electricity_MWh'].to_numpy(dtype=float)
+    sales = df['TotalRetailSales_MWh'].to_numpy(dtype=float)
+    gen_twh = df['NetGeneration_MWh'].to_numpy(dtype=float) / 1e6
+    cap_gw = df['NetSummerCapacity_MW'].to_numpy(dtype=float) / 1000.0
+
+    if mode == 'trained':
+        base = predict(build_features(df)[0], beta)
+    else:
+        base = predict(build_features_baseline(df)[0], beta)
+
+    def priced(extra):
+        sales_new = sales + (extra if include_in_sales else 0.0)
+        share, market_dc = markets.effective_share(dc + extra, sales_new)
+        if mode == 'trained':
+            return (beta[0] + beta[1] * sales_new / 1e6 + beta[2] * gen_twh + beta[3] * cap_gw
+                    + beta[4] * share + beta[5] * (market_dc > 0)), share
+        return base * (1.0 + pass_through * np.maximum(share, share_floor)), share
+
+    new, share = priced(np.asarray(added, dtype=float))
+    without, _ = priced(np.zeros(len(df)))
+    return base, new, without, share
+
+
+def iso_what_if(df, markets, beta, state_code, added_power_mw=None, added_annual_mwh=None, pue=1.25,
+                include_added_load_in_sales=True, mode='assumption',
+                share_floor=ASSUMPTION_SHARE_FLOOR, pass_through=PASS_THROUGH_ELEC):
+    """what_if_added_dc with market spillover: one host state's load, impacts for every state in its markets."""
+    sc = state_code.upper()
+    if sc not in markets:
+        raise ValueError(f'State {state_code} not found')
+    if added_annual_mwh is None:
+        if added_power_mw is None:
+            raise ValueError('Provide either added_power_mw or added_annual_mwh')
+        added_annual_mwh = added_power_mw * 8760.0 * pue
+
+    added = np.zeros(len(df))
+    added[markets.states.index(sc)] = added_annual_mwh
+    base, new, without, share = iso_impacts(df, markets, beta, added, mode, include_added_load_in_sales,
+                                            share_floor, pass_through)
+    observed = df['AvgRetailPrice_cents_per_kWh'].to_numpy(dtype=float)
+    return {
+        'state': sc,
+        'mode': mode,
+        'added_annual_mwh': float(added_annual_mwh),
+        'markets': markets.markets_of(sc),
+        'impacts': [{
+            'state': markets.states[i],
+            'markets': markets.markets_of(markets.states[i]),
+            'observed_price_c_per_kWh': float(observed[i]),
+            'baseline_pred_c_per_kWh': float(base[i]),
+            'new_pred_c_per_kWh': float(new[i]),
+            'no_addition_pred_c_per_kWh': float(without[i]),
+            'delta_c_per_kWh': float(new[i] - without[i]),
+            'effective_share_new': float(share[i]),
+        } for i in markets.market_states(sc)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Electricity price impact of added load across the host's ISO markets")
+    parser.add_argument('--state', '-s', required=True, help='Host state code or name')
+    parser.add_argument('--mw', type=float, help='Added data center power in MW')
+    parser.add_argument('--mwh', type=float, help='Added data center annual MWh (overrides --mw)')
+    parser.add_argument('--mode', choices=['assumption', 'trained'], default='assumption')
+    args = parser.parse_args()
+    if args.mw is None and args.mwh is None:
+        parser.error('--mw or --mwh is required')
+
+    from gazetteer import from_state_table
+    from model import fit_ols, load_data
+
+    df = load_data()
+    try:
+        state = from_state_table(df).state_code(args.state)
+    except ValueError as e:
+        parser.error(str(e))
+    build = build_features if args.mode == 'trained' else build_features_baseline
+    beta = fit_ols(*build(df)[:2])
+    result = iso_what_if(df, MarketMap(df['StateCode']), beta, state,
+                         added_power_mw=args.mw, added_annual_mwh=args.mwh, mode=args.mode)
+
+    markets = ', '.join(f'{m} {w:.0%}' for m, w in result['markets'].items())
+    print(f"+{result['added_annual_mwh']:,.0f} MWh/yr in {state} ({markets}), {args.mode} mode\n")
+    print(f"  {'state':<6}{'markets':<28}{'no addition':>12}{'new':>10}{'delta':>10}")
+    for r in result['impacts']:
+        m = ', '.join(f'{k} {v:.0%}' for k, v in r['markets'].items())
+        print(f"  {r['state']:<6}{m:<28}{r['no_addition_pred_c_per_kWh']:>12.4f}"
+              f"{r['new_pred_c_per_kWh']:>10.4f}{r['delta_c_per_kWh']:>+10.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Lightweight in-process metrics for the API, exposed in Prometheus text format.
+
+Everything is kept in plain dicts guarded by one lock: recording a sample is a
+bisect plus a couple of integer increments, cheap enough to leave on in production.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+# Upper bounds in seconds; one extra +Inf bucket is implicit
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "fireforce_http_requests_total": ("counter", "HTTP requests by endpoint, method and status"),
+    "fireforce_http_errors_total": ("counter", "HTTP requests answered with a 5xx status"),
+    "fireforce_http_request_duration_seconds": ("histogram", "Wall time from request start to response"),
+    "fireforce_stage_duration_seconds": ("histogram", "Wall time of named stages inside a request"),
+    "fireforce_cache_requests_total": ("counter", "Cache lookups by cache name and result"),
+    "fireforce_cache_hit_ratio": ("gauge", "Cache hits over total lookups since start"),
+    "fireforce_admission_shed_total": ("counter", "Requests rejected by admission control, by reason and status"),
+    "fireforce_admission_wait_seconds": ("histogram", "Time admitted requests spent queued before starting"),
+}
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = Histogram()
+        hist.observe(value)
+
+
+def record_cache(cache, hit):
+    inc("fireforce_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def _endpoint():
+    if has_request_context():
+        return request.endpoint or "unmatched"
+    return "none"
+
+
+@contextmanager
+def span(stage):
+    """Time a named stage; the sample is labelled with the current Flask endpoint."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("fireforce_stage_duration_seconds", time.perf_counter() - start,
+                endpoint=_endpoint(), stage=stage)
+
+
+def init_app(app):
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("_metrics_start", None)
+        if start is None:
+            return response
+        endpoint = _endpoint()
+        observe("fireforce_http_request_duration_seconds", time.perf_counter() - start, endpoint=endpoint)
+        inc("fireforce_http_requests_total", endpoint=endpoint, method=request.method,
+            status=str(response.status_code))
+        if response.status_code >= 500:
+            inc("fireforce_http_errors_total", endpoint=endpoint)
+        return response
+
+
+def _fmt_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def _fmt_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Render every metric in the Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: (h.buckets, list(h.counts), h.sum, h.count) for k, h in _histograms.items()}
+
+    # Derived hit ratio per cache, so dashboards don't need a recording rule
+    caches = {}
+    for (name, labels), value in counters.items():
+        if name == "fireforce_cache_requests_total":
+            d = dict(labels)
+            hits, total = caches.get(d["cache"], (0, 0))
+            caches[d["cache"]] = (hits + (value if d["result"] == "hit" else 0), total + value)
+    gauges = {("fireforce_cache_hit_ratio", (("cache", c),)): hits / total
+              for c, (hits, total) in caches.items() if total}
+
+    by_name = {}
+    for (name, labels), value in list(counters.items()) + list(gauges.items()):
+        by_name.setdefault(name, []).append((labels, value))
+    for (name, labels), value in histograms.items():
+        by_name.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name in sorted(by_name):
+        kind, help_text = HELP.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(by_name[name]):
+            if kind != "histogram":
+                lines.append(f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+                continue
+            buckets, counts, total, count = value
+            cumulative = 0
+            for bound, n in zip(buckets, counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', repr(bound))])} {cumulative}")
+            lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {_fmt_value(total)}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
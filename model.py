@@ -4,6 +4,8 @@ import numpy as np
 import argparse
 from typing import Tuple
 
+from gazetteer import from_state_table
+
 
 def load_data(dc_csv="datacenter_regression_ready_with_state_context.csv",
               state_csv="State_energy_metrics.csv"):
@@ -107,6 +109,7 @@ def what_if_added_dc(
     mode: str = "assumption",  # 'assumption' or 'trained'
     # assumption-mode tuning
     share_floor: float = ASSUMPTION_SHARE_FLOOR,
+    pass_through: float = PASS_THROUGH_ELEC,
 ):
     sc = state_code.upper()
     row = df[df["StateCode"] == sc]
@@ -146,11 +149,11 @@ def what_if_added_dc(
         ])[None, :]
         new_pred = predict(X_new, beta).item()
     else:
-        # Assumption mode: price increases proportionally to DC share via PASS_THROUGH_ELEC
-        # Apply share floor so even large-sale states see a jump
+        # Assumption mode: price increases proportionally to DC share via pass_through
+        # (PASS_THROUGH_ELEC unless overridden). Apply share floor so even large-sale states see a jump
         effective_share = max(float(dc_share_new), float(share_floor))
-        # New price = baseline_structural * (1 + PASS_THROUGH_ELEC * effective_share)
-        new_pred = base_pred * (1.0 + PASS_THROUGH_ELEC * effective_share)
+        # New price = baseline_structural * (1 + pass_through * effective_share)
+        new_pred = base_pred * (1.0 + pass_through * effective_share)
 
     return {
         "state": sc,
@@ -167,7 +170,7 @@ def what_if_added_dc(
 
 def main():
     parser = argparse.ArgumentParser(description="State price model with what-if for added data center load")
-    parser.add_argument("--state", "-s", help="State code (e.g., TX, VA)")
+    parser.add_argument("--state", "-s", help="State code or name, typos allowed (e.g., TX, Virginia)")
     parser.add_argument("--mw", type=float, help="Added data center power in MW")
     parser.add_argument("--mwh", type=float, help="Added data center annual MWh (overrides --mw)")
     parser.add_argument("--mode", choices=["assumption", "trained"], default="assumption",
@@ -186,6 +189,11 @@ def main():
                 break
 
     df = load_data()
+    if args.state:
+        try:
+            args.state = from_state_table(df).state_code(args.state)
+        except ValueError as e:
+            parser.error(str(e))
 
     # Fit baseline (no DC vars) and full model
     Xb, y, names_b = build_features_baseline(df)
@@ -0,0 +1,222 @@
+"""
+NumPy-only model artifacts for serving without scikit-learn.
+
+Fitted housing models are exported to plain arrays so API workers only need
+NumPy to predict:
+
+  LinearModel  intercept, coefficients over the numeric features and an
+               offset per one-hot state (zero for unseen states)
+  NumpyForest  every tree's nodes flattened into shared feature / threshold /
+               left / right / value arrays; a whole batch descends all trees
+               at once, one vectorized step per level for the paths still
+               short of a leaf
+
+Training and the parity check still use scikit-learn:
+
+    python model_export.py            export the current housing forest artifact to .npz
+    python model_export.py --check    compare exported predictions against scikit-learn
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+
+class LinearModel:
+    def __init__(self, intercept, coef, states=(), state_offsets=()):
+        self.intercept = float(intercept)
+        self.coef = np.asarray(coef, dtype=float)
+        self.states = list(states)
+        self.state_offsets = np.asarray(state_offsets, dtype=float)
+        self._state_idx = {s: i for i, s in enumerate(self.states)}
+
+    def predict(self, X, states=None):
+        y = self.intercept + np.asarray(X, dtype=float) @ self.coef
+        if states is not None and self.states:
+            idx = np.array([self._state_idx.get(s, -1) for s in states])
+            y = y + np.where(idx >= 0, self.state_offsets[np.maximum(idx, 0)], 0.0)
+        return y
+
+    def to_arrays(self):
+        return {'intercept': np.array([self.intercept]), 'coef': self.coef,
+                'states': np.array(self.states, dtype=str), 'state_offsets': self.state_offsets}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['intercept'][0], arrays['coef'], arrays['states'].tolist(), arrays['state_offsets'])
+
+
+def fit_linear(X, y):
+    """Ordinary least squares with an intercept, fitted on centered data like LinearRegression."""
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if np.isnan(X).any():
+        raise ValueError("Input X contains NaN.")
+    if np.isnan(y).any():
+        raise ValueError("Input y contains NaN.")
+    x_mean, y_mean = X.mean(axis=0), y.mean()
+    coef = np.linalg.lstsq(X - x_mean, y - y_mean, rcond=None)[0]
+    return LinearModel(y_mean - x_mean @ coef, coef)
+
+
+def export_linear_pipeline(pipeline):
+    """Export a Pipeline(ColumnTransformer(OneHotEncoder(State), passthrough numeric), LinearRegression)."""
+    encoder = pipeline[0].named_transformers_[pipeline[0].transformers_[0][0]]
+    reg = pipeline[-1]
+    states = encoder.categories_[0].tolist()
+    return LinearModel(reg.intercept_, reg.coef_[len(states):], states, reg.coef_[:len(states)])
+
+
+class NumpyForest:
+    def __init__(self, feature, threshold, left, right, value, roots, depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+
+    def predict(self, X):
+        # Trees split on float32 inputs, as in scikit-learn
+        X = np.asarray(X, dtype=np.float32)
+        flat_x = X.astype(np.float64).ravel()
+        n_trees = len(self.roots)
+        # One (sample, tree) cursor per path; each step advances only the paths not yet at a leaf
+        node = np.tile(self.roots, len(X))
+        offset = np.repeat(np.arange(len(X)) * X.shape[1], n_trees)
+        active = np.flatnonzero(np.take(self.left, node) != node)
+        cur, offset = node[active], offset[active]
+        while active.size:
+            go_left = np.take(flat_x, offset + np.take(self.feature, cur)) <= np.take(self.threshold, cur)
+            nxt = np.where(go_left, np.take(self.left, cur), np.take(self.right, cur))
+            node[active] = nxt
+            keep = np.take(self.left, nxt) != nxt
+            active, cur, offset = active[keep], nxt[keep], offset[keep]
+        return self.value[node].reshape(len(X), n_trees).mean(axis=1)
+
+    def to_arrays(self):
+        return {'feature': self.feature, 'threshold': self.threshold, 'left': self.left, 'right': self.right,
+                'value': self.value, 'roots': self.roots, 'depth': np.array([self.depth])}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['feature'], arrays['threshold'], arrays['left'], arrays['right'],
+                   arrays['value'], arrays['roots'], arrays['depth'][0])
+
+
+def export_forest(forest):
+    """Flatten a fitted RandomForestRegressor (or any list of regression trees) into a NumpyForest."""
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset, depth = 0, 0
+    for est in forest.estimators_:
+        tree = est.tree_
+        n = tree.node_count
+        nodes = np.arange(n) + offset
+        leaf = tree.children_left == -1
+        # Leaves point at themselves, so extra traversal steps leave a finished path in place
+        lefts.append(np.where(leaf, nodes, tree.children_left + offset).astype(np.int32))
+        rights.append(np.where(leaf, nodes, tree.children_right + offset).astype(np.int32))
+        features.append(np.where(leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(np.where(leaf, np.inf, tree.threshold))
+        values.append(tree.value[:, 0, 0].astype(np.float64))
+        roots.append(offset)
+        offset += n
+        depth = max(depth, tree.max_depth)
+    return NumpyForest(np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+                       np.concatenate(rights), np.concatenate(values), np.array(roots, dtype=np.int32), depth)
+
+
+def save(path, model):
+    kind = 'forest' if isinstance(model, NumpyForest) else 'linear'
+    np.savez_compressed(path, kind=np.array([kind]), **model.to_arrays())
+
+
+def load(path):
+    with np.load(path, allow_pickle=False) as arrays:
+        arrays = dict(arrays)
+    kind = arrays.pop('kind')[0]
+    return NumpyForest.from_arrays(arrays) if kind == 'forest' else LinearModel.from_arrays(arrays)
+
+
+def _report(name, expected, actual, tol=1e-8):
+    diff = float(np.max(np.abs(np.asarray(expected) - np.asarray(actual)))) if len(expected) else 0.0
+    ok = diff <= tol * max(1.0, float(np.max(np.abs(expected))))
+    print(f"  {name:<36} max |diff| {diff:.3e}  {'OK' if ok else 'MISMATCH'}")
+    return ok
+
+
+def check():
+    """Parity of every NumPy export against scikit-learn on the housing data."""
+    import pandas as pd
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    import housing_forest
+
+    df = housing_forest.training_frame(pd.read_csv(housing_forest.TRAINING_DATA))
+    ok = True
+    print("Parity against scikit-learn:")
+
+    # Forest: the served artifact if one exists, else a freshly fitted one
+    schema_path = housing_forest.latest_schema_path()
+    if schema_path is not None:
+        import joblib
+        schema = housing_forest._read_json(schema_path)
+        rf = joblib.load(os.path.join(os.path.dirname(schema_path), schema['model_file']))
+    else:
+        schema = {'version': 'check', 'states': sorted(df['State'].unique()),
+                  'numeric_features': housing_forest.NUMERIC_FEATURES}
+        rf = None
+    forest = housing_forest.HousingForest(None, schema)
+    X = forest.features(df['State'].tolist(), df['Year'].values, df['Is_Post_Announcement'].values,
+                        df['Start_Home_Value'].values)
+    if rf is None:
+        rf = RandomForestRegressor(**housing_forest.DEFAULT_PARAMS).fit(X, df['HomeValue_Pct_Change'].values)
+    probe = np.vstack([X, X * np.array([1, 1, 1.07] + [1] * (X.shape[1] - 3))])  # off-sample values too
+    ok &= _report(f"forest ({len(rf.estimators_)} trees)", rf.predict(probe), export_forest(rf).predict(probe))
+
+    # OneHot(State) + LinearRegression pipeline
+    ct = ColumnTransformer([('state_enc', OneHotEncoder(handle_unknown='ignore'), ['State'])],
+                           remainder='passthrough')
+    pipe = Pipeline([('preprocess', ct), ('regressor', LinearRegression())])
+    frame = df[['State', 'Start_Home_Value']]
+    pipe.fit(frame, df['HomeValue_Pct_Change'])
+    lin = export_linear_pipeline(pipe)
+    ok &= _report("onehot + linear regression", pipe.predict(frame),
+                  lin.predict(frame[['Start_Home_Value']].values, frame['State'].tolist()))
+
+    # Per-state trend regression used by the advanced simulation
+    raw = pd.read_csv(housing_forest.TRAINING_DATA).dropna(subset=['Avg_Home_Value'])
+    expected, actual = [], []
+    for _, g in raw.groupby('State'):
+        Xs, ys = g[['Year', 'Is_Post_Announcement']].values, g['Avg_Home_Value'].values
+        expected.extend(LinearRegression().fit(Xs, ys).predict(Xs))
+        actual.extend(fit_linear(Xs, ys).predict(Xs))
+    ok &= _report("per-state trend regression", expected, actual)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export housing models to NumPy arrays and check parity")
+    parser.add_argument('--check', action='store_true', help='Compare NumPy predictions against scikit-learn')
+    parser.add_argument('schema', nargs='?', help='Forest artifact JSON to export (default: the newest)')
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check() else 1)
+
+    import housing_forest
+    path = housing_forest.export_artifact(args.schema)
+    if path is None:
+        print("No forest artifact to export; run: python housing_forest.py train")
+        sys.exit(1)
+    print(f"Exported {path}")
+
+
+if __name__ == '__main__':
+    main()
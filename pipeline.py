@@ -0,0 +1,365 @@
+"""
+Content-addressed runner for the data pipeline behind the API.
+
+The csv-generation scripts use paths relative to their own directory and used
+to be run by hand in order. Here every stage declares its working directory,
+command, input files and output files; dependencies follow from which stage
+produces which input. A stage is skipped when the content hashes of its inputs
+(its own script included) match the last successful run and its outputs are
+still the files that run wrote. A stage whose rerun reproduces identical
+outputs therefore does not invalidate anything downstream. Independent branches
+(ISO pricing, housing) run in parallel, and every run ends by building the
+app's model snapshot, which validates the served files.
+
+Source inputs are the files no stage produces. Among them is the housing panel
+csv-generation/house/processed_states_hyperscale.csv: it holds annual values
+for one city per state, taken from a Zillow city-level export that is not in
+the repo. process_house.py cannot rebuild it, because it melts the state-level
+states.csv into a monthly series. That merge runs as housing_merge, a leaf
+stage whose merged_hyperscale_zillow.csv nothing else reads. Updating the panel
+stays a manual step; once it is replaced, housing_clean rewrites
+processed_states_hyperscale_clean.csv, the file the forest and the snapshot
+read, and they rerun if it changed. The other house scripts
+(housing_prediction.py, test_prediction.py, clear_csv.py and predict_housing.py)
+fit or query models and print, write no files, and are not stages.
+
+    python pipeline.py                  run whatever is out of date
+    python pipeline.py --dry-run        show what would run
+    python pipeline.py housing_clean    run one stage and its upstream
+    python pipeline.py --force snapshot
+    python pipeline.py --list
+
+Run state (file hashes, stage fingerprints) and per-stage logs live in
+.pipeline/. File hashes are reused while a file's size and mtime are unchanged,
+so a no-op run only stats its inputs.
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(ROOT, '.pipeline')
+STATE_PATH = os.path.join(STATE_DIR, 'state.json')
+HOUSE = 'csv-generation/house'
+ISO_FILES = ['casio', 'ercot', 'isone', 'miso', 'pjm']
+
+
+def local_modules(entry):
+    """entry plus every repo-root module it imports, directly or transitively (paths relative to ROOT)."""
+    seen, todo = set(), [entry]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        with open(os.path.join(ROOT, path)) as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module = name.split('.')[0] + '.py'
+                if os.path.exists(os.path.join(ROOT, module)):
+                    todo.append(module)
+    return sorted(seen)
+
+
+# Paths are relative to the repo root; 'run' is executed from 'cwd' with the current interpreter.
+# A stage with a missing (non-optional) input is blocked and its existing outputs are kept.
+STAGES = {
+    'iso_summary': {
+        'cwd': 'csv-generation',
+        'run': ['process_all.py'],
+        'inputs': [f'csv-generation/real_location_pricing/{iso}.csv' for iso in ISO_FILES],
+        'outputs': ['csv-generation/all_isos_summary_statistics.csv'],
+    },
+    'synthetic_dataset': {
+        'cwd': 'csv-generation',
+        'run': ['data_generation.py'],
+        'inputs': ['csv-generation/all_isos_summary_statistics.csv'],
+        'outputs': ['csv-generation/final_dataset.csv'],
+    },
+    'housing_merge': {
+        'cwd': HOUSE,
+        'run': ['process_house.py'],
+        'inputs': [f'{HOUSE}/states.csv', f'{HOUSE}/hyperscales.csv'],
+        'outputs': [f'{HOUSE}/merged_hyperscale_zillow.csv'],
+    },
+    'housing_clean': {
+        'cwd': HOUSE,
+        'run': ['clean_housing.py'],
+        'inputs': [f'{HOUSE}/processed_states_hyperscale.csv', *local_modules(f'{HOUSE}/clean_housing.py')],
+        'outputs': [f'{HOUSE}/processed_states_hyperscale_clean.csv'],
+    },
+    'housing_forest': {
+        'cwd': '.',
+        'run': ['housing_forest.py', 'train'],
+        'inputs': [f'{HOUSE}/processed_states_hyperscale_clean.csv', *local_modules('housing_forest.py')],
+        'outputs': ['models'],
+    },
+    'snapshot': {
+        'cwd': '.',
+        'run': None,  # built in-process by build_served_snapshot()
+        'inputs': ['datacenter_regression_ready_with_state_context.csv', 'State_energy_metrics.csv',
+                   f'{HOUSE}/processed_states_hyperscale_clean.csv', f'{HOUSE}/states.csv', f'{HOUSE}/hyperscales.csv',
+                   'pricing_node_coordinates.csv', 'csv-generation/all_isos_summary_statistics.csv', 'models',
+                   *local_modules('snapshot.py')],
+        'optional': ['models'],
+        'outputs': [],
+        'after': 'all',
+    },
+}
+
+
+def _script(stage):
+    spec = STAGES[stage]
+    return os.path.normpath(os.path.join(spec['cwd'], spec['run'][0])) if spec['run'] else None
+
+
+def dependencies(stages=STAGES):
+    """stage -> set of upstream stages, from inputs produced by other stages (plus 'after': 'all')."""
+    producers = {out: name for name, spec in stages.items() for out in spec['outputs']}
+    deps = {}
+    for name, spec in stages.items():
+        if spec.get('after') == 'all':
+            deps[name] = set(stages) - {name}
+        else:
+            deps[name] = {producers[p] for p in spec['inputs'] if p in producers and producers[p] != name}
+    return deps
+
+
+def upstream_closure(targets, deps):
+    selected, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in selected:
+            selected.add(name)
+            todo.extend(deps[name])
+    return selected
+
+
+class FileHashes:
+    """Content hashes of files and directories, reused while size and mtime are unchanged."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def file(self, path):
+        full = os.path.join(ROOT, path)
+        st = os.stat(full)
+        cached = self.cache.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(full, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        digest = h.hexdigest()[:16]
+        self.cache[path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def __call__(self, path):
+        """Hash of a file, of every file under a directory, or None if the path does not exist."""
+        full = os.path.join(ROOT, path)
+        if os.path.isdir(full):
+            h = hashlib.sha256()
+            for dirpath, dirnames, filenames in os.walk(full):
+                dirnames.sort()
+                for fn in sorted(filenames):
+                    rel = os.path.relpath(os.path.join(dirpath, fn), ROOT)
+                    h.update(f'{os.path.relpath(rel, path)}:{self.file(rel)}\n'.encode())
+            return h.hexdigest()[:16]
+        if os.path.exists(full):
+            return self.file(path)
+        return None
+
+
+def fingerprint(stage, hashes):
+    """Hash of the stage's command, script and input contents; missing inputs hash as None."""
+    spec = STAGES[stage]
+    parts = {'run': spec['run'], 'inputs': {p: hashes(p) for p in spec['inputs']}}
+    if spec['run']:
+        parts['script'] = hashes(_script(stage))
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:16], parts['inputs']
+
+
+def _load_state():
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    return {'files': {}, 'stages': {}}
+
+
+def _save_state(state):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp = STATE_PATH + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, STATE_PATH)
+
+
+def plan_stage(stage, state, hashes, force=False):
+    """Return (action, reason, fingerprint): action is 'run', 'skip' or 'blocked'."""
+    fp, inputs = fingerprint(stage, hashes)
+    missing = [p for p, h in inputs.items() if h is None and p not in STAGES[stage].get('optional', ())]
+    outputs = {p: hashes(p) for p in STAGES[stage]['outputs']}
+    if missing:
+        reason = f"missing {missing[0]}" + (f" and {len(missing) - 1} more" if len(missing) > 1 else '')
+        if all(h is not None for h in outputs.values()):
+            reason += '; keeping existing outputs'
+        return 'blocked', reason, fp
+    if force:
+        return 'run', 'forced', fp
+    last = state['stages'].get(stage)
+    if last is None:
+        return 'run', 'never run', fp
+    if last['fingerprint'] != fp:
+        changed = [p for p, h in inputs.items() if last['inputs'].get(p) != h]
+        return 'run', f"changed {', '.join(changed)}" if changed else 'script changed', fp
+    if outputs != last['outputs']:
+        return 'run', 'outputs modified since last run', fp
+    return 'skip', 'up to date', fp
+
+
+def build_served_snapshot():
+    """Build the app's model snapshot from the current files; raises if validation fails."""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        import snapshot
+        snap = snapshot.build_snapshot()
+    finally:
+        os.chdir(cwd)
+    rows = {name: r['rows'] for name, r in snap.validation.items()}
+    return f"snapshot version {snap.version} (validated rows: {rows})"
+
+
+def execute(stage):
+    """Run one stage; returns (ok, seconds, summary line). Output goes to .pipeline/logs/<stage>.log."""
+    spec = STAGES[stage]
+    start = time.perf_counter()
+    os.makedirs(os.path.join(STATE_DIR, 'logs'), exist_ok=True)
+    log_path = os.path.join(STATE_DIR, 'logs', f'{stage}.log')
+    if spec['run'] is None:
+        try:
+            summary = build_served_snapshot()
+            ok = True
+        except Exception as e:
+            summary, ok = f"{type(e).__name__}: {e}", False
+        with open(log_path, 'w') as f:
+            f.write(summary + '\n')
+        return ok, time.perf_counter() - start, summary
+    with open(log_path, 'w') as log:
+        proc = subprocess.run([sys.executable] + spec['run'], cwd=os.path.join(ROOT, spec['cwd']),
+                              stdout=log, stderr=subprocess.STDOUT)
+    ok = proc.returncode == 0
+    summary = f"log: {os.path.relpath(log_path, ROOT)}" + ('' if ok else f" (exit {proc.returncode})")
+    return ok, time.perf_counter() - start, summary
+
+
+def run(targets=None, force=(), dry_run=False, jobs=None):
+    """Run the out-of-date stages needed for targets (default: all). Returns True if nothing failed."""
+    deps = dependencies()
+    selected = upstream_closure(targets or list(STAGES), deps)
+    order = [s for s in STAGES if s in selected]
+    state = _load_state()
+    hashes = FileHashes(state['files'])
+    force = set(force)
+
+    if dry_run:
+        reran = set()
+        for stage in order:
+            action, reason, _ = plan_stage(stage, state, hashes, stage in force)
+            if action == 'skip' and deps[stage] & reran:
+                action, reason = 'run', 'if upstream outputs change'
+            if action == 'run':
+                reran.add(stage)
+            print(f"  {action:<8} {stage:<18} {reason}")
+        return True
+
+    status = {}
+    start = time.perf_counter()
+    pending = list(order)
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        while pending or running:
+            for stage in list(pending):
+                if not (deps[stage] & selected) <= set(status):
+                    continue
+                pending.remove(stage)
+                if any(status.get(d) == 'failed' for d in deps[stage]):
+                    status[stage] = 'failed'
+                    print(f"  skipped  {stage:<18} upstream failed")
+                    continue
+                # Planned only once upstream finished, so it sees the outputs they just wrote
+                action, reason, fp = plan_stage(stage, state, hashes, stage in force)
+                if action != 'run':
+                    status[stage] = action
+                    print(f"  {action:<8} {stage:<18} {reason}")
+                    continue
+                print(f"  running  {stage:<18} {reason}")
+                running[pool.submit(execute, stage)] = (stage, fp)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, fp = running.pop(future)
+                ok, seconds, summary = future.result()
+                status[stage] = 'ran' if ok else 'failed'
+                print(f"  {'done' if ok else 'FAILED':<8} {stage:<18} {seconds:.1f}s, {summary}")
+                if ok:
+                    # Re-hash inputs too: a stage may not modify them, but record what it actually saw
+                    fp_after, inputs = fingerprint(stage, hashes)
+                    state['stages'][stage] = {
+                        'fingerprint': fp_after,
+                        'inputs': inputs,
+                        'outputs': {p: hashes(p) for p in STAGES[stage]['outputs']},
+                        'finished_at': time.time(),
+                        'seconds': round(seconds, 3),
+                    }
+                _save_state(state)
+    _save_state(state)
+
+    counts = {s: list(status.values()).count(s) for s in ('ran', 'skip', 'blocked', 'failed')}
+    print(f"\n{len(order)} stages in {time.perf_counter() - start:.1f}s: {counts['ran']} ran, "
+          f"{counts['skip']} up to date, {counts['blocked']} blocked, {counts['failed']} failed")
+    return counts['failed'] == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the out-of-date data pipeline stages")
+    parser.add_argument('stages', nargs='*', metavar='STAGE', help='Stages to bring up to date, with their upstream (default: all)')
+    parser.add_argument('--force', nargs='+', default=[], choices=list(STAGES), metavar='STAGE',
+                        help='Rerun these stages even if their inputs are unchanged')
+    parser.add_argument('--dry-run', '-n', action='store_true', help='Show what would run')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Stages run in parallel (default: CPU count)')
+    parser.add_argument('--list', action='store_true', help='List stages and their dependencies')
+    args = parser.parse_args()
+    unknown = [s for s in args.stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage {unknown[0]}; choose from {', '.join(STAGES)}")
+
+    if args.list:
+        deps = dependencies()
+        for name, spec in STAGES.items():
+            cmd = ' '.join(spec['run']) if spec['run'] else '(in-process snapshot build)'
+            after = ', '.join(sorted(deps[name])) or '-'
+            print(f"{name:<18} {spec['cwd']:<22} {cmd:<28} after: {after}")
+        return
+    sys.exit(0 if run(args.stages, args.force, args.dry_run, args.jobs) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""
+Time-phased, multi-site data-center portfolio scenarios.
+
+A portfolio lists sites, each with a state, IT load (MW), PUE, commissioning
+year and ramp schedule (fraction of full load in each year from
+commissioning, the last value held). Site loads are laid out as a
+site x year array and summed into a state x year array with one bincount.
+Both electricity model modes are then evaluated on whole arrays with the same
+formulas as model.what_if_added_dc, so each (state, year) cell equals a
+what_if_added_dc call with that state's cumulative added load.
+
+Spec (JSON):
+
+    {"start_year": 2025, "end_year": 2039, "include_in_sales": true,
+     "sites": [{"name": "Abilene 1", "state": "TX", "mw": 300, "pue": 1.2,
+                "commission_year": 2027, "ramp": [0.25, 0.6, 1.0]}, ...]}
+
+    python portfolio.py portfolio.json [--mode assumption|trained|both] [--json]
+    python portfolio.py --demo-sites 100 --years 15     time a random portfolio
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from model import ASSUMPTION_SHARE_FLOOR, PASS_THROUGH_ELEC, build_features, build_features_baseline, predict
+
+MODES = ('assumption', 'trained')
+DEFAULT_PUE = 1.25
+HOURS_PER_YEAR = 8760.0
+MAX_SITES = 5000
+MAX_YEARS = 50
+
+
+def parse_spec(spec, resolve_state=str.upper):
+    """Validate a portfolio spec into site arrays; raises ValueError with a message for the caller."""
+    if not isinstance(spec, dict):
+        raise ValueError('portfolio must be a JSON object')
+    sites = spec.get('sites')
+    if not isinstance(sites, list) or not sites:
+        raise ValueError('sites must be a non-empty list')
+    if len(sites) > MAX_SITES:
+        raise ValueError(f'at most {MAX_SITES} sites per portfolio')
+
+    commission = []
+    for i, site in enumerate(sites):
+        if not isinstance(site, dict) or 'state' not in site or 'mw' not in site:
+            raise ValueError(f'site {i}: state and mw are required')
+        commission.append(int(site.get('commission_year', spec.get('start_year', 2025))))
+    start_year = int(spec.get('start_year', min(commission)))
+    end_year = int(spec.get('end_year', start_year + 14))
+    if not 0 <= end_year - start_year < MAX_YEARS:
+        raise ValueError(f'end_year must be within {MAX_YEARS} years after start_year')
+
+    ramps = [site.get('ramp') or [1.0] for site in sites]
+    for i, r in enumerate(ramps):
+        if not isinstance(r, (list, tuple)):
+            raise ValueError(f'site {i}: ramp must be a list of fractions')
+    width = max(len(r) for r in ramps)
+    ramp = np.ones((len(sites), width))
+    for i, r in enumerate(ramps):
+        if not all(isinstance(x, (int, float)) and np.isfinite(x) and 0 <= x <= 1 for x in r):
+            raise ValueError(f'site {i}: ramp must be fractions between 0 and 1')
+        ramp[i, :len(r)] = r
+        ramp[i, len(r):] = r[-1]
+
+    mw = np.array([float(site['mw']) for site in sites])
+    pue = np.array([float(site.get('pue', DEFAULT_PUE)) for site in sites])
+    # Comparisons are False for NaN, so check finiteness first ("nan" parses as a float)
+    if not (np.isfinite(mw).all() and np.isfinite(pue).all()):
+        raise ValueError('mw and pue must be finite numbers')
+    if (mw < 0).any() or (pue < 1).any():
+        raise ValueError('mw must be non-negative and pue at least 1')
+    return {
+        'names': [site.get('name', f'site-{i}') for i, site in enumerate(sites)],
+        'states': [resolve_state(str(site['state'])) for site in sites],
+        'mw': mw,
+        'pue': pue,
+        'commission_year': np.array(commission),
+        'ramp': ramp,
+        'years': np.arange(start_year, end_year + 1),
+        'include_in_sales': bool(spec.get('include_in_sales', True)),
+    }
+
+
+def site_loads(sites):
+    """Annual MWh per site and year (sites x years)."""
+    k = sites['years'][None, :] - sites['commission_year'][:, None]
+    frac = np.take_along_axis(sites['ramp'], np.clip(k, 0, sites['ramp'].shape[1] - 1), axis=1)
+    full = sites['mw'] * HOURS_PER_YEAR * sites['pue']
+    return np.where(k >= 0, frac, 0.0) * full[:, None]
+
+
+def state_loads(sites, state_codes):
+    """Added MWh per state and year (len(state_codes) x years), one grouped sum over all sites."""
+    index = {s: i for i, s in enumerate(state_codes)}
+    unknown = [s for s in sites['states'] if s not in index]
+    if unknown:
+        raise ValueError(f'State {unknown[0]} not found')
+    rows = np.array([index[s] for s in sites['states']])
+    loads = site_loads(sites)
+    n_years = loads.shape[1]
+    flat = (rows[:, None] * n_years + np.arange(n_years)).ravel()
+    return np.bincount(flat, weights=loads.ravel(), minlength=len(state_codes) * n_years).reshape(-1, n_years)
+
+
+def evaluate(df, added, mode, beta, include_in_sales=True, share_floor=ASSUMPTION_SHARE_FLOOR,
+             pass_through=PASS_THROUGH_ELEC):
+    """
+    Prices for every state and year given added MWh (states x years), with the
+    formulas of what_if_added_dc. Returns baseline (per state), new and
+    no-portfolio (the same model with nothing added) arrays in c/kWh.
+    """
+    dc = df['DC_Annual_Electricity_MWh'].to_numpy(dtype=float)[:, None]
+    sales = df['TotalRetailSales_MWh'].to_numpy(dtype=float)[:, None]
+    gen_twh = df['NetGeneration_MWh'].to_numpy(dtype=float)[:, None] / 1e6
+    cap_gw = df['NetSummerCapacity_MW'].to_numpy(dtype=float)[:, None] / 1000.0
+
+    def priced(extra):
+        dc_new = dc + extra
+        sales_new = sales + (extra if include_in_sales else 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            share = np.where(sales_new == 0, 0.0, dc_new / sales_new)
+        if mode == 'trained':
+            return (beta[0] + beta[1] * sales_new / 1e6 + beta[2] * gen_twh + beta[3] * cap_gw
+                    + beta[4] * share + beta[5] * (dc_new > 0)), share
+        return base[:, None] * (1.0 + pass_through * np.maximum(share, share_floor)), share
+
+    if mode == 'trained':
+        base = predict(build_features(df)[0], beta)
+    else:
+        base = predict(build_features_baseline(df)[0], beta)
+    new, share = priced(added)
+    without, _ = priced(np.zeros_like(added))
+    return base, new, without, share
+
+
+def simulate(df, betas, sites, modes=MODES, share_floor=ASSUMPTION_SHARE_FLOOR, pass_through=PASS_THROUGH_ELEC):
+    """
+    Year-by-year trajectories for every state the portfolio touches.
+    betas maps mode -> coefficients (baseline model for 'assumption', full for 'trained').
+    """
+    start = time.perf_counter()
+    codes = df['StateCode'].tolist()
+    added = state_loads(sites, codes)
+    affected = np.flatnonzero(added.any(axis=1) | np.isin(codes, sites['states']))
+    years = sites['years'].tolist()
+    observed = df['AvgRetailPrice_cents_per_kWh'].to_numpy(dtype=float)
+
+    results = {}
+    for mode in modes:
+        base, new, without, share = evaluate(df, added, mode, betas[mode], sites['include_in_sales'],
+                                             share_floor, pass_through)
+        results[mode] = (base, new, without, share)
+
+    states = []
+    for i in affected:
+        entry = {
+            'state': codes[i],
+            'observed_price_c_per_kWh': float(observed[i]),
+            'sites': sum(s == codes[i] for s in sites['states']),
+            'added_annual_mwh': added[i].tolist(),
+        }
+        for mode, (base, new, without, share) in results.items():
+            entry[mode] = {
+                'baseline_pred_c_per_kWh': float(base[i]),
+                'new_pred_c_per_kWh': new[i].tolist(),
+                'no_portfolio_pred_c_per_kWh': without[i].tolist(),
+                'delta_c_per_kWh': (new[i] - base[i]).tolist(),
+                # Change caused by the portfolio alone; the share floor can make this zero in assumption mode
+                'portfolio_delta_c_per_kWh': (new[i] - without[i]).tolist(),
+                'dc_share_new': share[i].tolist(),
+            }
+        states.append(entry)
+
+    return {
+        'years': years,
+        'site_count': len(sites['names']),
+        'total_added_annual_mwh': added.sum(axis=0).tolist(),
+        'states': states,
+        'compute_ms': (time.perf_counter() - start) * 1000,
+    }
+
+
+def demo_spec(n_sites, n_years, state_codes, seed=0):
+    """A random portfolio for timing: sites spread over states, commissioning and ramping over the horizon."""
+    rng = np.random.default_rng(seed)
+    start = 2025
+    return {
+        'start_year': start,
+        'end_year': start + n_years - 1,
+        'sites': [{
+            'name': f'site-{i}',
+            'state': str(rng.choice(state_codes)),
+            'mw': float(rng.choice([50, 100, 200, 300, 500, 1000])),
+            'pue': float(rng.uniform(1.1, 1.5)),
+            'commission_year': int(start + rng.integers(0, n_years)),
+            'ramp': [0.25, 0.5, 0.75, 1.0][:int(rng.integers(1, 5))],
+        } for i in range(n_sites)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a multi-site, time-phased data-center portfolio")
+    parser.add_argument('spec', nargs='?', help='Portfolio JSON file')
+    parser.add_argument('--mode', choices=MODES + ('both',), default='both', help='Electricity model mode')
+    parser.add_argument('--json', action='store_true', help='Print the full result as JSON')
+    parser.add_argument('--demo-sites', type=int, help='Simulate a random portfolio with this many sites')
+    parser.add_argument('--years', type=int, default=15, help='Horizon for --demo-sites')
+    args = parser.parse_args()
+
+    from gazetteer import from_state_table
+    from model import fit_ols, load_data
+
+    df = load_data()
+    betas = {'assumption': fit_ols(*build_features_baseline(df)[:2]), 'trained': fit_ols(*build_features(df)[:2])}
+    if args.demo_sites:
+        spec = demo_spec(args.demo_sites, args.years, df['StateCode'].tolist())
+    elif args.spec:
+        with open(args.spec) as f:
+            spec = json.load(f)
+    else:
+        parser.error('a portfolio spec file or --demo-sites is required')
+
+    gazetteer = from_state_table(df)
+    try:
+        sites = parse_spec(spec, gazetteer.state_code)
+    except (ValueError, TypeError) as e:
+        parser.error(str(e))
+    modes = MODES if args.mode == 'both' else (args.mode,)
+    result = simulate(df, betas, sites, modes)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    years = result['years']
+    print(f"{result['site_count']} sites, {years[0]}-{years[-1]}, {len(result['states'])} states "
+          f"in {result['compute_ms']:.2f} ms")
+    for mode in modes:
+        print(f"\n{mode}: price change vs. no portfolio (c/kWh), first / middle / last year")
+        mid = len(years) // 2
+        for entry in result['states']:
+            d = entry[mode]['portfolio_delta_c_per_kWh']
+            print(f"  {entry['state']}  {entry['sites']:>3} sites  {d[0]:+8.4f} {d[mid]:+8.4f} {d[-1]:+8.4f}   "
+                  f"final {entry[mode]['new_pred_c_per_kWh'][-1]:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+Opt-in request and script profiling.
+
+API requests are profiled when FIREFORCE_PROFILE=1 (optionally 1-in-N with
+FIREFORCE_PROFILE_SAMPLE=N), or per request when the X-Fireforce-Profile header
+matches FIREFORCE_PROFILE_TOKEN. Scripts are profiled through the CLI:
+
+    python profiling.py model.py --TX --mw 200
+    python profiling.py --format speedscope csv-generation/process_all.py
+
+Each run writes a profile (pstats .prof or speedscope .speedscope.json) plus a
+.meta.json sidecar with the endpoint/script name, params and duration to
+FIREFORCE_PROFILE_DIR (default: profiles/).
+"""
+import argparse
+import cProfile
+import hmac
+import itertools
+import json
+import os
+import re
+import runpy
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+PROFILE_HEADER = "X-Fireforce-Profile"
+FORMATS = ("pstats", "speedscope")
+
+
+def _config():
+    return {
+        "enabled": os.environ.get("FIREFORCE_PROFILE", "0").lower() in ("1", "true", "yes"),
+        "token": os.environ.get("FIREFORCE_PROFILE_TOKEN"),
+        "sample": max(1, int(os.environ.get("FIREFORCE_PROFILE_SAMPLE", "1"))),
+        "dir": os.environ.get("FIREFORCE_PROFILE_DIR", "profiles"),
+        "format": os.environ.get("FIREFORCE_PROFILE_FORMAT", "pstats"),
+    }
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack on a timer and writes speedscope's sampled format."""
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._target = None
+
+    def enable(self):
+        self._target = threading.get_ident()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def disable(self):
+        self._stop.set()
+        self._thread.join()
+        self._elapsed = time.perf_counter() - self._started
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.samples.append(stack[::-1])
+
+    def dump(self, path, name):
+        frames, index = [], {}
+        samples = []
+        for stack in self.samples:
+            ids = []
+            for key in stack:
+                if key not in index:
+                    index[key] = len(frames)
+                    frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                ids.append(index[key])
+            samples.append(ids)
+        weight = self._elapsed / len(samples) if samples else 0.0
+        doc = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "exporter": "fireforce-profiling",
+            "name": name,
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self._elapsed,
+                "samples": samples,
+                "weights": [weight] * len(samples),
+            }],
+        }
+        with open(path, "w") as f:
+            json.dump(doc, f)
+
+
+def _new_profiler(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown profile format {fmt!r}; expected one of {FORMATS}")
+    return SamplingProfiler() if fmt == "speedscope" else cProfile.Profile()
+
+
+def _write(profiler, fmt, out_dir, name, meta):
+    os.makedirs(out_dir, exist_ok=True)
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "profile"
+    # The timestamp is per second, so concurrent requests need the random suffix to keep their files apart
+    stem = os.path.join(out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{safe}_{meta['duration_ms']:.0f}ms_{uuid.uuid4().hex[:8]}")
+    if fmt == "speedscope":
+        path = stem + ".speedscope.json"
+        profiler.dump(path, name)
+    else:
+        path = stem + ".prof"
+        profiler.dump_stats(path)
+    with open(stem + ".meta.json", "w") as f:
+        json.dump(dict(meta, name=name, profile=os.path.basename(path), format=fmt), f, indent=2, default=str)
+    return path
+
+
+@contextmanager
+def profile_run(name, params=None, fmt=None, out_dir=None):
+    """Profile the enclosed block and write the result like a profiled request."""
+    cfg = _config()
+    fmt = fmt or cfg["format"]
+    profiler = _new_profiler(fmt)
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        duration_ms = (time.perf_counter() - start) * 1000
+        path = _write(profiler, fmt, out_dir or cfg["dir"], name,
+                      {"params": params or {}, "duration_ms": duration_ms})
+        print(f"Profile written to {path}", file=sys.stderr)
+
+
+def init_app(app):
+    from flask import g, request
+
+    cfg = _config()
+    counter = itertools.count()
+
+    def _wanted():
+        token = request.headers.get(PROFILE_HEADER)
+        if token is not None and cfg["token"]:
+            # Header-triggered profiling is admin-only: it must carry the configured token
+            return hmac.compare_digest(token, cfg["token"])
+        return cfg["enabled"] and next(counter) % cfg["sample"] == 0
+
+    @app.before_request
+    def _start_profile():
+        if not _wanted():
+            return
+        g._profiler = _new_profiler(cfg["format"])
+        g._profile_start = time.perf_counter()
+        g._profiler.enable()
+
+    @app.teardown_request
+    def _stop_profile(exc):
+        profiler = g.pop("_profiler", None)
+        if profiler is None:
+            return
+        profiler.disable()
+        params = request.args.to_dict()
+        body = request.get_json(silent=True) if request.is_json else None
+        if isinstance(body, dict):
+            params.update(body)
+        meta = {
+            "endpoint": request.endpoint,
+            "method": request.method,
+            "path": request.path,
+            "params": params,
+            "duration_ms": (time.perf_counter() - g.pop("_profile_start")) * 1000,
+            "error": repr(exc) if exc else None,
+        }
+        try:
+            _write(profiler, cfg["format"], cfg["dir"], request.endpoint or request.path, meta)
+        except OSError as e:
+            app.logger.warning(f"Could not write profile: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Profile a script (model.py, csv-generation/*.py) the same way API requests are profiled")
+    parser.add_argument("--format", choices=FORMATS, help="Profile format (default: FIREFORCE_PROFILE_FORMAT or pstats)")
+    parser.add_argument("--out", help="Output directory (default: FIREFORCE_PROFILE_DIR or profiles/)")
+    parser.add_argument("script", help="Path of the script to run")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments passed to the script")
+    args = parser.parse_args()
+
+    script = os.path.abspath(args.script)
+    out_dir = os.path.abspath(args.out or _config()["dir"])
+    # The pipeline scripts read their inputs relative to their own directory
+    os.chdir(os.path.dirname(script))
+    sys.path.insert(0, os.path.dirname(script))
+    sys.argv = [script] + args.args
+    with profile_run(os.path.basename(script), {"argv": args.args}, fmt=args.format, out_dir=out_dir):
+        runpy.run_path(script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
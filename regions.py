@@ -0,0 +1,149 @@
+"""
+Hierarchical housing region index: state -> metro -> county -> city.
+
+Built once per model snapshot from df_housing. Growth rates are precomputed at
+every level with grouped aggregations, and a region with too few observations
+inherits its parent's rates, up to a national root. Name search runs on a
+sorted array with bisect, so lookups stay O(log n) as the region count grows.
+"""
+import bisect
+
+import pandas as pd
+
+LEVELS = ('state', 'metro', 'county', 'city')
+MIN_REGION_OBS = 3  # yearly observations a sub-state region needs before it gets its own rates
+DEFAULT_NORMAL_GROWTH = 0.03
+DEFAULT_HYPERSCALE_EFFECT = 0.20
+
+
+def _text(df, col):
+    # Categorical columns (housing_data) cannot take '' as a fill value until they are plain strings
+    return df[col].astype(object).fillna('').astype(str) if col in df else pd.Series('', index=df.index)
+
+
+def _region_keys(df):
+    state = df['State'].astype(str)
+    metro = _text(df, 'Metro')
+    county = _text(df, 'CountyName')
+    city = _text(df, 'RegionName')
+    return {
+        'state': state,
+        'metro': metro,
+        'county': (county + ', ' + state).where(county != '', ''),
+        'city': (city + ', ' + state).where(city != '', ''),
+    }
+
+
+class RegionIndex:
+    def __init__(self, df, min_obs=MIN_REGION_OBS, state_effects=None, pooled_effect=None):
+        """
+        state_effects / pooled_effect (fractions) replace the within-state
+        post-minus-pre hyperscale estimate with externally estimated effects
+        (event_study.py): states without their own estimate and every
+        sub-state region take their state's, or the pooled, effect.
+        """
+        keys = _region_keys(df)
+        pct = df['HomeValue_Pct_Change'].astype(float)
+        post = df['Is_Post_Announcement'].astype(int)
+
+        # National root: the same fallbacks the state-level model has always used
+        non_post_all = pct[post == 0]
+        post_all = pct[post == 1]
+        root_normal = non_post_all.mean() / 100 if non_post_all.notna().any() else DEFAULT_NORMAL_GROWTH
+        root_hyper = post_all.mean() / 100 if post_all.notna().any() else DEFAULT_HYPERSCALE_EFFECT
+        if pooled_effect is not None:
+            root_hyper = max(pooled_effect, 0)
+        self.root = {'level': 'national', 'key': 'US', 'normal_growth': root_normal,
+                     'hyperscale_effect': root_hyper, 'observations': int(pct.notna().sum())}
+
+        frame = pd.DataFrame({'pct': pct, 'post': post, **{lvl: keys[lvl] for lvl in LEVELS}})
+        frame['pct_non_post'] = frame['pct'].where(frame['post'] == 0)
+        frame['pct_post'] = frame['pct'].where(frame['post'] == 1)
+
+        self.regions = {lvl: {} for lvl in LEVELS}
+        for depth, lvl in enumerate(LEVELS):
+            sub = frame[frame[lvl] != '']
+            stats = sub.groupby(lvl, sort=False).agg(
+                normal_mean=('pct_non_post', 'mean'),
+                normal_n=('pct_non_post', 'count'),
+                post_mean=('pct_post', 'mean'),
+                post_n=('pct_post', 'count'),
+                rows=('pct', 'size'),
+            )
+            # Each region's parent is its most common key one level up
+            parents = (sub.groupby(lvl, sort=False)[LEVELS[depth - 1]].agg(lambda s: s.mode().iat[0])
+                       if depth else None)
+            need = 1 if lvl == 'state' else min_obs
+            for key, row in stats.iterrows():
+                parent = self.regions[LEVELS[depth - 1]].get(parents[key]) if depth else None
+                parent = parent or self.root
+                own_normal = row.normal_n >= need
+                normal = row.normal_mean / 100 if own_normal else parent['normal_growth']
+                if state_effects is not None:
+                    hyper = max(state_effects[key], 0) if depth == 0 and key in state_effects \
+                        else parent['hyperscale_effect']
+                elif row.post_n >= need:
+                    hyper = max(row.post_mean / 100 - normal, 0)
+                else:
+                    hyper = parent['hyperscale_effect']
+                self.regions[lvl][key] = {
+                    'level': lvl,
+                    'key': key,
+                    'state': key if lvl == 'state' else parent.get('state'),
+                    'parent': parent['key'] if parent is not self.root else None,
+                    'parent_level': parent['level'] if parent is not self.root else None,
+                    'normal_growth': float(normal),
+                    'hyperscale_effect': float(hyper),
+                    'observations': int(row.normal_n + row.post_n),
+                    'rows': int(row.rows),
+                    'rates_from': lvl if own_normal else parent.get('rates_from', parent['level']),
+                }
+
+        # Sorted (lowercased name, level, key) array for prefix search
+        entries = sorted({(key.lower(), lvl, key) for lvl in LEVELS for key in self.regions[lvl]})
+        self._entries = entries
+
+    def __contains__(self, item):
+        level, key = item
+        return key in self.regions.get(level, {})
+
+    def get(self, level, key):
+        if level not in self.regions:
+            raise ValueError(f"Unknown region level: {level} (expected one of {', '.join(LEVELS)})")
+        region = self.regions[level].get(key)
+        if region is None:
+            raise ValueError(f"No data found for {level}: {key}")
+        return region
+
+    def growth_rates(self, level, key):
+        region = self.get(level, key)
+        return region['normal_growth'], region['hyperscale_effect']
+
+    def resolve(self, name, level=None):
+        """Find a region by exact (case-insensitive) name, preferring the given or the finest level."""
+        if level and level not in self.regions:
+            raise ValueError(f"Unknown region level: {level} (expected one of {', '.join(LEVELS)})")
+        needle = name.strip().lower()
+        i = bisect.bisect_left(self._entries, (needle,))
+        matches = []
+        while i < len(self._entries) and self._entries[i][0] == needle:
+            matches.append(self._entries[i])
+            i += 1
+        if level:
+            matches = [m for m in matches if m[1] == level]
+        if not matches:
+            raise ValueError(f"No data found for region: {name}")
+        best = max(matches, key=lambda m: LEVELS.index(m[1]))
+        return self.regions[best[1]][best[2]]
+
+    def search(self, prefix, limit=10, level=None):
+        """Autocomplete: regions whose name starts with prefix, in name order."""
+        needle = prefix.strip().lower()
+        i = bisect.bisect_left(self._entries, (needle,))
+        results = []
+        while i < len(self._entries) and self._entries[i][0].startswith(needle) and len(results) < limit:
+            _, lvl, key = self._entries[i]
+            if level is None or lvl == level:
+                results.append({'level': lvl, 'key': key, 'observations': self.regions[lvl][key]['observations']})
+            i += 1
+        return results
@@ -0,0 +1,338 @@
+"""
+Immutable model snapshots, a versioned registry of them, and zero-downtime reloading.
+
+Everything the API serves from (datasets, fitted coefficients, model
+parameters, per-state memoized results) lives on one ModelSnapshot. The
+registry keeps several named snapshots side by side so requests can pick one
+with `model_version`; the latest is the default. Versions built from identical
+input files share the same loaded frames and fitted coefficients, and cold
+versions are evicted LRU.
+
+Reloads build a complete new snapshot in a background thread and then swap a
+single reference, so in-flight requests keep the snapshot they started with
+and no request ever waits on loading.
+"""
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+import housing_forest
+import http_cache
+from event_study import ANNOUNCEMENTS_PATH, EventStudy
+from forecast import SERIES_PATH, StateForecast
+from housing_data import HousingTable
+from housing_forest import HousingForest
+from gazetteer import Gazetteer, from_state_table
+from markets import MarketMap
+from regions import RegionIndex
+from validation import HOUSING_SCHEMA, STATE_SCHEMA, require_valid
+from spatial import ISO_SUMMARY_PATH, NODE_COORDS_PATH, build_pricing_node_index, load_zip_centroids
+from model import (
+    load_data,
+    build_features,
+    build_features_baseline,
+    fit_ols,
+    PASS_THROUGH_ELEC,
+    ASSUMPTION_SHARE_FLOOR
+)
+
+HOUSING_PATH = 'csv-generation/house/processed_states_hyperscale_clean.csv'
+ELECTRICITY_PATHS = ['datacenter_regression_ready_with_state_context.csv', 'State_energy_metrics.csv']
+INPUT_PATHS = ELECTRICITY_PATHS + [HOUSING_PATH, SERIES_PATH, ANNOUNCEMENTS_PATH, NODE_COORDS_PATH, ISO_SUMMARY_PATH]
+
+DEFAULT_SPEC = {
+    'dc_csv': ELECTRICITY_PATHS[0],
+    'state_csv': ELECTRICITY_PATHS[1],
+    'housing_csv': HOUSING_PATH,
+    'housing_series_csv': SERIES_PATH,
+    'announcements_csv': ANNOUNCEMENTS_PATH,
+    'node_coords_csv': NODE_COORDS_PATH,
+    'iso_summary_csv': ISO_SUMMARY_PATH,
+    'pass_through': PASS_THROUGH_ELEC,
+    'share_floor': ASSUMPTION_SHARE_FLOOR,
+}
+MAX_VERSIONS = int(os.environ.get('FIREFORCE_MAX_MODEL_VERSIONS', '4'))
+
+# Loaded inputs keyed by file content hash; entries disappear once no snapshot uses them
+_shared = weakref.WeakValueDictionary()
+_shared_lock = threading.Lock()
+
+
+@dataclass(frozen=True, eq=False)
+class ElectricityFit:
+    df: pd.DataFrame
+    beta_b: object
+    beta_f: object
+    names_b: list
+    names_f: list
+
+
+@dataclass(frozen=True, eq=False)
+class ModelSnapshot:
+    name: str
+    version: str
+    loaded_at: float
+    spec: dict
+    electricity: ElectricityFit
+    # Held here (not just its frame) so versions built from the same file share one load
+    housing: HousingTable = None
+    pricing_nodes: object = None
+    zip_centroids: dict = None
+    regions: RegionIndex = None
+    gazetteer: Gazetteer = None
+    housing_forest: HousingForest = None
+    housing_forecast: StateForecast = None
+    event_study: EventStudy = None
+    markets: MarketMap = None
+    # Ingest-time validation reports
+    validation: dict = field(default_factory=dict)
+    # Memoized per-state results; pure functions of the fields above
+    electricity_cache: dict = field(default_factory=dict)
+
+    @property
+    def df_electricity(self):
+        return self.electricity.df
+
+    @property
+    def df_housing(self):
+        return self.housing.df if self.housing is not None else None
+
+    @property
+    def housing_states(self):
+        return self.housing.state_set if self.housing is not None else frozenset()
+
+    @property
+    def housing_state_rows(self):
+        """State -> contiguous row slice of df_housing."""
+        return self.housing.state_rows if self.housing is not None else {}
+
+    @property
+    def housing_memory(self):
+        return self.housing.memory if self.housing is not None else None
+
+    @property
+    def beta_b(self):
+        return self.electricity.beta_b
+
+    @property
+    def beta_f(self):
+        return self.electricity.beta_f
+
+    @property
+    def names_b(self):
+        return self.electricity.names_b
+
+    @property
+    def names_f(self):
+        return self.electricity.names_f
+
+    @property
+    def pass_through(self):
+        return self.spec['pass_through']
+
+    @property
+    def share_floor(self):
+        return self.spec['share_floor']
+
+
+def _shared_input(key, loader):
+    with _shared_lock:
+        obj = _shared.get(key)
+    if obj is None:
+        obj = loader()
+        if obj is None:
+            return None
+        with _shared_lock:
+            # Another build may have loaded the same files meanwhile; keep the first
+            obj = _shared.setdefault(key, obj)
+    return obj
+
+
+def _fit_electricity(dc_csv, state_csv):
+    df = load_data(dc_csv, state_csv)
+    Xb, y, names_b = build_features_baseline(df)
+    Xf, _, names_f = build_features(df)
+    return ElectricityFit(df, fit_ols(Xb, y), fit_ols(Xf, y), names_b, names_f)
+
+
+def build_snapshot(spec=None, name=None):
+    spec = dict(DEFAULT_SPEC, **(spec or {}))
+    input_keys = ('dc_csv', 'state_csv', 'housing_csv', 'housing_series_csv', 'announcements_csv',
+                  'node_coords_csv', 'iso_summary_csv')
+    digests = {k: http_cache.compute_dataset_version([spec[k]]) for k in input_keys}
+
+    electricity = _shared_input(
+        ('electricity', digests['dc_csv'], digests['state_csv']),
+        lambda: _fit_electricity(spec['dc_csv'], spec['state_csv'])
+    )
+
+    validation = {'state': require_valid(electricity.df, STATE_SCHEMA, spec['state_csv'])}
+    markets = _shared_input(('markets', digests['state_csv']), lambda: MarketMap(electricity.df['StateCode']))
+
+    # Hyperscale effects from the event study over the monthly state series, when both files exist
+    name_to_code = dict(zip(electricity.df['State'], electricity.df['StateCode'].str.upper()))
+    study = None
+    study_key = (digests['housing_series_csv'], digests['announcements_csv'], digests['state_csv'])
+    if os.path.exists(spec['housing_series_csv']) and os.path.exists(spec['announcements_csv']):
+        study = _shared_input(
+            ('event_study',) + study_key,
+            lambda: EventStudy.from_csv(spec['housing_series_csv'], spec['announcements_csv'], name_to_code)
+        )
+    effects = {} if study is None else {
+        'state_effects': {s: e / 100 for s, e in study.state_effects.items()},
+        'pooled_effect': study.pooled_effect / 100,
+    }
+
+    regions = housing = None
+    if os.path.exists(spec['housing_csv']):
+        housing = _shared_input(('housing', digests['housing_csv']), lambda: HousingTable.from_csv(spec['housing_csv']))
+        validation['housing'] = require_valid(housing.df, HOUSING_SCHEMA, spec['housing_csv'])
+        regions = _shared_input(
+            ('regions', digests['housing_csv']) + (study_key if study is not None else ()),
+            lambda: RegionIndex(housing.df, **effects)
+        )
+    else:
+        print(f"Warning: Housing data file not found at {spec['housing_csv']}")
+
+    gazetteer = _shared_input(
+        ('gazetteer', digests['state_csv'], digests['housing_csv'] if regions is not None else None),
+        lambda: from_state_table(electricity.df, regions)
+    )
+
+    housing_forecast = None
+    if os.path.exists(spec['housing_series_csv']):
+        housing_forecast = _shared_input(
+            ('housing_forecast', digests['housing_series_csv'], digests['state_csv']),
+            lambda: StateForecast.from_csv(spec['housing_series_csv'], name_to_code)
+        )
+
+    forest_schema = housing_forest.latest_schema_path()
+    forest = None
+    if forest_schema is not None:
+        forest = _shared_input(('housing_forest', forest_schema), lambda: housing_forest.load(forest_schema))
+
+    pricing_nodes = _shared_input(
+        ('pricing_nodes', digests['node_coords_csv'], digests['iso_summary_csv']),
+        lambda: build_pricing_node_index(spec['node_coords_csv'], spec['iso_summary_csv'])
+    )
+
+    version = http_cache.compute_dataset_version(
+        [spec[k] for k in input_keys],
+        {'PASS_THROUGH_ELEC': spec['pass_through'], 'ASSUMPTION_SHARE_FLOOR': spec['share_floor']}
+    )
+    return ModelSnapshot(
+        name=name or version,
+        version=version,
+        loaded_at=time.time(),
+        spec=spec,
+        electricity=electricity,
+        housing=housing,
+        pricing_nodes=pricing_nodes,
+        zip_centroids=load_zip_centroids(),
+        regions=regions,
+        gazetteer=gazetteer,
+        housing_forest=forest,
+        housing_forecast=housing_forecast,
+        event_study=study,
+        markets=markets,
+        validation=validation,
+    )
+
+
+class ModelRegistry:
+    """Named model snapshots with a 'latest' default, LRU eviction and background builds."""
+
+    def __init__(self, builder=build_snapshot, max_versions=MAX_VERSIONS):
+        self._builder = builder
+        self._max_versions = max(1, max_versions)
+        self._versions = OrderedDict()
+        self._latest = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.reloading = False
+        self.last_error = None
+        self.last_reload_at = None
+
+    @property
+    def current(self):
+        return self._latest
+
+    def get(self, name=None):
+        """Return the named snapshot (latest when name is None), or None if it isn't loaded."""
+        if name is None or name == 'latest':
+            return self._latest
+        with self._lock:
+            snap = self._versions.get(name)
+            if snap is not None:
+                self._versions.move_to_end(name)
+        return snap
+
+    def versions(self):
+        with self._lock:
+            return list(self._versions.values())
+
+    def _add(self, snap, make_latest):
+        with self._lock:
+            self._versions[snap.name] = snap
+            self._versions.move_to_end(snap.name)
+            if make_latest:
+                # Single reference assignment: readers see either the old or the new snapshot
+                self._latest = snap
+            while len(self._versions) > self._max_versions:
+                oldest = next(n for n in self._versions if self._versions[n] is not self._latest)
+                del self._versions[oldest]
+
+    def load(self, spec=None, name=None, make_latest=True):
+        snap = self._builder(spec, name)
+        self._add(snap, make_latest)
+        return snap
+
+    def _build_async(self, spec, name, make_latest):
+        if not self._build_lock.acquire(blocking=False):
+            return False
+        self.reloading = True
+
+        def run():
+            try:
+                snap = self.load(spec, name, make_latest)
+                self.last_error = None
+                print(f"Model snapshot {snap.name} loaded: version {snap.version}")
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"Model snapshot build failed, keeping current versions: {e}")
+            finally:
+                self.last_reload_at = time.time()
+                self.reloading = False
+                self._build_lock.release()
+
+        threading.Thread(target=run, name="snapshot-build", daemon=True).start()
+        return True
+
+    def reload_async(self):
+        """Rebuild the latest snapshot's spec from the input files; returns False if a build is running."""
+        latest = self._latest
+        return self._build_async(latest.spec if latest else None, None, True)
+
+    def register_async(self, spec, name, make_latest=False):
+        """Build an additional named version in the background; returns False if a build is running."""
+        return self._build_async(spec, name, make_latest)
+
+    def watch(self, paths=INPUT_PATHS, interval=5.0):
+        """Poll the input files' mtimes and trigger a reload whenever one changes."""
+        def mtimes():
+            return {p: os.path.getmtime(p) if os.path.exists(p) else None for p in paths}
+
+        def loop():
+            seen = mtimes()
+            while True:
+                time.sleep(interval)
+                now = mtimes()
+                if now != seen and self.reload_async():
+                    seen = now
+
+        threading.Thread(target=loop, name="snapshot-watch", daemon=True).start()
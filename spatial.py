@@ -0,0 +1,98 @@
+"""
+Nearest-pricing-node lookup for sub-state electricity estimates.
+
+Pricing nodes from the local coordinates table are joined to their ISO summary
+statistics and indexed in a KD-tree over unit-sphere coordinates, so chord
+distance ranks nodes exactly like great-circle distance. A lookup is one tree
+query (tens of microseconds); the index is built once per model snapshot.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+NODE_COORDS_PATH = 'pricing_node_coordinates.csv'
+ISO_SUMMARY_PATH = 'csv-generation/all_isos_summary_statistics.csv'
+ZIP_CENTROIDS_PATH = os.environ.get('FIREFORCE_ZIP_CENTROIDS', 'zip_centroids.csv')
+EARTH_RADIUS_KM = 6371.0
+
+
+def _unit_vectors(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+class PricingNodeIndex:
+    def __init__(self, nodes, iso_avg_price=None):
+        """
+        iso_avg_price: market-wide average LMP per ISO over every node in the ISO
+        summary, not only the indexed ones (defaults to the indexed nodes' mean).
+        """
+        self.nodes = nodes.reset_index(drop=True)
+        self.tree = cKDTree(_unit_vectors(self.nodes['latitude'].values, self.nodes['longitude'].values))
+        # Market-wide average LMP per ISO, to express a location's price relative to its market
+        if iso_avg_price is None:
+            iso_avg_price = nodes.groupby('ISO')['Avg_Price'].mean().to_dict()
+        self.iso_avg_price = iso_avg_price
+        self._iso = self.nodes['ISO'].values
+        self._location = self.nodes['location'].values
+        self._state = self.nodes['state'].values
+        self._price = self.nodes['Avg_Price'].values
+        self._std = self.nodes['Price_Std_Dev'].values
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def nearest(self, lat, lon, k=3):
+        """Return the k nearest nodes and an inverse-distance-weighted local price."""
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError(f"Invalid coordinates: {lat}, {lon}")
+        k = max(1, min(int(k), len(self)))
+        chord, idx = self.tree.query(_unit_vectors(lat, lon)[0], k=k)
+        chord, idx = np.atleast_1d(chord), np.atleast_1d(idx)
+        dist_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+
+        weights = 1.0 / np.maximum(dist_km, 1.0)
+        local_price = float(np.sum(weights * self._price[idx]) / np.sum(weights))
+        iso = self._iso[idx[0]]
+        iso_avg = self.iso_avg_price.get(iso)
+        return {
+            'iso': iso,
+            'local_avg_price': local_price,
+            'iso_avg_price': iso_avg,
+            'local_price_factor': local_price / iso_avg if iso_avg else 1.0,
+            'nodes': [{
+                'iso': self._iso[i],
+                'location': self._location[i],
+                'state': self._state[i],
+                'distance_km': float(d),
+                'avg_price': float(self._price[i]),
+                'price_std_dev': float(self._std[i]),
+            } for i, d in zip(idx, dist_km)]
+        }
+
+
+def build_pricing_node_index(coords_path=NODE_COORDS_PATH, summary_path=ISO_SUMMARY_PATH):
+    """Join node coordinates to the latest-year ISO summary and index them; None if inputs are missing."""
+    if not (os.path.exists(coords_path) and os.path.exists(summary_path)):
+        print(f"Warning: pricing node inputs not found ({coords_path}, {summary_path}); spatial lookup disabled")
+        return None
+    coords = pd.read_csv(coords_path)
+    summary = pd.read_csv(summary_path)
+    summary = summary[summary['year'] == summary['year'].max()]
+    nodes = coords.merge(summary[['ISO', 'location', 'Avg_Price', 'Price_Std_Dev']], on=['ISO', 'location'], how='inner')
+    nodes = nodes.dropna(subset=['latitude', 'longitude', 'Avg_Price'])
+    nodes['Price_Std_Dev'] = nodes['Price_Std_Dev'].fillna(0.0)
+    if nodes.empty:
+        return None
+    # The whole ISO's mean, same year as the nodes: most summary rows have no coordinates
+    return PricingNodeIndex(nodes, summary.groupby('ISO')['Avg_Price'].mean().to_dict())
+
+
+def load_zip_centroids(path=ZIP_CENTROIDS_PATH):
+    """Optional ZIP -> (lat, lon) table with zip, latitude, longitude columns."""
+    if not os.path.exists(path):
+        return None
+    df = pd.read_csv(path, dtype={'zip': str})
+    return dict(zip(df['zip'].str.zfill(5), zip(df['latitude'].astype(float), df['longitude'].astype(float))))
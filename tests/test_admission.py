@@ -0,0 +1,142 @@
+import threading
+import time
+
+import pytest
+
+import admission
+from admission import HIGH, LOW, NORMAL, AdmissionController, Rejected
+
+POLICIES = {'light': (HIGH, None), 'capped': (HIGH, 1), 'normal': (NORMAL, None), 'heavy': (LOW, 1)}
+
+
+def controller(max_concurrency=1, max_queue=4, timeout=0.05):
+    return AdmissionController(max_concurrency, max_queue, timeout, POLICIES)
+
+
+class Request(threading.Thread):
+    """acquire() on a thread; records whether the request was admitted or rejected."""
+
+    def __init__(self, ctl, key):
+        super().__init__(daemon=True)
+        self.ctl, self.key = ctl, key
+        self.admitted = threading.Event()
+        self.rejected = None
+
+    def run(self):
+        try:
+            self.ctl.acquire(self.key)
+            self.admitted.set()
+        except Rejected as e:
+            self.rejected = e
+
+
+def enqueue(ctl, key):
+    """Start a request and return once it is waiting in the queue."""
+    queued = ctl.stats()['queued']
+    req = Request(ctl, key)
+    req.start()
+    deadline = time.monotonic() + 5
+    while ctl.stats()['queued'] == queued:
+        assert time.monotonic() < deadline, 'request never queued'
+        time.sleep(0.001)
+    return req
+
+
+def test_admits_immediately_while_there_is_capacity():
+    ctl = controller(max_concurrency=2)
+    assert ctl.acquire('light') == 0.0
+    assert ctl.acquire('normal') == 0.0
+    assert ctl.stats()['active'] == 2
+    ctl.release('light')
+    ctl.release('normal')
+    assert ctl.stats()['active'] == 0
+
+
+def test_release_admits_the_highest_priority_waiter_first():
+    ctl = controller(timeout=5)
+    ctl.acquire('normal')
+    heavy = enqueue(ctl, 'heavy')
+    light = enqueue(ctl, 'light')
+
+    ctl.release('normal')
+    assert light.admitted.wait(5)
+    assert not heavy.admitted.is_set()
+    ctl.release('light')
+    assert heavy.admitted.wait(5)
+    ctl.release('heavy')
+    stats = ctl.stats()
+    assert (stats['active'], stats['queued']) == (0, 0)
+
+
+def test_waiter_at_its_endpoint_limit_does_not_block_others():
+    ctl = controller(max_concurrency=2, timeout=5)
+    ctl.acquire('capped')
+    ctl.acquire('normal')
+    capped = enqueue(ctl, 'capped')
+    heavy = enqueue(ctl, 'heavy')
+
+    # The freed slot skips the higher-priority waiter whose endpoint is at its limit
+    ctl.release('normal')
+    assert heavy.admitted.wait(5)
+    assert not capped.admitted.is_set()
+    ctl.release('capped')
+    assert capped.admitted.wait(5)
+
+
+def test_full_queue_evicts_the_lowest_priority_waiter():
+    ctl = controller(max_queue=1, timeout=5)
+    ctl.acquire('normal')
+    heavy = enqueue(ctl, 'heavy')
+    # The queue length does not change when light replaces heavy, so wait for the eviction instead
+    light = Request(ctl, 'light')
+    light.start()
+
+    heavy.join(5)
+    assert heavy.rejected is not None
+    assert (heavy.rejected.status, heavy.rejected.reason) == (503, 'queue_full')
+    assert ctl.stats()['queued'] == 1
+
+    # The newcomer is now the lowest priority, so it is shed itself without waiting
+    start = time.perf_counter()
+    with pytest.raises(Rejected) as e:
+        ctl.acquire('heavy')
+    assert (e.value.status, e.value.reason) == (503, 'queue_full')
+    assert time.perf_counter() - start < 1
+
+    ctl.release('normal')
+    assert light.admitted.wait(5)
+
+
+def test_timeout_is_429_when_only_the_endpoint_limit_is_reached():
+    ctl = controller(max_concurrency=2)
+    ctl.acquire('heavy')
+    with pytest.raises(Rejected) as e:
+        ctl.acquire('heavy')
+    assert (e.value.status, e.value.reason) == (429, 'timeout')
+    assert 1 <= e.value.retry_after <= 30
+    assert ctl.stats()['queued'] == 0
+
+
+def test_timeout_is_503_when_the_server_is_saturated():
+    ctl = controller(max_concurrency=1)
+    ctl.acquire('light')
+    with pytest.raises(Rejected) as e:
+        ctl.acquire('light')
+    assert (e.value.status, e.value.reason) == (503, 'timeout')
+
+    # Both limits reached: the server as a whole is the bottleneck
+    ctl = controller(max_concurrency=1)
+    ctl.acquire('heavy')
+    with pytest.raises(Rejected) as e:
+        ctl.acquire('heavy')
+    assert e.value.status == 503
+
+
+def test_unknown_keys_use_the_default_policy():
+    ctl = controller(max_concurrency=2)
+    assert admission.DEFAULT_POLICY == (NORMAL, None)
+    ctl.acquire('unlisted')
+    ctl.acquire('unlisted')
+    with pytest.raises(Rejected) as e:
+        ctl.acquire('unlisted')
+    assert e.value.status == 503
@@ -0,0 +1,68 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import bulk
+
+CODES = ['TX', 'VA']
+
+
+def state_table():
+    return bulk.StateTable(CODES, [10.0, -5.0], [0.03, 0.04], [0.01, 0.0],
+                           lambda text: text.strip().upper() if text.strip().upper() in CODES else None)
+
+
+def drifting_csv(n=23):
+    """Pass-through columns whose per-chunk inferred dtype changes: blank then text, numeric then text."""
+    return pd.DataFrame({
+        'customer_id': [f'00{i}' for i in range(n)],
+        'state': ['TX', 'va', 'ZZ'] * (n // 3) + ['TX'] * (n % 3),
+        'power_bill': np.arange(n) + 100.0,
+        'water_bill': 50.0,
+        'household_size': 2,
+        'note': ['vip' if i == 12 else '' for i in range(n)],
+        'blank': '',
+        'mixed': ['7' if i < 6 else 'x' for i in range(n)],
+    }).to_csv(index=False).encode()
+
+
+def run(data, fmt, chunksize=5):
+    frames = bulk.process(bulk.read_chunks(io.BytesIO(data), 'csv', chunksize), state_table())
+    return b''.join(bulk.ENCODERS[fmt](frames))
+
+
+def read_output(data, fmt):
+    if fmt == 'parquet':
+        return pd.read_parquet(io.BytesIO(data))
+    if fmt == 'ndjson':
+        return pd.read_json(io.BytesIO(data), lines=True, dtype=False)
+    return pd.read_csv(io.BytesIO(data), dtype={'customer_id': str, 'mixed': str, 'note': str})
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'ndjson', pytest.param('parquet', marks=pytest.mark.skipif(
+    bulk.pa is None, reason='pyarrow not installed'))])
+def test_drifting_passthrough_columns_stream_every_chunk(fmt):
+    out = read_output(run(drifting_csv(), fmt), fmt)
+    assert len(out) == 23
+    assert out['row'].tolist() == list(range(1, 24))
+    assert out['customer_id'].tolist()[:3] == ['000', '001', '002']
+    assert out['note'].iloc[12] == 'vip'
+    assert out['mixed'].iloc[5] == '7' and out['mixed'].iloc[6] == 'x'
+
+
+def test_results_follow_calculator_formulas():
+    out = read_output(run(drifting_csv(), 'csv'), 'csv')
+    tx, va, bad = out.iloc[0], out.iloc[1], out.iloc[2]
+    assert tx['state'] == 'TX' and va['state'] == 'VA'
+    assert tx['new_power_bill'] == pytest.approx(100 * 1.10)
+    assert va['power_increase'] == pytest.approx(101 * -0.05)
+    assert tx['annual_increase'] == pytest.approx((100 * 0.10 + 50 * 0.18) * 12)
+    assert tx['per_person_monthly_impact'] == pytest.approx((100 * 0.10 + 50 * 0.18) / 2)
+    assert bad['error'] == 'State not found' and np.isnan(bad['annual_increase'])
+
+
+def test_missing_required_column_fails_before_output():
+    with pytest.raises(ValueError, match='power_bill'):
+        run(b'state,water_bill\nTX,10\n', 'csv')
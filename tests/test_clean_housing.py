@@ -0,0 +1,56 @@
+import importlib.util
+import os
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_spec = importlib.util.spec_from_file_location(
+    'clean_housing', os.path.join(ROOT, 'csv-generation', 'house', 'clean_housing.py'))
+clean_housing = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(clean_housing)
+
+COLUMNS = ['State', 'RegionID', 'Date', 'Avg_Home_Value', 'HomeValue_Pct_Change', 'Is_Post_Announcement', 'Tag']
+ROWS = [
+    ('TX', 1, '2020-12-31', 300000.0, 5.0, 0, 'tx-pre'),
+    ('TX', 1, '2020-12-31', 300000.0, 5.0, 1, 'tx-post'),
+    ('TX', 1, '2020-12-31', 300000.0, 5.0, 1, 'tx-post-again'),
+    ('VA', 2, '2020-12-31', 400000.0, 3.0, 0, 'va-first'),
+    ('VA', 2, '2021-12-31', 410000.0, None, 0, 'va-missing'),
+    ('VA', 2, '2020-12-31', 400000.0, 3.0, 0, 'va-repeat'),
+    ('VA', 2, '2022-12-31', float('inf'), 2.0, 0, 'va-inf'),
+    ('CA', 3, '2020-12-31', 0.0, 1.0, 0, 'ca-zero'),
+    ('CA', 3, '2021-12-31', 500000.0, 2000.0, 0, 'ca-growth'),
+    ('ca', 3, '2022-12-31', 500000.0, 1.0, 1, 'ca-lower'),
+    ('CA', None, '2023-12-31', 500000.0, 1.0, 0, 'ca-no-region'),
+    # Unusable rows do not count as duplicates of a usable row with the same key
+    ('CA', 3, '2024-12-31', 500000.0, 1.0, 0, 'ca-kept'),
+    ('CA', 3, '2024-12-31', 500000.0, None, 1, 'ca-missing-post'),
+]
+
+
+@pytest.fixture
+def panel(tmp_path):
+    path = tmp_path / 'panel.csv'
+    pd.DataFrame(ROWS, columns=COLUMNS).to_csv(path, index=False)
+    return str(path)
+
+
+def test_clean_keeps_one_usable_row_per_key(panel, tmp_path):
+    out = str(tmp_path / 'clean.csv')
+    stats = clean_housing.clean(panel, out, chunksize=4)
+
+    assert pd.read_csv(out)['Tag'].tolist() == ['tx-post', 'va-first', 'ca-kept']
+    assert stats['rows_in'] == len(ROWS)
+    assert stats['rows_out'] == 3
+    assert stats['chunks'] == 4
+    assert stats['dropped'] == {'missing_values': 3, 'out_of_bounds': 2, 'bad_key': 2, 'duplicates': 3}
+
+
+def test_clean_output_does_not_depend_on_chunksize(panel, tmp_path):
+    outputs = []
+    for chunksize in (1, 3, 100):
+        out = tmp_path / f'clean_{chunksize}.csv'
+        clean_housing.clean(panel, str(out), chunksize=chunksize)
+        outputs.append(out.read_bytes())
+    assert outputs[0] == outputs[1] == outputs[2]
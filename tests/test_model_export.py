@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sklearn = pytest.importorskip('sklearn')
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+import housing_forest
+import model_export
+
+
+def close(expected, actual, tol=1e-8):
+    expected, actual = np.asarray(expected), np.asarray(actual)
+    return np.max(np.abs(expected - actual)) <= tol * max(1.0, np.max(np.abs(expected)))
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return housing_forest.training_frame(pd.read_csv(housing_forest.TRAINING_DATA))
+
+
+@pytest.fixture(scope='module')
+def features(frame):
+    schema = {'version': 'test', 'states': sorted(frame['State'].unique()),
+              'numeric_features': housing_forest.NUMERIC_FEATURES}
+    X = housing_forest.HousingForest(None, schema).features(
+        frame['State'].tolist(), frame['Year'].values, frame['Is_Post_Announcement'].values,
+        frame['Start_Home_Value'].values)
+    # Off-sample start values too, so thresholds are crossed from both sides
+    return X, np.vstack([X, X * np.array([1, 1, 1.07] + [1] * (X.shape[1] - 3))])
+
+
+def test_forest_matches_random_forest(frame, features, tmp_path):
+    X, probe = features
+    rf = RandomForestRegressor(**dict(housing_forest.DEFAULT_PARAMS, n_estimators=25)).fit(
+        X, frame['HomeValue_Pct_Change'].values)
+    forest = model_export.export_forest(rf)
+    assert close(rf.predict(probe), forest.predict(probe))
+
+    model_export.save(tmp_path / 'forest.npz', forest)
+    assert close(rf.predict(probe), model_export.load(tmp_path / 'forest.npz').predict(probe))
+
+
+def test_served_forest_artifact_matches_its_joblib_model(features):
+    schema_path = housing_forest.latest_schema_path()
+    if schema_path is None:
+        pytest.skip('no trained forest artifact')
+    joblib = pytest.importorskip('joblib')
+    schema = housing_forest._read_json(schema_path)
+    rf = joblib.load(os.path.join(os.path.dirname(schema_path), schema['model_file']))
+    _, probe = features
+    assert close(rf.predict(probe), model_export.export_forest(rf).predict(probe))
+
+
+def test_linear_export_matches_onehot_pipeline(frame):
+    ct = ColumnTransformer([('state_enc', OneHotEncoder(handle_unknown='ignore'), ['State'])],
+                           remainder='passthrough')
+    pipe = Pipeline([('preprocess', ct), ('regressor', LinearRegression())])
+    X = frame[['State', 'Start_Home_Value']]
+    pipe.fit(X, frame['HomeValue_Pct_Change'])
+    lin = model_export.export_linear_pipeline(pipe)
+
+    assert close(pipe.predict(X), lin.predict(X[['Start_Home_Value']].values, X['State'].tolist()))
+    unseen = pd.DataFrame({'State': ['ZZ'], 'Start_Home_Value': [250000.0]})
+    assert close(pipe.predict(unseen), lin.predict(unseen[['Start_Home_Value']].values, ['ZZ']))
+
+
+def test_fit_linear_matches_linear_regression():
+    raw = pd.read_csv(housing_forest.TRAINING_DATA).dropna(subset=['Avg_Home_Value'])
+    for state, g in raw.groupby('State'):
+        X, y = g[['Year', 'Is_Post_Announcement']].values, g['Avg_Home_Value'].values
+        assert close(LinearRegression().fit(X, y).predict(X), model_export.fit_linear(X, y).predict(X)), state
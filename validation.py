@@ -0,0 +1,157 @@
+"""
+Ingest-time validation of the served datasets.
+
+Checks run once when a dataset is loaded (snapshot build) or converted
+(pipeline stages), never per request: required columns, dtypes, NaN counts in
+non-nullable columns, duplicate keys and value bounds, each as one vectorized
+pass over the column. The result is a report; errors abort the snapshot build
+(a reload then keeps serving the previous snapshot), warnings are recorded.
+
+    python validation.py                     validate the default housing and state tables
+    python validation.py housing path.csv    validate one file against a named schema
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+# column -> dtype kind ('int', 'float', 'str', 'date'), nullable, (min, max) bounds;
+# required=False columns are only checked when present
+HOUSING_SCHEMA = {
+    'key': ['RegionID', 'Date'],
+    'columns': {
+        'State': {'dtype': 'str', 'nullable': False, 'pattern': r'^[A-Z]{2}$'},
+        'Year': {'dtype': 'int', 'nullable': False, 'bounds': (1990, 2100), 'required': False},
+        'RegionID': {'dtype': 'int', 'nullable': False, 'required': False},
+        'Date': {'dtype': 'date', 'nullable': False},
+        'Avg_Home_Value': {'dtype': 'float', 'nullable': True, 'bounds': (0, 1e8)},
+        'HomeValue_Pct_Change': {'dtype': 'float', 'nullable': True, 'bounds': (-100, 1000)},
+        'Is_Post_Announcement': {'dtype': 'int', 'nullable': False, 'bounds': (0, 1)},
+    },
+}
+STATE_SCHEMA = {
+    'key': ['StateCode'],
+    'columns': {
+        'StateCode': {'dtype': 'str', 'nullable': False, 'pattern': r'^[A-Za-z]{2}$'},
+        'State': {'dtype': 'str', 'nullable': False},
+        'AvgRetailPrice_cents_per_kWh': {'dtype': 'float', 'nullable': False, 'bounds': (0, 200)},
+        'NetSummerCapacity_MW': {'dtype': 'float', 'nullable': False, 'bounds': (0, None)},
+        'NetGeneration_MWh': {'dtype': 'float', 'nullable': False, 'bounds': (0, None)},
+        'TotalRetailSales_MWh': {'dtype': 'float', 'nullable': False, 'bounds': (0, None)},
+    },
+}
+SCHEMAS = {'housing': HOUSING_SCHEMA, 'state': STATE_SCHEMA}
+DEFAULT_FILES = {
+    'housing': 'csv-generation/house/processed_states_hyperscale_clean.csv',
+    'state': 'State_energy_metrics.csv',
+}
+
+
+class DataValidationError(ValueError):
+    def __init__(self, name, report):
+        super().__init__(f"{name} failed validation: {'; '.join(report['errors'])}")
+        self.report = report
+
+
+def _dtype_ok(series, kind):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return _dtype_ok(pd.Series(series.cat.categories), kind)
+    if kind == 'int':
+        # Integer columns read with NaNs come back as float; accept whole numbers
+        return pd.api.types.is_integer_dtype(series) or (
+            pd.api.types.is_float_dtype(series) and bool(np.all(np.mod(series.dropna(), 1) == 0)))
+    if kind == 'float':
+        return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+    if kind == 'date':
+        return pd.api.types.is_datetime64_any_dtype(series) or pd.to_datetime(series, errors='coerce').notna().sum() == series.notna().sum()
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def validate(df, schema, name='dataset'):
+    """Return a report dict: rows, errors, warnings, null counts, duplicate keys, bound violations."""
+    errors, warnings = [], []
+    columns = schema['columns']
+    missing = [c for c, rule in columns.items() if c not in df.columns and rule.get('required', True)]
+    if missing:
+        errors.append(f"missing required columns: {missing}")
+
+    nulls, out_of_bounds = {}, {}
+    for col, rule in columns.items():
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if not _dtype_ok(series, rule['dtype']):
+            errors.append(f"{col}: expected {rule['dtype']}, got {series.dtype}")
+            continue
+        n_null = int(series.isna().sum())
+        nulls[col] = n_null
+        if n_null and not rule.get('nullable', True):
+            errors.append(f"{col}: {n_null} missing values in a non-nullable column")
+        elif n_null:
+            warnings.append(f"{col}: {n_null} missing values")
+        if 'pattern' in rule:
+            bad = int((~series.astype(str).str.match(rule['pattern'])).sum())
+            if bad:
+                errors.append(f"{col}: {bad} values do not match {rule['pattern']}")
+        lo, hi = rule.get('bounds', (None, None))
+        if lo is not None or hi is not None:
+            values = series.to_numpy(dtype=float, na_value=np.nan)
+            bad = int(np.sum((values < lo) if lo is not None else 0) + np.sum((values > hi) if hi is not None else 0))
+            out_of_bounds[col] = bad
+            if bad:
+                errors.append(f"{col}: {bad} values outside [{lo}, {hi}]")
+
+    duplicates = 0
+    key = [c for c in schema.get('key', []) if c in df.columns]
+    if key and len(key) == len(schema['key']):
+        duplicates = int(df.duplicated(subset=key).sum())
+        if duplicates:
+            warnings.append(f"{duplicates} rows repeat the key ({', '.join(key)})")
+
+    return {
+        'name': name,
+        'rows': int(len(df)),
+        'valid': not errors,
+        'errors': errors,
+        'warnings': warnings,
+        'null_counts': nulls,
+        'duplicate_keys': duplicates,
+        'out_of_bounds': out_of_bounds,
+    }
+
+
+def require_valid(df, schema, name):
+    """Validate and raise DataValidationError on errors; returns the report otherwise."""
+    report = validate(df, schema, name)
+    for warning in report['warnings']:
+        print(f"Warning: {name}: {warning}")
+    if not report['valid']:
+        raise DataValidationError(name, report)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate dataset files against their schemas")
+    parser.add_argument('schema', nargs='?', choices=sorted(SCHEMAS), help='Schema to check (default: all)')
+    parser.add_argument('path', nargs='?', help='File to validate (default: the served file)')
+    parser.add_argument('--json', action='store_true', help='Print the full reports as JSON')
+    args = parser.parse_args()
+
+    targets = [(args.schema, args.path or DEFAULT_FILES[args.schema])] if args.schema else list(DEFAULT_FILES.items())
+    reports = [validate(pd.read_csv(path), SCHEMAS[name], path) for name, path in targets]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for r in reports:
+            print(f"{r['name']}: {r['rows']} rows, {'OK' if r['valid'] else 'INVALID'}")
+            for e in r['errors']:
+                print(f"  error:   {e}")
+            for w in r['warnings']:
+                print(f"  warning: {w}")
+    sys.exit(0 if all(r['valid'] for r in reports) else 1)
+
+
+if __name__ == '__main__':
+    main()